@@ -0,0 +1,205 @@
+# app/backfill.py
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyupbit
+from app.db_1min_btc import upsert_candles
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+from app.utils.rate_limit import RateLimiter
+from app.utils.retry import retry
+from app.utils.time_utils import get_kst_now
+from config import BACKFILL_STATE_FILE, UPBIT_QUOTATION_RPS
+
+log = get_logger()
+
+TICKER = "KRW-BTC"
+PAGE_SIZE = 200  # 업비트 캔들 API 1회 최대 개수
+MINUTE = timedelta(minutes=1)
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+KST_OFFSET = timedelta(hours=9)  # 업비트는 시간대 없는 to 를 UTC 로 해석
+
+
+def find_gaps(start: datetime, end: datetime) -> list:
+    """
+    btc_price_1min 에서 [start, end] 사이에 비어 있는 분 구간을 한 번의 쿼리로 찾기
+    구간 양 끝에 경계값을 붙여 앞/뒤 공백과 빈 테이블도 같은 방식으로 잡는다
+
+    Returns:
+        (빈 구간 시작, 빈 구간 끝) 리스트 - 양 끝 포함
+    """
+    sql = """
+        SELECT prev_ts, ts FROM (
+            SELECT ts, LAG(ts) OVER (ORDER BY ts) AS prev_ts
+            FROM (
+                SELECT CAST(%s AS DATETIME) AS ts
+                UNION ALL
+                SELECT timestamp FROM btc_price_1min
+                WHERE timestamp > %s AND timestamp < %s
+                UNION ALL
+                SELECT CAST(%s AS DATETIME)
+            ) bounded
+        ) t
+        WHERE TIMESTAMPDIFF(MINUTE, prev_ts, ts) > 1
+        ORDER BY ts
+    """
+    low = (start - MINUTE).strftime(TS_FORMAT)
+    high = (end + MINUTE).strftime(TS_FORMAT)
+
+    with db_session() as conn:
+        if not conn:
+            return []
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, (low, low, high, high))
+                rows = cursor.fetchall()
+        except Exception as e:
+            log.error(f"[빈 구간 조회 실패] {e}")
+            return []
+
+    return [(prev_ts + MINUTE, ts - MINUTE) for prev_ts, ts in rows]
+
+
+def split_pages(gaps: list) -> list:
+    """
+    빈 구간을 API 1회 분량(200분) 페이지로 나누기 (최신 → 과거 순)
+
+    Returns:
+        (페이지 시작, to) 리스트 - to 는 업비트 API 와 같이 미포함
+    """
+    pages = []
+    for gap_start, gap_end in gaps:
+        to = gap_end + MINUTE
+        while to > gap_start:
+            page_start = max(gap_start, to - PAGE_SIZE * MINUTE)
+            pages.append((page_start, to))
+            to = page_start
+    return pages
+
+
+def _load_state(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    try:
+        with open(path, "r") as f:
+            return set(json.load(f).get("done", []))
+    except (OSError, ValueError):
+        return set()
+
+
+def _save_state(path: str, done: set):
+    """임시 파일에 쓰고 교체 - 중간에 죽어도 상태 파일이 깨지지 않음"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(tmp, path)
+
+
+def _default_fetch(ticker: str, count: int, to: datetime):
+    """to 는 KST naive - pyupbit 가 시간대를 떼고 보내므로 UTC 로 바꿔서 전달 (응답 인덱스는 KST)"""
+    return pyupbit.get_ohlcv(ticker, interval="minute1", count=count, to=(to - KST_OFFSET).strftime(TS_FORMAT))
+
+
+def _covers(df: pd.DataFrame, page_start: datetime) -> bool:
+    """
+    응답이 페이지 [page_start, to) 를 덮는지
+    - 가장 오래된 봉이 page_start 이전이면 그 사이 빈 분은 거래가 없던 분
+    - 요청 개수보다 적게 왔으면 더 이전 데이터가 없는 것
+    (시간대가 어긋나 엉뚱한 구간이 오면 둘 다 아니므로 완료로 기록하지 않음)
+    """
+    return len(df) < PAGE_SIZE or df.index.min() <= page_start
+
+
+def backfill(start: datetime, end: datetime, workers: int = 4, rps: float = UPBIT_QUOTATION_RPS,
+             state_file: str = BACKFILL_STATE_FILE, fetch=_default_fetch) -> dict:
+    """
+    빈 1분봉 구간을 병렬로 받아서 일괄 저장
+
+    - 요청 속도는 rps 토큰 버킷으로 제한
+    - 저장은 upsert 이므로 여러 번 돌려도 결과가 같음 (멱등)
+    - 응답이 페이지 구간을 덮고 저장까지 끝난 페이지만 상태 파일에 기록해 재실행 시 건너뜀
+      (거래가 없어 영영 비어 있는 분 때문에 같은 페이지를 반복 요청하지 않도록)
+
+    Args:
+        start, end: 채울 기간 (KST, 양 끝 포함)
+        workers: 동시 요청 스레드 수
+        rps: 초당 최대 요청 수
+        state_file: 진행 상태 파일 경로
+        fetch: fetch(ticker, count, to: KST naive) → KST DatetimeIndex OHLCV DataFrame (테스트용 교체 가능)
+
+    Returns:
+        gaps / pages / skipped / fetched / rows / failed / uncovered 통계 dict
+    """
+    gaps = find_gaps(start, end)
+    pages = split_pages(gaps)
+    done = _load_state(state_file)
+    todo = [p for p in pages if p[1].strftime(TS_FORMAT) not in done]
+
+    stats = {"gaps": len(gaps), "pages": len(pages), "skipped": len(pages) - len(todo),
+             "fetched": 0, "rows": 0, "failed": 0, "uncovered": 0}
+    log.info(f"🧩 빈 구간 {len(gaps)}개, 페이지 {len(pages)}개 (이미 완료 {stats['skipped']}개)")
+    if not todo:
+        return stats
+
+    limiter = RateLimiter(rps)
+
+    @retry(max_retries=3, delay=1)
+    def fetch_page(page_start: datetime, to: datetime):
+        limiter.acquire()
+        df = fetch(TICKER, PAGE_SIZE, to)
+        if df is None:
+            raise Exception(f"{to} 이전 1분봉 응답 없음")
+        return df
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_page, *page): page for page in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            page_start, to = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                log.error(f"[백필 페이지 실패] {page_start} ~ {to}: {e}")
+                continue
+
+            covered = _covers(df, page_start)
+            df = df[(df.index >= page_start) & (df.index < to)]
+            if not df.empty and not upsert_candles(df):
+                stats["failed"] += 1
+                continue
+
+            stats["fetched"] += 1
+            stats["rows"] += len(df)
+            if covered:
+                done.add(to.strftime(TS_FORMAT))
+            else:
+                stats["uncovered"] += 1
+                log.warning(f"⚠️ 백필 응답이 페이지를 덮지 않음 (완료로 기록 안 함): {page_start} ~ {to}")
+            if i % 50 == 0:
+                _save_state(state_file, done)
+                log.info(f"⏳ 백필 진행 {i}/{len(todo)} 페이지, {stats['rows']}행")
+
+    _save_state(state_file, done)
+    log.info(f"✅ 백필 완료: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="btc_price_1min 빈 구간 백필")
+    parser.add_argument("--start", help="시작 시각 (KST, 기본: --days 전)")
+    parser.add_argument("--end", help="종료 시각 (KST, 기본: 현재 분의 직전)")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=UPBIT_QUOTATION_RPS)
+    parser.add_argument("--state", default=BACKFILL_STATE_FILE)
+    args = parser.parse_args()
+
+    now = get_kst_now().replace(tzinfo=None, second=0, microsecond=0)
+    end = pd.Timestamp(args.end).to_pydatetime() if args.end else now - MINUTE
+    start = pd.Timestamp(args.start).to_pydatetime() if args.start else end - timedelta(days=args.days)
+    backfill(start, end, args.workers, args.rps, args.state)
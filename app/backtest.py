@@ -0,0 +1,351 @@
+# app/backtest.py
+
+import argparse
+import numpy as np
+import pandas as pd
+from app import indicators, strategy
+from app.history_store import get_history_store
+from app.strategy2 import DEFAULT_PARAMS, Strategy2Params
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+from config import INITIAL_SEED, TRADE_AMOUNT, TAKE_PROFIT, STOP_LOSS
+
+log = get_logger()
+
+MINUTE_NS = 60 * 10**9
+
+
+def load_history(start: str = None, end: str = None, source: str = "db") -> pd.DataFrame:
+    """
+    btc_price_1min 전체(또는 기간) 이력을 한 번에 불러오기
+
+    Args:
+        start: 시작 시각 (포함, 'YYYY-MM-DD HH:MM:SS')
+        end: 종료 시각 (포함)
+        source: "db" (MySQL) 또는 "store" (로컬 컬럼형 히스토리 저장소)
+
+    Returns:
+        timestamp 오름차순 OHLCV DataFrame
+    """
+    if source == "store":
+        return get_history_store().to_frame(start, end)
+
+    sql = "SELECT timestamp, open, high, low, close, volume FROM btc_price_1min"
+    conditions, params = [], []
+    if start:
+        conditions.append("timestamp >= %s")
+        params.append(start)
+    if end:
+        conditions.append("timestamp <= %s")
+        params.append(end)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY timestamp"
+
+    with db_session() as conn:
+        if not conn:
+            return pd.DataFrame()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except Exception as e:
+            log.error(f"[백테스트 이력 조회 실패] {e}")
+            return pd.DataFrame()
+
+    df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    for col in ("open", "high", "low", "close", "volume"):
+        df[col] = df[col].astype("float64")
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+def _prev(arr: np.ndarray, n: int = 1) -> np.ndarray:
+    """n칸 이전 값 (앞쪽은 NaN) - df.iloc[-1-n] 에 해당"""
+    out = np.full_like(arr, np.nan)
+    out[n:] = arr[:-n]
+    return out
+
+
+def timestamps_ns(df: pd.DataFrame) -> np.ndarray:
+    return df["timestamp"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+
+
+def compute_strategy2_columns(df: pd.DataFrame) -> dict:
+    """
+    strategy2 의 모든 지표를 전체 구간에 대해 한 번에 계산
+    (임계값과 무관한 컬럼만 계산하므로 파라미터 조합끼리 재사용 가능)
+
+    Returns:
+        컬럼명 → numpy 배열 dict
+    """
+    # 가격 지표는 numpy 커널 (strategy2 의 pandas 함수와 같은 값, bench/indicators.py 로 검증)
+    close = df["close"].to_numpy(dtype=np.float64)
+    middle = np.empty_like(close)
+    bb_std = indicators.rolling_std(close, 20, mean_out=middle)
+    macd, signal, histogram = indicators.macd(close)
+    price_change = df["close"].pct_change()
+
+    cols = {
+        "close": close,
+        "ma5": indicators.rolling_mean(close, 5),
+        "ma10": indicators.rolling_mean(close, 10),
+        "ma20": middle,
+        "rsi": indicators.rsi(close, period=14),
+        "middle_band": middle,
+        "bb_std": bb_std,
+        "macd": macd,
+        "signal": signal,
+        "histogram": histogram,
+        "volatility": ((df["high"] - df["low"]) / df["low"]).to_numpy(),
+        "volume_ratio": (df["volume"] / df["volume"].rolling(10).mean()).to_numpy(),
+        "price_change": price_change.to_numpy(),
+        "trend": price_change.rolling(5).sum().to_numpy(),
+    }
+    return cols
+
+
+def score_strategy2_entry(cols: dict, params: Strategy2Params = DEFAULT_PARAMS) -> tuple:
+    """
+    check_entry_signal 의 100점 신호 강도와 진입 비율을 전체 배열로 계산
+
+    Returns:
+        (신호 점수 배열, 진입 비율 배열)
+    """
+    p = params
+    rsi = cols["rsi"]
+    close = cols["close"]
+    lower = cols["middle_band"] - cols["bb_std"] * p.bb_std_dev
+    hist, prev_hist = cols["histogram"], _prev(cols["histogram"])
+    macd, prev_macd = cols["macd"], _prev(cols["macd"])
+    signal, prev_signal = cols["signal"], _prev(cols["signal"])
+    ma5, prev_ma5 = cols["ma5"], _prev(cols["ma5"])
+    ma10, prev_ma10 = cols["ma10"], _prev(cols["ma10"])
+    ma20 = cols["ma20"]
+    trend = cols["trend"]
+    volume_ratio = cols["volume_ratio"]
+    volatility = cols["volatility"]
+
+    score = np.select([rsi < p.rsi_strong, rsi < p.rsi_medium, rsi < p.rsi_weak], [30, 20, 10], 0)
+    score += np.select([close < lower, close < lower * p.bb_near], [20, 15], 0)
+    score += np.select(
+        [(hist > prev_hist) & (hist < 0), (macd > signal) & (prev_macd < prev_signal)], [15, 10], 0
+    )
+    score += np.select([(ma5 > ma10) & (prev_ma5 <= prev_ma10), ma5 > ma20], [15, 10], 0)
+    score += np.where((trend > 0) & (_prev(trend, 5) < 0), 10, 0)
+    score += np.select([volume_ratio > p.volume_ratio_high, volume_ratio > p.volume_ratio_mid], [10, 5], 0)
+    score -= np.select(
+        [volatility > p.volatility_high, volatility > p.volatility_mid],
+        [p.volatility_high_penalty, p.volatility_mid_penalty], 0
+    )
+
+    ratio = np.select(
+        [score >= p.tier_very_strong, score >= p.tier_strong, score >= p.tier_medium, score >= p.tier_weak],
+        [p.ratio_very_strong, p.ratio_strong, p.ratio_medium, p.ratio_weak], 0.0
+    )
+    return score, ratio
+
+
+def simulate_strategy2(cols: dict, timestamps: np.ndarray, params: Strategy2Params = DEFAULT_PARAMS,
+                       trade_amount: float = TRADE_AMOUNT, initial_seed: float = INITIAL_SEED) -> tuple:
+    """
+    main2.start_loop 한 틱 = 캔들 하나로 보고 진입/청산을 한 번에 시뮬레이션
+    - 포지션 없음: 최근 큰 손실 매도 후 cooldown 내면 진입 제한, 아니면 점수에 따른 비율로 매수
+    - 포지션 있음: 수수료 반영 수익률 익절/손절, RSI 과매수, MA5 하향 돌파 시 매도
+
+    Args:
+        cols: compute_strategy2_columns 결과
+        timestamps: int64 나노초 timestamp 배열
+
+    Returns:
+        (거래 튜플 리스트, 자산 배열)
+    """
+    p = params
+    score, ratio = score_strategy2_entry(cols, p)
+    exit_rsi = cols["rsi"] > p.exit_rsi
+    exit_cross = (cols["ma5"] < cols["ma10"]) & (_prev(cols["ma5"]) >= _prev(cols["ma10"]))
+
+    close = cols["close"].tolist()
+    ratio_l = ratio.tolist()
+    exit_l = (exit_rsi | exit_cross).tolist()
+    ts_l = timestamps.tolist()
+    cooldown_ns = p.loss_cooldown_minutes * MINUTE_NS
+    buy_cost = 1 + p.fee_rate
+    sell_gain = 1 - p.fee_rate
+
+    n = len(close)
+    seed = float(initial_seed)
+    amount = 0.0
+    entry_price = None
+    last_loss_ts = None
+    trades = []
+    equity = np.empty(n)
+
+    for i in range(n):
+        price = close[i]
+        if i >= 29:  # check_entry_signal 은 30개 이상부터 계산
+            if entry_price is None:
+                cooldown = last_loss_ts is not None and ts_l[i] - last_loss_ts < cooldown_ns
+                if not cooldown and ratio_l[i] > 0:
+                    cost = trade_amount * ratio_l[i]
+                    amount = cost / price
+                    entry_price = price
+                    seed -= cost
+                    trades.append((ts_l[i], "buy", price, amount, np.nan, int(score[i]), seed))
+            else:
+                roi_pct = ((price * sell_gain) / (entry_price * buy_cost) - 1) * 100
+                if roi_pct >= p.take_profit_pct or exit_l[i] or roi_pct <= p.stop_loss_pct:
+                    roi = roi_pct / 100
+                    seed += price * amount
+                    trades.append((ts_l[i], "sell", price, amount, roi, int(score[i]), seed))
+                    if roi < p.loss_threshold:
+                        last_loss_ts = ts_l[i]
+                    amount = 0.0
+                    entry_price = None
+        equity[i] = seed + amount * price
+
+    return trades, equity
+
+
+def simulate_strategy(df: pd.DataFrame, trade_amount: float = TRADE_AMOUNT,
+                      initial_seed: float = INITIAL_SEED) -> tuple:
+    """
+    main.py + strategy.check_entry_signal 시뮬레이션
+    - 마지막 매수가 기준 TAKE_PROFIT/STOP_LOSS 도달 시 매도하고 그 틱은 매수 판단 생략
+      (보유 수량이 없으면 trader.sell 이 매도를 막지만 틱은 그대로 넘어감)
+    - 시드가 TRADE_AMOUNT 이상이면 조건 충족 시마다 추가 매수
+    - recent_loss_within 은 roi 가 없는 buy 행만 보므로 실제로 진입을 막지 않음
+    """
+    close_s = df["close"]
+    rsi = strategy.calculate_rsi(df).to_numpy()
+    ma3 = close_s.rolling(window=3).mean().to_numpy()
+    ma15 = close_s.rolling(window=15).mean().to_numpy()
+    volatility = ((df["close"] - df["open"]).abs() / df["open"]).to_numpy()
+    volume = df["volume"].to_numpy()
+    volume_ma10 = df["volume"].rolling(10).mean().to_numpy()
+    open_ = df["open"].to_numpy()
+    close = close_s.to_numpy()
+
+    entry = (
+        ~(volatility > 0.015)
+        & (rsi < 35)
+        & (ma3 >= ma15)
+        & (close > open_ * 1.001)
+        & (_prev(close) < _prev(open_))
+        & (volume > volume_ma10)
+    )
+
+    ts_l = timestamps_ns(df).tolist()
+    close_l = close.tolist()
+    entry_l = entry.tolist()
+
+    n = len(close_l)
+    seed = float(initial_seed)
+    holding = 0.0
+    last_buy = None
+    trades = []
+    equity = np.empty(n)
+
+    for i in range(n):
+        price = close_l[i]
+        sold = False
+        if last_buy is not None:
+            buy_price, buy_amount = last_buy
+            roi = (price - buy_price) / buy_price
+            if roi >= TAKE_PROFIT or roi <= STOP_LOSS:
+                sold = True
+                if holding > 0:
+                    qty = min(buy_amount, holding)
+                    holding -= qty
+                    seed += price * qty
+                    trades.append((ts_l[i], "sell", price, qty, roi, 0, seed))
+
+        if not sold and i >= 15 and entry_l[i] and seed >= trade_amount:
+            qty = round(trade_amount / price, 8)
+            seed -= qty * price
+            holding += qty
+            last_buy = (price, qty)
+            trades.append((ts_l[i], "buy", price, qty, np.nan, 0, seed))
+
+        equity[i] = seed + holding * price
+
+    return trades, equity
+
+
+def summarize(trades: list, equity: np.ndarray, initial_seed: float) -> dict:
+    """수익률, 최대 낙폭, 거래 수 요약"""
+    peak = np.maximum.accumulate(equity)
+    drawdown = equity / peak - 1
+    rois = [t[4] for t in trades if t[1] == "sell"]
+    return {
+        "trades": len(trades),
+        "round_trips": len(rois),
+        "win_rate": sum(r > 0 for r in rois) / len(rois) if rois else 0.0,
+        "final_equity": float(equity[-1]),
+        "total_return": float(equity[-1] / initial_seed - 1),
+        "max_drawdown": float(drawdown.min()),
+    }
+
+
+def run_backtest(df: pd.DataFrame, strategy_name: str = "strategy2",
+                 trade_amount: float = TRADE_AMOUNT, initial_seed: float = INITIAL_SEED,
+                 params: Strategy2Params = DEFAULT_PARAMS) -> dict:
+    """
+    1분봉 이력 전체에 대해 전략을 백테스트
+
+    Args:
+        df: timestamp 오름차순 OHLCV DataFrame (load_history 결과)
+        strategy_name: "strategy2" (main2.py) 또는 "strategy" (main.py)
+        trade_amount: 1회 기준 거래 금액
+        initial_seed: 시작 시드
+        params: strategy2 임계값
+
+    Returns:
+        trades(DataFrame), equity(DataFrame), summary(dict) 를 담은 dict
+
+    지표는 전체 구간에 대해 한 번 계산하므로, 라이브에서 60개 윈도우로
+    매번 새로 시작하는 MACD(EMA)와는 초기값 영향만큼 차이가 날 수 있다.
+    (지표 스트림을 쓰는 라이브 경로와는 같은 값)
+    """
+    if df.empty:
+        raise ValueError("백테스트할 데이터가 없습니다")
+
+    if strategy_name == "strategy2":
+        trades, equity = simulate_strategy2(
+            compute_strategy2_columns(df), timestamps_ns(df), params, trade_amount, initial_seed
+        )
+    elif strategy_name == "strategy":
+        trades, equity = simulate_strategy(df, trade_amount, initial_seed)
+    else:
+        raise ValueError(f"알 수 없는 전략: {strategy_name}")
+
+    trades_df = pd.DataFrame(trades, columns=["executed_at", "trade_type", "price", "amount", "roi", "score", "seed_balance"])
+    trades_df["executed_at"] = pd.to_datetime(trades_df["executed_at"])
+    equity_df = pd.DataFrame({"timestamp": df["timestamp"].to_numpy(), "equity": equity})
+
+    summary = {"strategy": strategy_name, "candles": len(df)}
+    summary.update(summarize(trades, equity, initial_seed))
+    return {"trades": trades_df, "equity": equity_df, "summary": summary}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="btc_price_1min 이력 백테스트")
+    parser.add_argument("--strategy", default="strategy2", choices=["strategy2", "strategy"])
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--source", default="db", choices=["db", "store"], help="이력 출처 (MySQL / 로컬 저장소)")
+    parser.add_argument("--trade-amount", type=float, default=TRADE_AMOUNT)
+    parser.add_argument("--seed", type=float, default=INITIAL_SEED)
+    parser.add_argument("--trades-out", help="거래 내역 CSV 저장 경로")
+    parser.add_argument("--equity-out", help="자산 곡선 CSV 저장 경로")
+    args = parser.parse_args()
+
+    history = load_history(args.start, args.end, args.source)
+    result = run_backtest(history, args.strategy, args.trade_amount, args.seed)
+
+    for key, value in result["summary"].items():
+        print(f"{key}: {value}")
+    if args.trades_out:
+        result["trades"].to_csv(args.trades_out, index=False)
+    if args.equity_out:
+        result["equity"].to_csv(args.equity_out, index=False)
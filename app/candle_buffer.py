@@ -0,0 +1,126 @@
+# app/candle_buffer.py
+
+import threading
+import numpy as np
+import pandas as pd
+from config import COIN_TICKER, CANDLE_BUFFER_SIZE
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _to_ns(timestamp) -> int:
+    """datetime / pd.Timestamp → int64 나노초 (벽시계 기준, tz 정보는 버림)"""
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return int(ts.value)
+
+
+class CandleBuffer:
+    """
+    프로세스 내 1분봉 링 버퍼 (고정 용량, 컬럼별 배열)
+
+    OHLCV는 float64, timestamp는 int64(ns) 배열로 보관한다.
+    각 값을 i, i + capacity 두 곳에 같이 써 두어서
+    최근 n개가 항상 연속 구간이 되므로 tail()은 복사 없는 view를 돌려준다.
+    """
+
+    def __init__(self, capacity: int = CANDLE_BUFFER_SIZE):
+        self.capacity = capacity
+        self.timestamp = np.zeros(capacity * 2, dtype=np.int64)
+        self.columns = {name: np.zeros(capacity * 2, dtype=np.float64) for name in COLUMNS}
+        self._end = 0      # 다음에 쓸 위치 (0 ~ capacity-1)
+        self._count = 0
+        self.seeded = False  # DB에서 초기 적재가 끝났는지
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_timestamp(self):
+        if not self._count:
+            return None
+        return int(self.timestamp[(self._end - 1) % self.capacity])
+
+    def _write(self, pos: int, ts: int, values):
+        for idx in (pos, pos + self.capacity):
+            self.timestamp[idx] = ts
+            for name, value in zip(COLUMNS, values):
+                self.columns[name][idx] = value
+
+    def append(self, timestamp, open_: float, high: float, low: float, close: float, volume: float):
+        """
+        캔들 추가
+        - 마지막보다 새 timestamp: 뒤에 추가 (가득 차면 가장 오래된 캔들을 덮어씀)
+        - 버퍼 안에 이미 있는 timestamp: 그 자리 값을 갱신 (형성 중 봉 수정)
+        - 버퍼 구간 안의 빠져 있던 timestamp: 순서에 맞게 끼워 넣음 (가득 찼으면 가장 오래된 캔들이 밀려남)
+        - 버퍼보다 오래된 timestamp: 무시
+        """
+        ts = _to_ns(timestamp)
+        values = (float(open_), float(high), float(low), float(close), float(volume))
+
+        with self._lock:
+            last = self.last_timestamp
+            if last is None or ts > last:
+                self._write(self._end, ts, values)
+                self._end = (self._end + 1) % self.capacity
+                self._count = min(self._count + 1, self.capacity)
+                return
+
+            start = (self._end - self._count) % self.capacity
+            window = self.timestamp[start:start + self._count]
+            i = int(np.searchsorted(window, ts))
+            if i < self._count and window[i] == ts:
+                self._write((start + i) % self.capacity, ts, values)
+            elif i > 0:
+                self._insert(start, i, ts, values)
+
+    def _insert(self, start: int, i: int, ts: int, values):
+        """늦게 도착한 캔들을 중간에 끼워 넣고 앞에서부터 다시 배치 (드문 경우라 O(capacity))"""
+        end = start + self._count
+        timestamps = np.insert(self.timestamp[start:end], i, ts)[-self.capacity:]
+        columns = {
+            name: np.insert(self.columns[name][start:end], i, value)[-self.capacity:]
+            for name, value in zip(COLUMNS, values)
+        }
+        n = len(timestamps)
+        for offset in (0, self.capacity):
+            self.timestamp[offset:offset + n] = timestamps
+            for name in COLUMNS:
+                self.columns[name][offset:offset + n] = columns[name]
+        self._end = n % self.capacity
+        self._count = n
+
+    def extend_from_df(self, df: pd.DataFrame):
+        """timestamp 컬럼 또는 DatetimeIndex를 가진 OHLCV DataFrame을 순서대로 반영"""
+        timestamps = df["timestamp"] if "timestamp" in df.columns else df.index
+        for ts, o, h, l, c, v in zip(timestamps, df["open"], df["high"], df["low"], df["close"], df["volume"]):
+            self.append(ts, o, h, l, c, v)
+
+    def tail(self, n: int = None) -> dict:
+        """
+        최근 n개 캔들 (오래된 순)을 컬럼별 view로 반환 - 복사 없음
+        view는 버퍼 내부 배열이므로 수정하지 말 것
+        """
+        n = self._count if n is None else min(n, self._count)
+        start = (self._end - n) % self.capacity
+        view = {"timestamp": self.timestamp[start:start + n].view("datetime64[ns]")}
+        for name in COLUMNS:
+            view[name] = self.columns[name][start:start + n]
+        return view
+
+    def to_frame(self, n: int = None) -> pd.DataFrame:
+        """fetch_recent_data와 같은 형태의 DataFrame"""
+        return pd.DataFrame(self.tail(n), columns=["timestamp", *COLUMNS])
+
+
+_buffers = {}
+
+
+def get_candle_buffer(ticker: str = COIN_TICKER) -> CandleBuffer:
+    """티커별 프로세스 공용 캔들 버퍼"""
+    buffer = _buffers.get(ticker)
+    if buffer is None:
+        buffer = _buffers[ticker] = CandleBuffer()
+    return buffer
@@ -1,47 +1,227 @@
 # app/db_1min_btc.py
 
+import threading
+import time
+import pandas as pd
 import pyupbit
-from app.utils.db_connect import get_connection
+from app.candle_buffer import get_candle_buffer
+from app.history_store import get_history_store
+from app.indicator_stream import get_indicator_stream
+from app.rollup import get_rollups
+from app.utils.db_connect import db_session
+from app.utils.metrics import errors, rest_calls
 from app.utils.time_utils import get_kst_now
 from app.utils.logger import get_logger
+from config import CANDLE_BATCH_SIZE, CANDLE_FLUSH_SECONDS, HISTORY_STORE_ENABLED
 
 log = get_logger()
 
-def save_1min_btc_to_db(limit: int = 3):
+_OHLCV = ("open", "high", "low", "close", "volume")
+# 이미 있는 봉(형성 중이던 마지막 봉 포함)은 최신 값으로 갱신
+_UPSERT_TAIL = """
+    ON DUPLICATE KEY UPDATE
+    open = VALUES(open), high = VALUES(high), low = VALUES(low),
+    close = VALUES(close), volume = VALUES(volume)
+"""
+# 캔들 버퍼 / 지표 스트림 / 롤업 갱신과 이를 읽는 신호 판단을 서로 막는 락
+# (틱 저장 구간이 작업 스레드에서 늦게 끝나도 판단 중인 상태를 바꾸지 않도록)
+market_state_lock = threading.RLock()
+
+
+def save_1min_btc_to_db(limit: int = 3, closed_only: bool = False):
     """
     최신 1분봉 데이터 n개를 pyupbit에서 가져와 DB에 저장
     :param limit: 몇 개의 1분봉을 가져올지 (기본 3개)
+    :param closed_only: 아직 형성 중인 현재 분 봉은 제외 (봉 마감 직후 실행하는 틱에서 사용)
     """
     try:
+        rest_calls.inc(endpoint="get_ohlcv")
         df = pyupbit.get_ohlcv("KRW-BTC", interval="minute1", count=limit)
+        if df is not None and closed_only:
+            df = closed_candles(df)
         if df is None or df.empty:
             log.warning("📉 1분봉 데이터가 없습니다.")
             return
 
-        conn = get_connection()
+        save_candles_to_db(df)
+        log.info(f"✅ 1분봉 데이터 {len(df)}개 저장 완료")
+    except Exception as e:
+        errors.inc(stage="save_candles")
+        log.error(f"[save_1min_btc_to_db 에러] {e}")
+
+
+def closed_candles(df, now=None):
+    """아직 형성 중인 현재 분 봉을 뺀 마감된 봉만 (now: KST, 기본 현재 시각)"""
+    now = pd.Timestamp((now or get_kst_now()).replace(tzinfo=None))
+    return df[df.index + pd.Timedelta(minutes=1) <= now]
+
+
+def candle_rows(df, ticker: str = None) -> list:
+    """
+    DatetimeIndex OHLCV DataFrame → INSERT 파라미터 튜플 리스트 (iterrows 없이 컬럼 단위 변환)
+    ticker 를 주면 각 행 앞에 붙인다 (마켓 구분 테이블용)
+    """
+    timestamps = df.index.strftime("%Y-%m-%d %H:%M:%S")
+    values = df[list(_OHLCV)].to_numpy(dtype="float64").tolist()
+    if ticker is None:
+        return [(ts, *row) for ts, row in zip(timestamps, values)]
+    return [(ticker, ts, *row) for ts, row in zip(timestamps, values)]
+
+
+def upsert_ohlcv_rows(table: str, rows: list, batch_size: int = CANDLE_BATCH_SIZE,
+                      ticker_column: bool = False, label: str = "1분봉") -> int:
+    """
+    candle_rows 결과를 여러 행 INSERT ... ON DUPLICATE KEY UPDATE 로 일괄 저장 (btc_price_1min / price_1min 공용)
+    :param table: 저장할 테이블
+    :param rows: candle_rows 튜플 리스트 (ticker_column=True 면 ticker 가 앞에 붙은 행)
+    :param batch_size: 한 문장에 넣을 최대 행 수
+    :param label: 로그에 쓸 이름
+    :return: 저장 요청한 행 수 (실패 시 0)
+    """
+    if not rows:
+        return 0
+
+    columns = (("ticker",) if ticker_column else ()) + ("timestamp", *_OHLCV)
+    head = f"INSERT INTO {table} ({', '.join(columns)}, created_at) VALUES "
+    row_sql = f"({', '.join(['%s'] * len(columns))}, NOW())"
+
+    started = time.monotonic()
+    with db_session() as conn:
         if not conn:
+            return 0
+
+        try:
+            with conn.cursor() as cursor:
+                for i in range(0, len(rows), batch_size):
+                    batch = rows[i:i + batch_size]
+                    sql = head + ", ".join([row_sql] * len(batch)) + _UPSERT_TAIL
+                    cursor.execute(sql, [value for row in batch for value in row])
+        except Exception as e:
+            errors.inc(stage="db_write")
+            log.error(f"[{label} 일괄 저장 실패] {e}")
+            return 0
+
+    elapsed = time.monotonic() - started
+    if len(rows) >= batch_size:
+        log.info(f"💾 {label} {len(rows)}개 일괄 저장 ({len(rows) / max(elapsed, 1e-9):,.0f} rows/s)")
+    return len(rows)
+
+
+def upsert_candles(df, batch_size: int = CANDLE_BATCH_SIZE) -> int:
+    """
+    btc_price_1min 에 1분봉 일괄 저장
+    :param df: DatetimeIndex OHLCV DataFrame (pyupbit.get_ohlcv 형식)
+    :return: 저장 요청한 행 수 (실패 시 0)
+    """
+    return upsert_ohlcv_rows("btc_price_1min", candle_rows(df), batch_size)
+
+
+def save_candles_to_db(df):
+    """
+    이미 확보한 1분봉(DatetimeIndex OHLCV DataFrame)을 DB에 저장하고
+    메모리 버퍼, 지표 스트림, 롤업, 히스토리 저장소에 반영 (REST 폴링 / 웹소켓 피드 공용)
+    """
+    if not upsert_candles(df):
+        return
+
+    # 저장한 캔들을 메모리 버퍼와 지표 스트림, 상위 타임프레임 롤업에 증분 반영
+    rollups = get_rollups()
+    with market_state_lock:
+        get_candle_buffer("KRW-BTC").extend_from_df(df)
+        get_indicator_stream("KRW-BTC").update_from_df(df)
+        rollups.update_from_df(df)
+    rollups.flush()
+
+    if HISTORY_STORE_ENABLED:
+        try:
+            get_history_store("KRW-BTC").append_df(df)
+        except OSError as e:
+            log.error(f"[히스토리 저장소 기록 실패] {e}")
+
+
+class CandleWriter:
+    """
+    1분봉을 모아 두었다가 batch_size개가 모이거나
+    flush_seconds가 지나면 한 번에 upsert 하는 버퍼형 writer
+
+    writer = CandleWriter()
+    writer.add(df)          # 조건이 되면 내부에서 flush
+    writer.flush_if_due()   # 루프에서 주기적으로 호출
+    writer.flush()          # 종료 시
+    """
+
+    def __init__(self, batch_size: int = CANDLE_BATCH_SIZE, flush_seconds: float = CANDLE_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = []
+        self._first_pending_at = None
+        self.rows_written = 0
+        self.write_seconds = 0.0
+
+    def add(self, df):
+        if df is None or df.empty:
             return
+        if not self._pending:
+            self._first_pending_at = time.monotonic()
+        self._pending.append(df)
+        if sum(len(d) for d in self._pending) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
 
-        with conn.cursor() as cursor:
-            for timestamp, row in df.iterrows():
-                sql = """
-                    INSERT IGNORE INTO btc_price_1min
-                    (timestamp, open, high, low, close, volume, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                """
-                cursor.execute(sql, (
-                    timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    row['open'],
-                    row['high'],
-                    row['low'],
-                    row['close'],
-                    row['volume']
-                ))
-
-        log.info(f"✅ 1분봉 데이터 {limit}개 저장 완료")
-    except Exception as e:
-        log.error(f"[save_1min_btc_to_db 에러] {e}")
-    finally:
-        if 'conn' in locals():
-            conn.close()
+    def flush_if_due(self):
+        if self._pending and time.monotonic() - self._first_pending_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self._pending:
+            return 0
+        df = pd.concat(self._pending)
+        # 같은 봉이 여러 번 들어왔으면 마지막 값만 저장
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        self._pending = []
+
+        started = time.monotonic()
+        written = upsert_candles(df, self.batch_size)
+        if not written:
+            # 저장 실패 시 다음 flush 때 다시 시도
+            self._pending = [df]
+            self._first_pending_at = time.monotonic()
+            return 0
+        self.write_seconds += time.monotonic() - started
+        self.rows_written += written
+        return written
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_written / self.write_seconds if self.write_seconds else 0.0
+
+
+def load_candle_buffer(limit: int = None):
+    """
+    시작 시 DB의 최근 1분봉으로 메모리 캔들 버퍼를 한 번 채움
+    이후 전략의 fetch_recent_data는 SQL 대신 버퍼를 읽는다
+    :param limit: 불러올 개수 (기본: 버퍼 용량)
+    """
+    buffer = get_candle_buffer("KRW-BTC")
+    limit = limit or buffer.capacity
+
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT timestamp, open, high, low, close, volume
+                    FROM btc_price_1min
+                    ORDER BY timestamp DESC
+                    LIMIT %s
+                """, (limit,))
+                rows = cursor.fetchall()
 
+            for row in reversed(rows):
+                buffer.append(*row)
+            buffer.seeded = True
+            log.info(f"🧮 캔들 버퍼 적재 완료 ({len(buffer)}개)")
+        except Exception as e:
+            log.error(f"[캔들 버퍼 적재 실패] {e}")
@@ -0,0 +1,106 @@
+# app/db_markets.py
+
+from app.db_1min_btc import candle_rows, upsert_ohlcv_rows
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+from config import CANDLE_BATCH_SIZE
+
+log = get_logger()
+
+_CREATE_PRICE_TABLE = """
+    CREATE TABLE IF NOT EXISTS price_1min (
+        ticker VARCHAR(20) NOT NULL,
+        timestamp DATETIME NOT NULL,
+        open DOUBLE NOT NULL,
+        high DOUBLE NOT NULL,
+        low DOUBLE NOT NULL,
+        close DOUBLE NOT NULL,
+        volume DOUBLE NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (ticker, timestamp)
+    )
+"""
+
+_CREATE_TRADE_TABLE = """
+    CREATE TABLE IF NOT EXISTS market_trade_history (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        ticker VARCHAR(20) NOT NULL,
+        trade_type VARCHAR(10) NOT NULL,
+        price DOUBLE NOT NULL,
+        amount DOUBLE NOT NULL,
+        roi DOUBLE,
+        executed_at DATETIME NOT NULL,
+        is_simulated BOOLEAN NOT NULL,
+        KEY idx_ticker_executed (ticker, executed_at)
+    )
+"""
+
+
+def ensure_market_tables():
+    """마켓 구분 1분봉 / 거래 기록 테이블 생성 (이미 있으면 그대로)"""
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_CREATE_PRICE_TABLE)
+                cursor.execute(_CREATE_TRADE_TABLE)
+            conn.commit()
+        except Exception as e:
+            log.error(f"[마켓 테이블 생성 실패] {e}")
+
+
+def upsert_market_candles(frames: dict, batch_size: int = CANDLE_BATCH_SIZE) -> int:
+    """
+    여러 마켓의 1분봉을 price_1min 에 여러 행 upsert 로 일괄 저장
+    :param frames: ticker → DatetimeIndex OHLCV DataFrame
+    :return: 저장 요청한 행 수 (실패 시 0)
+    """
+    rows = []
+    for ticker, df in frames.items():
+        if df is not None and not df.empty:
+            rows.extend(candle_rows(df, ticker))
+    return upsert_ohlcv_rows("price_1min", rows, batch_size, ticker_column=True, label="마켓 1분봉")
+
+
+def load_market_positions(is_simulated: bool) -> dict:
+    """
+    마켓별 마지막 거래가 매수인 포지션 조회
+    :return: ticker → (진입가, 수량)
+    """
+    with db_session() as conn:
+        if not conn:
+            return {}
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT h.ticker, h.trade_type, h.price, h.amount
+                    FROM market_trade_history h
+                    JOIN (
+                        SELECT ticker, MAX(id) AS id FROM market_trade_history
+                        WHERE is_simulated = %s
+                        GROUP BY ticker
+                    ) last ON last.id = h.id
+                """, (is_simulated,))
+                rows = cursor.fetchall()
+        except Exception as e:
+            log.error(f"[마켓 포지션 조회 실패] {e}")
+            return {}
+    return {ticker: (float(price), float(amount)) for ticker, trade_type, price, amount in rows if trade_type == "buy"}
+
+
+def insert_market_trade(ticker: str, trade_type: str, price: float, amount: float, roi,
+                        executed_at: str, is_simulated: bool):
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO market_trade_history
+                    (ticker, trade_type, price, amount, roi, executed_at, is_simulated)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (ticker, trade_type, price, amount, roi, executed_at, is_simulated))
+            conn.commit()
+        except Exception as e:
+            log.error(f"[마켓 거래 기록 저장 실패] {e}")
@@ -0,0 +1,252 @@
+# app/exchange.py
+
+import hashlib
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from urllib.parse import urlencode
+import jwt
+import requests
+from app.utils.discord import send_discord_message
+from app.utils.logger import get_logger
+from app.utils.metrics import errors, rest_calls
+from config import (
+    UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY, UPBIT_API_URL, UPBIT_FEE_RATE,
+    ORDER_POLL_SECONDS, ORDER_FILL_TIMEOUT, ORDER_STALE_POLL_SECONDS,
+)
+
+log = get_logger()
+
+
+class ExchangeError(Exception):
+    """업비트 API 오류 응답"""
+
+
+class UpbitClient:
+    """
+    업비트 주문 API 클라이언트 (프로세스에서 하나를 계속 사용)
+    requests.Session 으로 연결을 재사용하고, 요청마다 pyupbit 와 같은 방식의 JWT 를 붙인다
+    """
+
+    def __init__(self, access_key: str = UPBIT_ACCESS_KEY, secret_key: str = UPBIT_SECRET_KEY,
+                 base_url: str = UPBIT_API_URL, timeout: float = 5.0):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _headers(self, query: dict = None) -> dict:
+        payload = {"access_key": self.access_key, "nonce": str(uuid.uuid4())}
+        if query:
+            payload["query_hash"] = hashlib.sha512(urlencode(query).encode()).hexdigest()
+            payload["query_hash_alg"] = "SHA512"
+        return {"Authorization": f"Bearer {jwt.encode(payload, self.secret_key, algorithm='HS256')}"}
+
+    def _request(self, method: str, path: str, endpoint: str, query: dict) -> dict:
+        rest_calls.inc(endpoint=endpoint)
+        kwargs = {"params": query} if method == "GET" else {"json": query}
+        resp = self._session.request(method, self.base_url + path, headers=self._headers(query),
+                                     timeout=self.timeout, **kwargs)
+        if resp.status_code >= 400:
+            try:
+                message = resp.json().get("error", {}).get("message", resp.text)
+            except ValueError:
+                message = resp.text
+            raise ExchangeError(f"{endpoint} {resp.status_code}: {message}")
+        return resp.json()
+
+    def buy_market_order(self, market: str, krw: float) -> dict:
+        """시장가 매수 (원화 금액 지정)"""
+        return self._request("POST", "/v1/orders", "buy_market_order",
+                             {"market": market, "side": "bid", "price": str(round(krw)), "ord_type": "price"})
+
+    def sell_market_order(self, market: str, volume: float) -> dict:
+        """시장가 매도 (수량 지정)"""
+        return self._request("POST", "/v1/orders", "sell_market_order",
+                             {"market": market, "side": "ask", "volume": f"{volume:.8f}", "ord_type": "market"})
+
+    def get_order(self, order_uuid: str) -> dict:
+        """주문 상세 (체결 내역 trades 포함)"""
+        return self._request("GET", "/v1/order", "get_order", {"uuid": order_uuid})
+
+
+@dataclass(frozen=True)
+class Fill:
+    """체결이 끝난 주문 결과"""
+    uuid: str
+    market: str
+    side: str              # "bid"(매수) / "ask"(매도)
+    state: str             # done / cancel
+    volume: float          # 체결 수량
+    avg_price: float       # 평균 체결가
+    funds: float           # 체결 금액 합 (수수료 제외)
+    fee: float             # 실제 수수료
+
+    @classmethod
+    def from_order(cls, order: dict) -> "Fill":
+        trades = order.get("trades") or []
+        volume = sum(float(t["volume"]) for t in trades) or float(order.get("executed_volume") or 0)
+        funds = sum(float(t["funds"]) for t in trades)
+        if not funds and volume:
+            funds = volume * float(order.get("price") or 0)
+        return cls(
+            uuid=order["uuid"],
+            market=order["market"],
+            side=order["side"],
+            state=order["state"],
+            volume=volume,
+            avg_price=funds / volume if volume else 0.0,
+            funds=funds,
+            fee=float(order.get("paid_fee") or funds * UPBIT_FEE_RATE),
+        )
+
+
+def is_final(order: dict) -> bool:
+    """
+    더 이상 체결될 수 없는 주문인지
+    (시장가 매수는 남은 원화가 돌려지면서 cancel 로 끝나기도 하므로 cancel 도 체결 수량으로 판단)
+    """
+    return order.get("state") in ("done", "cancel")
+
+
+@dataclass
+class _Pending:
+    market: str
+    side: str
+    on_fill: object
+    submitted_at: float
+    timed_out: bool = False
+    next_poll: float = 0.0
+
+
+def alert_order_timeout(order_uuid: str, side: str, market: str):
+    """기본 체결 지연 알림 - Discord 로 직접 확인 요청"""
+    send_discord_message(f"⚠️ [실전매매] {market} {side} 주문이 {ORDER_FILL_TIMEOUT:.0f}초 안에 체결되지 않았습니다 "
+                         f"(uuid={order_uuid}) - 체결될 때까지 추가 주문을 막고 계속 확인합니다")
+
+
+class OrderExecutor:
+    """
+    실매매 주문 실행기
+
+    - 주문 접수만 하고 바로 반환 (매매 루프는 체결을 기다리지 않음)
+    - 백그라운드 스레드가 poll_seconds 마다 주문 상태를 조회해 체결이 끝나면 on_fill(Fill) 호출
+    - fill_timeout 안에 끝나지 않은 주문은 on_timeout 으로 한 번 알리고, 대기 목록에 남겨둔 채
+      stale_poll_seconds 마다 계속 조회한다 (늦게 체결돼도 on_fill 로 기록되고 그때까지 추가 주문은 막힘)
+    - 체결 대기 중인 마켓은 has_pending() 으로 확인해 중복 주문을 막는다
+    """
+
+    def __init__(self, client: UpbitClient = None, poll_seconds: float = ORDER_POLL_SECONDS,
+                 fill_timeout: float = ORDER_FILL_TIMEOUT, on_timeout=alert_order_timeout,
+                 stale_poll_seconds: float = ORDER_STALE_POLL_SECONDS):
+        self.client = client or UpbitClient()
+        self.poll_seconds = poll_seconds
+        self.fill_timeout = fill_timeout
+        self.stale_poll_seconds = stale_poll_seconds
+        self.on_timeout = on_timeout
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def submit(self, side: str, market: str, amount: float, on_fill) -> str:
+        """
+        시장가 주문 접수
+        :param side: "buy" (amount = 원화 금액) / "sell" (amount = 수량)
+        :return: 주문 uuid (접수 실패 시 ExchangeError / requests 예외)
+        """
+        if side == "buy":
+            order = self.client.buy_market_order(market, amount)
+        else:
+            order = self.client.sell_market_order(market, amount)
+
+        with self._lock:
+            self._pending[order["uuid"]] = _Pending(market, side, on_fill, time.monotonic())
+        self._ensure_worker()
+        self._wakeup.set()
+        log.info(f"📨 주문 접수: {side} {market} {amount} (uuid={order['uuid']})")
+        return order["uuid"]
+
+    def has_pending(self, market: str = None) -> bool:
+        with self._lock:
+            return any(market is None or p.market == market for p in self._pending.values())
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="order-executor", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                pending = [(order_uuid, item) for order_uuid, item in self._pending.items() if item.next_poll <= now]
+            for order_uuid, item in pending:
+                self._poll(order_uuid, item)
+
+    def _poll(self, order_uuid: str, item: _Pending):
+        try:
+            order = self.client.get_order(order_uuid)
+        except Exception as e:
+            errors.inc(stage="order_status")
+            log.error(f"[주문 상태 조회 실패] {order_uuid}: {e}")
+            order = None
+
+        if order is not None and is_final(order):
+            fill = Fill.from_order(order)
+            if item.timed_out:
+                log.warning(f"⏰ 시간 초과됐던 주문 체결 확인: {order_uuid} "
+                            f"({time.monotonic() - item.submitted_at:.0f}초 만)")
+            log.info(f"✅ 체결 완료: {fill.side} {fill.volume:.8f} @ {fill.avg_price:,.0f} (수수료 {fill.fee:,.2f})")
+            try:
+                item.on_fill(fill)
+            except Exception as e:
+                errors.inc(stage="order_fill")
+                log.error(f"[체결 처리 실패] {order_uuid}: {e}")
+            finally:
+                # 포지션 기록이 끝난 뒤에 대기 목록에서 빼야 그 사이 중복 주문이 나가지 않음
+                with self._lock:
+                    self._pending.pop(order_uuid, None)
+            return
+
+        now = time.monotonic()
+        if item.timed_out:
+            item.next_poll = now + self.stale_poll_seconds
+        elif now - item.submitted_at >= self.fill_timeout:
+            # 대기 목록에서 빼면 늦은 체결이 기록되지 않고 중복 주문이 나갈 수 있으므로 남겨두고 느리게 계속 조회
+            item.timed_out = True
+            item.next_poll = now + self.stale_poll_seconds
+            errors.inc(stage="order_timeout")
+            log.error(f"[체결 대기 시간 초과] {order_uuid} ({self.fill_timeout:.0f}초) - "
+                      f"{self.stale_poll_seconds:.0f}초마다 계속 확인, 그동안 {item.market} 추가 주문 차단")
+            if self.on_timeout:
+                try:
+                    self.on_timeout(order_uuid, item.side, item.market)
+                except Exception as e:
+                    log.error(f"[체결 지연 알림 실패] {order_uuid}: {e}")
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """대기 중인 주문이 모두 끝날 때까지 대기 (종료 / 테스트용)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.has_pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(min(self.poll_seconds, 0.05))
+        return True
+
+
+_executor = None
+
+
+def get_executor() -> OrderExecutor:
+    """프로세스 공용 주문 실행기 (처음 사용할 때 생성)"""
+    global _executor
+    if _executor is None:
+        _executor = OrderExecutor()
+    return _executor
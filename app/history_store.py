@@ -0,0 +1,324 @@
+# app/history_store.py
+
+import argparse
+import os
+import threading
+import numpy as np
+import pandas as pd
+from app.candle_buffer import COLUMNS
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+from config import COIN_TICKER, HISTORY_STORE_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 내보내기에만 필요
+    pa = pq = None
+
+log = get_logger()
+
+DAY_NS = 86_400 * 1_000_000_000
+# 컬럼 → (파일 이름, dtype)
+FILES = {"timestamp": ("timestamp.i8", np.int64), **{name: (f"{name}.f8", np.float64) for name in COLUMNS}}
+
+
+class HistoryStore:
+    """
+    1분봉 컬럼형 로컬 저장소 (append-only, mmap 읽기)
+
+    data/history/KRW-BTC/gen-000001/timestamp.i8, open.f8, ... 처럼 컬럼마다 원시 배열 파일
+    하나씩 두고 새 봉은 파일 끝에 덧붙인다. 행은 항상 timestamp 순이라 날짜 파티션은
+    timestamp 배열의 이진 탐색으로 잘라낸 연속 구간이고, 어떤 기간이든 복사 없는 view 다.
+    (날짜마다 파일을 나누면 1년 조회에 파일 2천여 개를 열어 이어 붙여야 해서 한 파일로 둠)
+    현재 세대 디렉토리 이름은 CURRENT 파일에 있다 (없으면 예전 배치대로 티커 디렉토리 바로 아래).
+    - 형성 중이던 봉 수정은 제자리 덮어쓰기
+    - 중간에 빠진 봉이 늦게 오면 새 세대 디렉토리에 전체 컬럼을 다시 쓰고 CURRENT 를 한 번에 교체
+      (교체 전에 죽으면 이전 세대가 그대로 남으므로 컬럼끼리 서로 다른 세대가 섞이지 않음)
+    - 덧붙이는 도중 죽어서 컬럼 길이가 어긋나면 가장 짧은 길이까지만 유효한 것으로 본다
+    """
+
+    POINTER = "CURRENT"
+
+    def __init__(self, root: str = HISTORY_STORE_DIR, ticker: str = COIN_TICKER):
+        self.path = os.path.join(root, ticker)
+        self._lock = threading.Lock()
+
+    def _generation(self) -> str:
+        """현재 세대 디렉토리 이름 (CURRENT 가 없으면 '' - 티커 디렉토리 바로 아래)"""
+        try:
+            with open(os.path.join(self.path, self.POINTER)) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return ""
+
+    def _file(self, name: str, generation: str = None) -> str:
+        if generation is None:
+            generation = self._generation()
+        return os.path.join(self.path, generation, FILES[name][0])
+
+    def _length(self, generation: str) -> int:
+        sizes = []
+        for name, (_, dtype) in FILES.items():
+            path = self._file(name, generation)
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def __len__(self):
+        return self._length(self._generation())
+
+    def columns(self, mode: str = "r") -> dict:
+        """전체 컬럼별 memmap (복사 없음, 비어 있으면 빈 배열)"""
+        for attempt in range(3):
+            generation = self._generation()
+            try:
+                n = self._length(generation)
+                if not n:
+                    return {name: np.empty(0, dtype=dtype) for name, (_, dtype) in FILES.items()}
+                return {name: np.memmap(self._file(name, generation), dtype=dtype, mode=mode, shape=(n,))
+                        for name, (_, dtype) in FILES.items()}
+            except FileNotFoundError:
+                # 다른 프로세스가 세대를 교체하고 이전 세대를 지운 직후 - 새 CURRENT 로 다시 시도
+                if attempt == 2:
+                    raise
+
+    def days(self) -> list:
+        """저장된 날짜 파티션 목록 ('YYYY-MM-DD' 오름차순)"""
+        ts = self.columns()["timestamp"]
+        if not len(ts):
+            return []
+        day_starts = np.unique(ts - ts % DAY_NS)
+        return [str(d) for d in day_starts.view("datetime64[ns]").astype("datetime64[D]")]
+
+    def last_timestamp(self):
+        """마지막 봉의 timestamp (ns), 없으면 None"""
+        ts = self.columns()["timestamp"]
+        return int(ts[-1]) if len(ts) else None
+
+    def append_df(self, df: pd.DataFrame) -> int:
+        """
+        DatetimeIndex(또는 timestamp 컬럼) OHLCV DataFrame 반영
+        :return: 반영한 행 수
+        """
+        if df is None or df.empty:
+            return 0
+        timestamps = df["timestamp"] if "timestamp" in df.columns else df.index
+        ts = pd.DatetimeIndex(timestamps).tz_localize(None).to_numpy().astype("datetime64[ns]").astype(np.int64)
+        columns = {name: df[name].to_numpy(dtype=np.float64) for name in COLUMNS}
+
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        # 같은 봉이 여러 번 있으면 마지막 값
+        keep = np.append(ts[1:] != ts[:-1], True)
+        ts = ts[keep]
+        columns = {name: values[order][keep] for name, values in columns.items()}
+
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            n = len(self)
+            self._truncate(n)
+            existing = self.columns()["timestamp"]
+            last = existing[-1] if n else None
+
+            new = ts > last if last is not None else np.ones(len(ts), dtype=bool)
+            old = ~new
+            if old.any():
+                pos = np.searchsorted(existing, ts[old])
+                found = (pos < n) & (existing[np.minimum(pos, n - 1)] == ts[old])
+                if not found.all():
+                    self._rewrite_from(int(pos[~found].min()), ts, columns)
+                    return len(ts)
+                # 형성 중이던 봉 등 이미 있는 봉은 제자리 갱신
+                arrays = self.columns(mode="r+")
+                for name in COLUMNS:
+                    arrays[name][pos] = columns[name][old]
+                for array in arrays.values():
+                    array.flush()
+
+            if new.any():
+                self._append({"timestamp": ts[new], **{name: columns[name][new] for name in COLUMNS}})
+        return len(ts)
+
+    def _append(self, arrays: dict):
+        generation = self._generation()
+        for name, (_, dtype) in FILES.items():
+            with open(self._file(name, generation), "ab") as f:
+                f.write(np.asarray(arrays[name], dtype=dtype).tobytes())
+
+    def _truncate(self, n: int):
+        """중간에 끊긴 쓰기로 길어진 컬럼 파일을 공통 길이로 맞춤"""
+        generation = self._generation()
+        for name, (_, dtype) in FILES.items():
+            path = self._file(name, generation)
+            size = n * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                os.truncate(path, size)
+
+    def _rewrite_from(self, pos: int, ts: np.ndarray, columns: dict):
+        """
+        빠져 있던 봉이 늦게 온 경우 - pos 이후 구간을 합쳐 정렬한 전체 컬럼을 새 세대 디렉토리에 쓰고
+        CURRENT 를 임시 파일 → fsync → rename 으로 교체
+        (제자리에서 잘라내면 같은 파일을 mmap 으로 읽는 대시보드 / 백테스트가 SIGBUS 로 죽을 수 있음 -
+        이전 세대 파일은 지워도 기존 mmap 은 그 내용을 그대로 본다)
+        """
+        current = self.columns()
+        tail = {name: np.array(values[pos:]) for name, values in current.items()}
+        merged_ts = np.concatenate([tail["timestamp"], ts])
+        order = np.argsort(merged_ts, kind="stable")
+        merged_ts = merged_ts[order]
+        keep = np.append(merged_ts[1:] != merged_ts[:-1], True)  # 새 값 우선
+
+        merged = {"timestamp": merged_ts[keep]}
+        for name in COLUMNS:
+            merged[name] = np.concatenate([tail[name], columns[name]])[order][keep]
+
+        previous = self._generation()
+        self._remove_stale_generations(previous)
+        number = int(previous.rsplit("-", 1)[1]) + 1 if previous else 1
+        generation = f"gen-{number:06d}"
+        os.makedirs(os.path.join(self.path, generation))
+        for name, (_, dtype) in FILES.items():
+            with open(self._file(name, generation), "wb") as f:
+                f.write(np.ascontiguousarray(current[name][:pos]).tobytes())
+                f.write(np.asarray(merged[name], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        pointer = os.path.join(self.path, self.POINTER)
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(generation)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{pointer}.tmp", pointer)
+        self._fsync_dir()
+        self._remove_generation(previous)
+
+    def _fsync_dir(self):
+        directory = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def _remove_generation(self, generation: str):
+        """교체된 세대의 컬럼 파일 삭제 (예전 배치면 티커 디렉토리 바로 아래 파일만)"""
+        for name in FILES:
+            try:
+                os.remove(self._file(name, generation))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"[히스토리 저장소 이전 세대 삭제 실패] {e}")
+        if generation:
+            try:
+                os.rmdir(os.path.join(self.path, generation))
+            except OSError as e:
+                log.warning(f"[히스토리 저장소 이전 세대 삭제 실패] {e}")
+
+    def _remove_stale_generations(self, current: str):
+        """CURRENT 교체 전에 죽어서 남은 세대 디렉토리 정리"""
+        for entry in os.listdir(self.path):
+            if entry.startswith("gen-") and entry != current:
+                self._remove_generation(entry)
+
+    def load(self, start: str = None, end: str = None) -> dict:
+        """
+        기간 내 컬럼별 배열 (timestamp 는 int64 ns) - memmap view, 복사 없음
+        start/end 는 포함 범위, 날짜만 주면 그날 전체
+        """
+        arrays = self.columns()
+        ts = arrays["timestamp"]
+        lo, hi = 0, len(ts)
+        if start:
+            lo = int(np.searchsorted(ts, pd.Timestamp(start).value))
+        if end:
+            end_ts = pd.Timestamp(end)
+            if len(end) <= 10:
+                end_ts += pd.Timedelta(days=1) - pd.Timedelta(1)
+            hi = int(np.searchsorted(ts, end_ts.value, side="right"))
+        return {name: values[lo:hi] for name, values in arrays.items()}
+
+    def read_day(self, day: str) -> dict:
+        """하루치 파티션 ('YYYY-MM-DD')"""
+        return self.load(day, day)
+
+    def to_frame(self, start: str = None, end: str = None) -> pd.DataFrame:
+        """backtest.load_history 와 같은 형태의 DataFrame"""
+        arrays = self.load(start, end)
+        frame = {"timestamp": arrays["timestamp"].view("datetime64[ns]")}
+        frame.update({name: arrays[name] for name in COLUMNS})
+        return pd.DataFrame(frame, columns=["timestamp", *COLUMNS])
+
+    def export_parquet(self, path: str, start: str = None, end: str = None, by_day: bool = False) -> int:
+        """
+        기간 데이터를 Parquet 로 내보내기 (pyarrow 필요)
+        by_day=True 면 path 디렉토리 아래 date=YYYY-MM-DD 파티션으로 나눠 쓴다
+        """
+        if pq is None:
+            raise RuntimeError("Parquet 내보내기에는 pyarrow 가 필요합니다 (pip install pyarrow)")
+        arrays = self.load(start, end)
+        timestamps = arrays["timestamp"].view("datetime64[ns]")
+        columns = {"timestamp": pa.array(timestamps)}
+        columns.update({name: pa.array(np.asarray(arrays[name])) for name in COLUMNS})
+        if by_day:
+            columns["date"] = pa.array(timestamps.astype("datetime64[D]").astype(str))
+            table = pa.table(columns)
+            pq.write_to_dataset(table, path, partition_cols=["date"])
+        else:
+            table = pa.table(columns)
+            pq.write_table(table, path)
+        return table.num_rows
+
+    def sync_from_db(self) -> int:
+        """btc_price_1min 에서 저장소의 마지막 봉 이후 데이터를 가져와 반영"""
+        last = self.last_timestamp()
+        sql = "SELECT timestamp, open, high, low, close, volume FROM btc_price_1min"
+        params = ()
+        if last is not None:
+            sql += " WHERE timestamp >= %s"
+            params = (pd.Timestamp(last).strftime("%Y-%m-%d %H:%M:%S"),)
+
+        with db_session() as conn:
+            if not conn:
+                return 0
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql + " ORDER BY timestamp", params)
+                    rows = cursor.fetchall()
+            except Exception as e:
+                log.error(f"[히스토리 저장소 동기화 실패] {e}")
+                return 0
+
+        df = pd.DataFrame(list(rows), columns=["timestamp", *COLUMNS])
+        df[list(COLUMNS)] = df[list(COLUMNS)].astype("float64")
+        written = self.append_df(df)
+        log.info(f"🗄️ 히스토리 저장소 동기화: {written}행")
+        return written
+
+
+_stores = {}
+
+
+def get_history_store(ticker: str = COIN_TICKER) -> HistoryStore:
+    """티커별 프로세스 공용 히스토리 저장소"""
+    store = _stores.get(ticker)
+    if store is None:
+        store = _stores[ticker] = HistoryStore(ticker=ticker)
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="1분봉 컬럼형 히스토리 저장소")
+    parser.add_argument("--sync", action="store_true", help="btc_price_1min 에서 새 데이터 가져오기")
+    parser.add_argument("--export", help="Parquet 파일로 내보낼 경로")
+    parser.add_argument("--by-day", action="store_true", help="날짜별 파티션 디렉토리로 내보내기")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    args = parser.parse_args()
+
+    store = get_history_store()
+    if args.sync:
+        store.sync_from_db()
+    if args.export:
+        rows = store.export_parquet(args.export, args.start, args.end, args.by_day)
+        print(f"{rows}행 → {args.export}")
@@ -0,0 +1,258 @@
+# app/indicator_stream.py
+
+import math
+from collections import deque
+from config import COIN_TICKER
+
+NAN = float("nan")
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """pandas 나눗셈과 같은 결과 (0/0 → NaN, 양수/0 → inf)"""
+    if denominator == 0:
+        return NAN if numerator == 0 else math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class _RollingStats:
+    """
+    고정 길이 윈도우의 평균/분산을 캔들 하나당 O(1)로 갱신
+    (슬라이딩 Welford 방식, pandas rolling(window).mean()/std()와 동일한 값)
+    """
+
+    # 누적 오차 방지를 위해 일정 횟수마다 윈도우 전체로 재계산
+    RESYNC_EVERY = 1000
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._pushes = 0
+
+    def push(self, x: float):
+        n = len(self.values)
+        if n < self.size:
+            self.values.append(x)
+            delta = x - self.mean
+            self.mean += delta / (n + 1)
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.values[0]
+            self.values.append(x)
+            old_mean = self.mean
+            self.mean += (x - old) / n
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self):
+        n = len(self.values)
+        self.mean = math.fsum(self.values) / n
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def window_mean(self) -> float:
+        """윈도우가 가득 찼을 때만 평균 (min_periods=window)"""
+        return self.mean if self.full else NAN
+
+    def partial_mean(self) -> float:
+        """값이 하나라도 있으면 평균 (min_periods=1)"""
+        return self.mean if self.values else NAN
+
+    def window_sum(self) -> float:
+        return self.mean * self.size if self.full else NAN
+
+    def window_std(self) -> float:
+        """표본 표준편차 (ddof=1)"""
+        if not self.full or self.size < 2:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.size - 1))
+
+    def save(self) -> tuple:
+        return tuple(self.values), self.mean, self.m2, self._pushes
+
+    def restore(self, state: tuple):
+        values, self.mean, self.m2, self._pushes = state
+        self.values = deque(values, maxlen=self.size)
+
+
+class _Ema:
+    """ewm(span, adjust=False).mean()과 동일한 지수이동평균"""
+
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def push(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def save(self):
+        return self.value
+
+    def restore(self, state):
+        self.value = state
+
+
+class IndicatorStream:
+    """
+    strategy2 지표를 새 캔들마다 증분 갱신하는 스트리밍 엔진
+
+    MA5/10/20, RSI(14), 볼린저 밴드(20, 2.0), MACD(12/26/9), 변동성,
+    거래량 비율, 가격변화/5분 추세를 지표별 고정 크기 상태로 유지한다.
+    같은 캔들 시퀀스에 대해 calculate_rsi / calculate_bollinger_bands /
+    calculate_macd 와 같은 값을 낸다. (MACD의 EMA는 스트림 시작 시점부터
+    이어지므로, 60개 윈도우를 매번 새로 계산하는 값과는 초기값 영향만큼 다를 수 있음)
+
+    같은 timestamp의 캔들이 다시 들어오면 (아직 형성 중인 마지막 봉)
+    직전 상태로 되돌린 뒤 새 값으로 다시 반영한다.
+    """
+
+    HISTORY = 6  # 최신 봉 포함 보관할 스냅샷 수 (df.iloc[-6] 용)
+
+    def __init__(self, rsi_period: int = 14, bb_window: int = 20, bb_std_dev: float = 2.0):
+        self.bb_std_dev = bb_std_dev
+        self.ma5 = _RollingStats(5)
+        self.ma10 = _RollingStats(10)
+        self.ma20 = _RollingStats(20)
+        self.bb = _RollingStats(bb_window)
+        self.gain = _RollingStats(rsi_period)
+        self.loss = _RollingStats(rsi_period)
+        self.volume = _RollingStats(10)
+        self.price_change = _RollingStats(5)
+        self.ema12 = _Ema(12)
+        self.ema26 = _Ema(26)
+        self.ema_signal = _Ema(9)
+
+        self._components = (
+            self.ma5, self.ma10, self.ma20, self.bb, self.gain, self.loss,
+            self.volume, self.price_change, self.ema12, self.ema26, self.ema_signal,
+        )
+        self._prev_close = None
+        self._checkpoint = None
+        self.count = 0
+        self.snapshots = deque(maxlen=self.HISTORY)
+
+    @property
+    def last_timestamp(self):
+        return self.snapshots[-1]["timestamp"] if self.snapshots else None
+
+    def update(self, timestamp, open_: float, high: float, low: float, close: float, volume: float):
+        """
+        캔들 하나를 반영하고 최신 지표 스냅샷(dict)을 반환
+        - 새 timestamp: 상태를 갱신
+        - 마지막과 같은 timestamp: 형성 중 봉의 수정으로 보고 다시 반영
+        - 과거 timestamp: 무시
+        """
+        last = self.last_timestamp
+        if last is not None and timestamp < last:
+            return self.snapshots[-1]
+
+        if last is not None and timestamp == last:
+            self._rollback()
+        else:
+            self._checkpoint = (
+                [c.save() for c in self._components],
+                self._prev_close,
+                self.count,
+            )
+
+        snapshot = self._apply(timestamp, float(open_), float(high), float(low), float(close), float(volume))
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def _rollback(self):
+        states, self._prev_close, self.count = self._checkpoint
+        for component, state in zip(self._components, states):
+            component.restore(state)
+        self.snapshots.pop()
+
+    def _apply(self, timestamp, open_, high, low, close, volume) -> dict:
+        prev_close = self._prev_close
+
+        for stats in (self.ma5, self.ma10, self.ma20, self.bb):
+            stats.push(close)
+        self.volume.push(volume)
+
+        if prev_close is None:
+            rsi = NAN
+            price_change = NAN
+        else:
+            delta = close - prev_close
+            self.gain.push(max(delta, 0.0))
+            self.loss.push(max(-delta, 0.0))
+            rs = self.gain.partial_mean() / (self.loss.partial_mean() + 1e-9)
+            rsi = 100 - (100 / (1 + rs))
+
+            price_change = close / prev_close - 1
+            self.price_change.push(price_change)
+
+        macd = self.ema12.push(close) - self.ema26.push(close)
+        signal = self.ema_signal.push(macd)
+
+        middle = self.bb.window_mean()
+        std = self.bb.window_std()
+        volume_ma = self.volume.window_mean()
+
+        self._prev_close = close
+        self.count += 1
+
+        return {
+            "timestamp": timestamp,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "ma5": self.ma5.window_mean(),
+            "ma10": self.ma10.window_mean(),
+            "ma20": self.ma20.window_mean(),
+            "rsi": rsi,
+            "lower_band": middle - std * self.bb_std_dev,
+            "middle_band": middle,
+            "upper_band": middle + std * self.bb_std_dev,
+            "bb_std": std,
+            "macd": macd,
+            "signal": signal,
+            "histogram": macd - signal,
+            "volatility": (high - low) / low,
+            "volume_ratio": _ratio(volume, volume_ma),
+            "price_change": price_change,
+            "trend": self.price_change.window_sum(),
+        }
+
+    def update_from_df(self, df):
+        """timestamp 컬럼 또는 DatetimeIndex를 가진 OHLCV DataFrame을 순서대로 반영"""
+        timestamps = df["timestamp"] if "timestamp" in df.columns else df.index
+        for ts, o, h, l, c, v in zip(timestamps, df["open"], df["high"], df["low"], df["close"], df["volume"]):
+            self.update(ts, o, h, l, c, v)
+
+    def is_ready(self, min_candles: int) -> bool:
+        return self.count >= min_candles
+
+    def latest(self) -> dict:
+        return self.snapshots[-1]
+
+    def previous(self, n: int = 1) -> dict:
+        """n개 이전 봉의 스냅샷 (previous(1) == df.iloc[-2])"""
+        return self.snapshots[-1 - n]
+
+
+_streams = {}
+
+
+def get_indicator_stream(ticker: str = COIN_TICKER) -> IndicatorStream:
+    """티커별 프로세스 공용 지표 스트림"""
+    stream = _streams.get(ticker)
+    if stream is None:
+        stream = _streams[ticker] = IndicatorStream()
+    return stream
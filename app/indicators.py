@@ -0,0 +1,250 @@
+# app/indicators.py
+
+import math
+import numpy as np
+
+# numpy 배열용 지표 커널 (strategy2.calculate_rsi / calculate_bollinger_bands / calculate_macd 와 같은 값)
+# - 입력은 1-D (캔들 n개) 또는 마지막 축이 시간인 N-D 배치 (예: (종목 수, n) / (파라미터 조합 수, n))
+#   파라미터 조합 배치는 np.broadcast_to(close, (k, n)) 처럼 복사 없이 넘기면 된다
+# - 결과는 out 에 바로 채운다 (없으면 새로 할당) - 같은 크기로 반복 계산할 때 버퍼를 재사용
+# - 중간 Series 를 만들지 않고, 호출당 임시 배열은 입력 크기 1~2개로 고정
+# - 입력은 유한값이라고 가정 (pandas 처럼 NaN 을 건너뛰지 않음)
+
+# EMA 블록 길이를 정할 때 허용하는 가중치 범위 (e^300 - float64 범위 안에서 정밀도 유지)
+_EMA_LOG_RANGE = 300.0
+# 이동평균/표준편차 누적합을 새로 시작하는 간격 (길수록 빠르고, 짧을수록 편차가 작아 정밀)
+_MOMENT_BLOCK = 2048
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def _output(out, shape: tuple) -> np.ndarray:
+    if out is None:
+        return np.empty(shape, dtype=np.float64)
+    if out.shape != shape or out.dtype != np.float64:
+        raise ValueError(f"out 버퍼는 float64 {shape} 여야 합니다 (받은 값: {out.dtype} {out.shape})")
+    return out
+
+
+def _window_moments(x: np.ndarray, window: int, sums: np.ndarray, stds: np.ndarray = None):
+    """
+    윈도우 평균(과 표본 표준편차)을 sums / stds 에 채움 (길이 n - window + 1, i 번째 = x[..., i:i+window])
+
+    블록마다 첫 값을 기준으로 뺀 편차의 누적합 차이로 윈도우 합을 구한다
+    - 누적합이 블록 안에서만 쌓이고 값이 기준 대비 편차라 가격처럼 큰 값도 자릿수 손실이 작다
+    - 블록 하나당 ufunc 몇 번이라 윈도우 길이와 무관하게 O(n)
+    """
+    m = x.shape[-1] - window + 1
+    lead = x.shape[:-1]
+    block = min(_MOMENT_BLOCK, m)
+    dev = np.empty(lead + (block + window,), dtype=np.float64)
+    sq = np.empty_like(dev) if stds is not None else None
+    tmp = np.empty(lead + (block,), dtype=np.float64) if stds is not None else None
+
+    for a in range(0, m, block):
+        b = min(a + block, m)
+        k, size = b - a, b - a + window - 1
+        seg = x[..., a:a + size]
+        ref = seg[..., :1]
+
+        # dev[..., j] = 앞 j 개 편차 합 (dev[..., 0] = 0)
+        dev[..., 0] = 0.0
+        np.subtract(seg, ref, out=dev[..., 1:size + 1])
+        if sq is not None:
+            sq[..., 0] = 0.0
+            np.multiply(dev[..., 1:size + 1], dev[..., 1:size + 1], out=sq[..., 1:size + 1])
+            np.cumsum(sq[..., :size + 1], axis=-1, out=sq[..., :size + 1])
+        np.cumsum(dev[..., :size + 1], axis=-1, out=dev[..., :size + 1])
+
+        total = sums[..., a:b]
+        np.subtract(dev[..., window:window + k], dev[..., :k], out=total)
+        if stds is not None:
+            # 편차 제곱합 - (편차 합)^2 / window = 윈도우 평균 기준 제곱합
+            var = stds[..., a:b]
+            np.subtract(sq[..., window:window + k], sq[..., :k], out=var)
+            np.multiply(total, total, out=tmp[..., :k])
+            tmp[..., :k] /= window
+            var -= tmp[..., :k]
+            np.maximum(var, 0.0, out=var)
+            var /= window - 1
+            np.sqrt(var, out=var)
+        total /= window
+        total += ref
+
+
+def rolling_mean(x, window: int, min_periods: int = None, out: np.ndarray = None) -> np.ndarray:
+    """
+    rolling(window, min_periods).mean() 과 같은 이동평균 (마지막 축 기준)
+
+    Args:
+        x: 1-D 또는 N-D 배열
+        window: 윈도우 길이
+        min_periods: 값을 내기 위한 최소 개수 (기본: window, 1 이면 앞부분은 있는 만큼의 평균)
+        out: 결과 버퍼 (x 와 같은 shape, x 와 겹치면 안 됨)
+    """
+    x = _as_float(x)
+    out = _output(out, x.shape)
+    min_periods = window if min_periods is None else min_periods
+    n = x.shape[-1]
+
+    if n >= window:
+        _window_moments(x, window, out[..., window - 1:])
+
+    head = min(window - 1, n)
+    if head:
+        if min_periods < window:
+            np.cumsum(x[..., :head], axis=-1, out=out[..., :head])
+            out[..., :head] /= np.arange(1, head + 1)
+            out[..., :max(0, min(min_periods, head + 1) - 1)] = np.nan
+        else:
+            out[..., :head] = np.nan
+    return out
+
+
+def rolling_std(x, window: int, out: np.ndarray = None, mean_out: np.ndarray = None) -> np.ndarray:
+    """
+    rolling(window).std() 과 같은 표본 표준편차 (ddof=1, min_periods=window)
+
+    Args:
+        out: 결과 버퍼 (x 와 같은 shape)
+        mean_out: 주면 같은 윈도우의 이동평균도 함께 채움 (볼린저 밴드 중간선)
+    """
+    x = _as_float(x)
+    out = _output(out, x.shape)
+    mean = _output(mean_out, x.shape) if mean_out is not None else None
+    n = x.shape[-1]
+    head = min(window - 1, n)
+    out[..., :head] = np.nan
+    if mean is not None:
+        mean[..., :head] = np.nan
+    if n < window:
+        return out
+
+    sums = mean[..., window - 1:] if mean is not None else np.empty(x.shape[:-1] + (n - window + 1,))
+    _window_moments(x, window, sums, out[..., window - 1:])
+    return out
+
+
+def ema(x, span: float, out: np.ndarray = None) -> np.ndarray:
+    """
+    ewm(span, adjust=False).mean() 과 같은 지수이동평균 (마지막 축 기준)
+
+    y[t] = (1-a)·y[t-1] + a·x[t] 점화식을 블록 단위 닫힌 식으로 푼다
+    블록 안에서는 y[s+j] = (1-a)^(j+1) · (y[s-1] + a·Σ x[s+i]·(1-a)^-(i+1)) 를 누적합 한 번으로 계산하고
+    가중치가 float64 범위를 넘지 않는 길이마다 끊어 다음 블록으로 넘긴다 (파이썬 반복은 n / 블록 길이 번)
+
+    Args:
+        out: 결과 버퍼 (x 와 같은 shape, x 자체를 넘겨 제자리 계산 가능)
+    """
+    x = _as_float(x)
+    out = _output(out, x.shape)
+    n = x.shape[-1]
+    if n == 0:
+        return out
+
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    block = max(1, min(n, int(_EMA_LOG_RANGE / -math.log(decay)) if decay > 0 else 1))
+    steps = np.arange(1, block + 1, dtype=np.float64)
+    grow = decay ** -steps
+    shrink = decay ** steps
+
+    out[..., 0] = x[..., 0]
+    carry = out[..., 0].copy()
+    buf = np.empty(x.shape[:-1] + (block,), dtype=np.float64)
+    start = 1
+    while start < n:
+        end = min(start + block, n)
+        m = end - start
+        part = buf[..., :m]
+        np.multiply(x[..., start:end], grow[:m], out=part)
+        np.cumsum(part, axis=-1, out=part)
+        part *= alpha
+        part += carry[..., None]
+        np.multiply(part, shrink[:m], out=out[..., start:end])
+        carry[...] = out[..., end - 1]
+        start = end
+    return out
+
+
+def rsi(close, period: int = 14, out: np.ndarray = None) -> np.ndarray:
+    """
+    calculate_rsi 와 같은 RSI (단순 이동평균 방식, 첫 값은 NaN)
+
+    Args:
+        close: 종가 배열 (1-D 또는 마지막 축이 시간인 배치)
+        period: RSI 기간
+        out: 결과 버퍼 (close 와 같은 shape)
+    """
+    close = _as_float(close)
+    out = _output(out, close.shape)
+    if close.shape[-1] == 0:
+        return out
+    out[..., 0] = np.nan
+    if close.shape[-1] == 1:
+        return out
+
+    # 임시 배열 2개(n-1)로 상승폭/하락폭 → 평균 → RSI 순서로 제자리 계산
+    delta = np.diff(close, axis=-1)
+    loss = np.minimum(delta, 0.0)
+    np.negative(loss, out=loss)
+    np.maximum(delta, 0.0, out=delta)
+
+    body = out[..., 1:]
+    rolling_mean(delta, period, min_periods=1, out=body)
+    avg_loss = rolling_mean(loss, period, min_periods=1, out=delta)
+    avg_loss += 1e-9
+    np.divide(body, avg_loss, out=body)
+    body += 1.0
+    np.divide(100.0, body, out=body)
+    np.subtract(100.0, body, out=body)
+    return out
+
+
+def bollinger_bands(close, window: int = 20, std_dev=2.0, out: np.ndarray = None) -> np.ndarray:
+    """
+    calculate_bollinger_bands 와 같은 볼린저 밴드
+
+    Args:
+        std_dev: 표준편차 계수 - 스칼라 또는 배치 앞쪽 축(close.shape[:-1]) 크기의 배열 (파라미터 조합별 계수)
+        out: (3,) + close.shape 버퍼
+
+    Returns:
+        out[0] 하한선, out[1] 중간선, out[2] 상한선
+    """
+    close = _as_float(close)
+    out = _output(out, (3,) + close.shape)
+    lower, middle, upper = out
+    scale = np.asarray(std_dev, dtype=np.float64)
+    if scale.ndim:
+        scale = scale[..., None]
+
+    rolling_std(close, window, out=upper, mean_out=middle)
+    np.multiply(upper, scale, out=upper)
+    np.subtract(middle, upper, out=lower)
+    np.add(middle, upper, out=upper)
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9, out: np.ndarray = None) -> np.ndarray:
+    """
+    calculate_macd 와 같은 MACD
+
+    Args:
+        out: (3,) + close.shape 버퍼
+
+    Returns:
+        out[0] MACD선, out[1] 신호선, out[2] 히스토그램
+    """
+    close = _as_float(close)
+    out = _output(out, (3,) + close.shape)
+    line, sig, hist = out
+
+    ema(close, fast, out=line)
+    ema(close, slow, out=hist)
+    np.subtract(line, hist, out=line)
+    ema(line, signal, out=sig)
+    np.subtract(line, sig, out=hist)
+    return out
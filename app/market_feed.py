@@ -0,0 +1,279 @@
+# app/market_feed.py
+
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import websockets
+from app.utils.logger import get_logger
+from config import UPBIT_WS_URL
+
+log = get_logger()
+
+MINUTE_MS = 60_000
+KST_OFFSET = timedelta(hours=9)
+
+
+def _minute_start(ts_ms: int) -> int:
+    return ts_ms - ts_ms % MINUTE_MS
+
+
+def _to_kst(ts_ms: int) -> datetime:
+    """UTC epoch ms → pyupbit 1분봉과 같은 KST naive datetime"""
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).replace(tzinfo=None) + KST_OFFSET
+
+
+class CandleBuilder:
+    """
+    체결(trade) 스트림으로 1분봉을 직접 만든다
+    다음 분의 첫 체결이 오거나 flush()로 분 경계가 지나면 봉을 마감한다
+    접속/재접속 직후의 봉은 중간부터 집계되므로 partial=True 로 표시한다
+    """
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.current = None     # 형성 중인 봉
+        self.minute_ms = None
+        self.closed_ms = None   # 마지막으로 마감한 분
+        self.late_trades = 0    # 이미 마감된 분의 늦은 체결 (무시)
+        self._partial_next = True
+
+    def mark_partial(self):
+        """연결이 끊겼을 때 호출 - 형성 중인 봉과 다음 봉을 불완전 봉으로 표시"""
+        if self.current is not None:
+            self.current["partial"] = True
+        self._partial_next = True
+
+    def add_trade(self, price: float, volume: float, ts_ms: int):
+        """체결 반영. 이번 체결로 마감된 봉이 있으면 반환"""
+        minute = _minute_start(ts_ms)
+        if self.closed_ms is not None and minute <= self.closed_ms:
+            self.late_trades += 1
+            return None
+
+        closed = None
+        if self.current is not None and minute > self.minute_ms:
+            closed = self._close()
+
+        if self.current is None:
+            self.minute_ms = minute
+            self.current = {
+                "timestamp": _to_kst(minute),
+                "open": price, "high": price, "low": price, "close": price,
+                "volume": volume,
+                "partial": self._partial_next,
+            }
+            self._partial_next = False
+        else:
+            c = self.current
+            c["high"] = max(c["high"], price)
+            c["low"] = min(c["low"], price)
+            c["close"] = price
+            c["volume"] += volume
+        return closed
+
+    def flush(self, now_ms: int, grace_ms: int = 0):
+        """체결이 없어도 분 경계(+grace)가 지났으면 봉 마감"""
+        if self.current is not None and now_ms >= self.minute_ms + MINUTE_MS + grace_ms:
+            return self._close()
+        return None
+
+    def _close(self):
+        closed, self.current = self.current, None
+        self.closed_ms = self.minute_ms
+        closed["minute_ms"] = self.minute_ms
+        return closed
+
+
+def candles_to_df(candles: list) -> pd.DataFrame:
+    """마감된 봉 리스트 → pyupbit.get_ohlcv 와 같은 DatetimeIndex DataFrame"""
+    df = pd.DataFrame(candles, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    return df.set_index("timestamp")
+
+
+class MarketFeed:
+    """
+    업비트 웹소켓 trade/ticker 구독 → 로컬 1분봉 생성 → 봉 마감 즉시 콜백
+
+    - on_candle(ticker, candle): 봉 마감 시 호출 (동기 함수, 스레드에서 한 번에 하나씩 실행)
+      candle["partial"] 이 True 면 접속 직후라 일부 체결이 빠진 봉
+    - last_price(ticker): ticker 스트림 기준 최신가 (REST get_current_price 대체)
+    - 연결이 끊기면 지수 백오프로 재접속하고 구독을 다시 보낸다
+    """
+
+    def __init__(self, tickers: list, on_candle=None, url: str = UPBIT_WS_URL,
+                 grace_ms: int = 1500, max_backoff: float = 30.0):
+        self.tickers = list(tickers)
+        self.on_candle = on_candle
+        self.url = url
+        self.grace_ms = grace_ms
+        self.max_backoff = max_backoff
+        self.builders = {t: CandleBuilder(t) for t in self.tickers}
+        self.prices = {}
+        self.reconnects = 0
+        # 거래소 시각 기준 시계 (마지막 체결 시각 + 그 뒤 경과 시간)
+        self._exchange_ms = None
+        self._exchange_mono = 0.0
+        self._stop = asyncio.Event()
+        self._callback_lock = asyncio.Lock()
+
+    def last_price(self, ticker: str, max_age: float = 10.0):
+        """max_age초 이내에 받은 최신가, 없으면 None"""
+        price, received = self.prices.get(ticker, (None, 0.0))
+        if price is None or time.monotonic() - received > max_age:
+            return None
+        return price
+
+    def subscription(self) -> str:
+        return json.dumps([
+            {"ticket": str(uuid.uuid4())},
+            {"type": "trade", "codes": self.tickers},
+            {"type": "ticker", "codes": self.tickers},
+            {"format": "DEFAULT"},
+        ])
+
+    async def run(self):
+        """stop()이 호출될 때까지 접속/재접속 반복"""
+        backoff = 1.0
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            while not self._stop.is_set():
+                try:
+                    for builder in self.builders.values():
+                        builder.mark_partial()
+                    async with websockets.connect(self.url, ping_interval=20, ping_timeout=20) as ws:
+                        await ws.send(self.subscription())
+                        log.info(f"🔌 웹소켓 구독 시작: {', '.join(self.tickers)}")
+                        backoff = 1.0
+                        await self._consume(ws)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.warning(f"[웹소켓 연결 끊김] {e} → {backoff:.0f}초 후 재접속")
+
+                if self._stop.is_set():
+                    break
+                self.reconnects += 1
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            flusher.cancel()
+
+    def stop(self):
+        self._stop.set()
+
+    async def _consume(self, ws):
+        stop_wait = asyncio.create_task(self._stop.wait())
+        try:
+            while True:
+                recv = asyncio.create_task(ws.recv())
+                done, _ = await asyncio.wait({recv, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+                if stop_wait in done:
+                    recv.cancel()
+                    return
+                await self._handle(json.loads(recv.result()))
+        finally:
+            stop_wait.cancel()
+
+    async def _handle(self, msg: dict):
+        code = msg.get("code") or msg.get("cd")
+        kind = msg.get("type") or msg.get("ty")
+        if code not in self.builders:
+            return
+
+        if kind == "ticker":
+            self.prices[code] = (float(msg["trade_price"]), time.monotonic())
+        elif kind == "trade":
+            price = float(msg["trade_price"])
+            trade_ts = int(msg["trade_timestamp"])
+            self.prices[code] = (price, time.monotonic())
+            if self._exchange_ms is None or trade_ts > self._exchange_ms:
+                self._exchange_ms, self._exchange_mono = trade_ts, time.monotonic()
+            closed = self.builders[code].add_trade(price, float(msg["trade_volume"]), trade_ts)
+            if closed:
+                await self._emit(code, closed)
+
+    async def _flush_loop(self):
+        """체결이 뜸해도 분 경계 직후 봉을 마감하도록 1초마다 확인"""
+        while True:
+            await asyncio.sleep(1)
+            if self._exchange_ms is None:
+                continue
+            now_ms = self._exchange_ms + int((time.monotonic() - self._exchange_mono) * 1000)
+            for code, builder in self.builders.items():
+                closed = builder.flush(now_ms, self.grace_ms)
+                if closed:
+                    await self._emit(code, closed)
+
+    async def _emit(self, ticker: str, candle: dict):
+        if not self.on_candle:
+            return
+        # 전략 평가는 블로킹(DB/주문)이므로 스레드에서 하나씩 실행
+        async with self._callback_lock:
+            try:
+                await asyncio.to_thread(self.on_candle, ticker, candle)
+            except Exception as e:
+                log.error(f"[봉 마감 처리 오류] {e}")
+
+
+class ReplayServer:
+    """
+    오프라인 테스트용 로컬 웹소켓 서버
+    기록된 1분봉을 체결 메시지(시가→고가→저가→종가)로 풀어서 업비트 형식으로 재생한다
+
+    async with ReplayServer(df, "KRW-BTC", speed=600) as server:
+        feed = MarketFeed(["KRW-BTC"], on_candle, url=server.url)
+    """
+
+    def __init__(self, candles: pd.DataFrame, ticker: str = "KRW-BTC",
+                 host: str = "127.0.0.1", port: int = 0, speed: float = 60.0):
+        self.candles = candles
+        self.ticker = ticker
+        self.host = host
+        self.port = port
+        self.speed = speed  # 1이면 실시간, 60이면 1분봉이 1초에 하나
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def _messages(self):
+        timestamps = self.candles["timestamp"] if "timestamp" in self.candles.columns else self.candles.index
+        for ts, row in zip(timestamps, self.candles.itertuples()):
+            minute_ms = int((pd.Timestamp(ts) - KST_OFFSET).timestamp() * 1000)
+            prices = (row.open, row.high, row.low, row.close)
+            for k, price in enumerate(prices):
+                trade_ts = minute_ms + k * (MINUTE_MS // 4)
+                yield trade_ts, {
+                    "type": "trade",
+                    "code": self.ticker,
+                    "trade_price": float(price),
+                    "trade_volume": float(row.volume) / len(prices),
+                    "trade_timestamp": trade_ts,
+                }
+
+    async def _handler(self, ws):
+        await ws.recv()  # 구독 메시지
+        prev_ts = None
+        for trade_ts, msg in self._messages():
+            if prev_ts is not None and self.speed:
+                await asyncio.sleep((trade_ts - prev_ts) / 1000 / self.speed)
+            prev_ts = trade_ts
+            await ws.send(json.dumps(msg).encode())
+        await ws.wait_closed()
+
+    async def __aenter__(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
@@ -0,0 +1,109 @@
+# app/pnl_summary.py
+
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+
+log = get_logger()
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS trade_pnl_daily (
+        trade_date DATE NOT NULL,
+        is_simulated BOOLEAN NOT NULL,
+        trades INT NOT NULL DEFAULT 0,
+        buys INT NOT NULL DEFAULT 0,
+        sells INT NOT NULL DEFAULT 0,
+        wins INT NOT NULL DEFAULT 0,
+        losses INT NOT NULL DEFAULT 0,
+        roi_sum DOUBLE NOT NULL DEFAULT 0,
+        pnl_krw DOUBLE NOT NULL DEFAULT 0,
+        last_executed_at DATETIME,
+        PRIMARY KEY (trade_date, is_simulated)
+    )
+"""
+
+# trade_history 전체로 일별 요약 다시 계산 (최초 1회 / 복구용)
+_REBUILD = """
+    INSERT INTO trade_pnl_daily
+    (trade_date, is_simulated, trades, buys, sells, wins, losses, roi_sum, pnl_krw, last_executed_at)
+    SELECT DATE(executed_at), is_simulated, COUNT(*),
+           SUM(trade_type = 'buy'), SUM(trade_type = 'sell'),
+           SUM(roi > 0), SUM(roi < 0),
+           COALESCE(SUM(roi), 0),
+           COALESCE(SUM(CASE WHEN trade_type = 'sell' AND roi IS NOT NULL
+                             THEN price * amount * roi / (1 + roi) ELSE 0 END), 0),
+           MAX(executed_at)
+    FROM trade_history
+    GROUP BY DATE(executed_at), is_simulated
+    ON DUPLICATE KEY UPDATE
+    trades = VALUES(trades), buys = VALUES(buys), sells = VALUES(sells),
+    wins = VALUES(wins), losses = VALUES(losses), roi_sum = VALUES(roi_sum),
+    pnl_krw = VALUES(pnl_krw), last_executed_at = VALUES(last_executed_at)
+"""
+
+# 거래 한 건을 해당 날짜 요약에 더하기
+_ACCUMULATE = """
+    INSERT INTO trade_pnl_daily
+    (trade_date, is_simulated, trades, buys, sells, wins, losses, roi_sum, pnl_krw, last_executed_at)
+    VALUES (DATE(%s), %s, 1, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+    trades = trades + 1, buys = buys + VALUES(buys), sells = sells + VALUES(sells),
+    wins = wins + VALUES(wins), losses = losses + VALUES(losses),
+    roi_sum = roi_sum + VALUES(roi_sum), pnl_krw = pnl_krw + VALUES(pnl_krw),
+    last_executed_at = GREATEST(last_executed_at, VALUES(last_executed_at))
+"""
+
+
+def ensure_daily_pnl():
+    """요약 테이블 생성, 비어 있으면 trade_history 로 채움"""
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_CREATE_TABLE)
+                cursor.execute("SELECT COUNT(*) FROM trade_pnl_daily")
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute(_REBUILD)
+                    log.info("📒 일별 손익 요약 테이블 초기화 완료")
+            conn.commit()
+        except Exception as e:
+            log.error(f"[일별 손익 요약 초기화 실패] {e}")
+
+
+def rebuild_daily_pnl():
+    """trade_history 전체로 요약을 다시 계산"""
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_CREATE_TABLE)
+                cursor.execute("DELETE FROM trade_pnl_daily")
+                cursor.execute(_REBUILD)
+            conn.commit()
+        except Exception as e:
+            log.error(f"[일별 손익 요약 재계산 실패] {e}")
+
+
+def record_daily_pnl(trade_type: str, price: float, amount: float, roi, executed_at: str, is_simulated: bool):
+    """거래 기록 직후 호출 - 해당 날짜 요약 행만 갱신"""
+    is_sell = trade_type == "sell"
+    pnl = price * amount * roi / (1 + roi) if is_sell and roi is not None else 0.0
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(_ACCUMULATE, (
+                    executed_at, is_simulated,
+                    int(not is_sell), int(is_sell),
+                    int(roi is not None and roi > 0), int(roi is not None and roi < 0),
+                    roi or 0.0, pnl, executed_at,
+                ))
+            conn.commit()
+        except Exception as e:
+            log.error(f"[일별 손익 요약 갱신 실패] {e}")
+
+
+if __name__ == "__main__":
+    rebuild_daily_pnl()
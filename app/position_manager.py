@@ -0,0 +1,213 @@
+# app/position_manager.py
+
+import threading
+import time
+from app.pnl_summary import record_daily_pnl
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+from app.utils.time_utils import get_kst_now
+from config import LIVE_MODE, POSITION_RECONCILE_SECONDS
+
+log = get_logger()
+
+
+class PositionManager:
+    """
+    trade_history 기반 포지션 상태를 메모리에 유지
+
+    - 시작 시 한 번 읽어오고, 이후 매수/매도는 DB에 기록(write-through)하면서 메모리도 갱신
+    - 열린 포지션 / 진입가 / 수량 / 보유 수량을 DB 조회 없이 O(1)로 반환
+    - reconcile_seconds 마다 테이블과 다시 맞춰 보고, 다르면 DB 값을 따른다
+    """
+
+    def __init__(self, reconcile_seconds: float = POSITION_RECONCILE_SECONDS):
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._last_trade = None       # 가장 최근 거래 (trade_type, price, amount)
+        self._last_buys = {True: None, False: None}  # is_simulated → 가장 최근 매수 (_buy_record 형식)
+        self._holdings = {True: 0.0, False: 0.0}  # is_simulated → 보유 수량
+        self.fill_columns = None      # trade_history 에 fee / order_uuid 컬럼이 있는지 (None: 아직 모름)
+
+    def load(self) -> bool:
+        """trade_history 에서 포지션 상태 읽기 (실패 시 기존 상태 유지)"""
+        with db_session() as conn:
+            if not conn:
+                return False
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT trade_type, price, amount FROM trade_history
+                        ORDER BY executed_at DESC
+                        LIMIT 1
+                    """)
+                    last_trade = cursor.fetchone()
+
+                    if self.fill_columns is None:
+                        self.fill_columns = _has_fill_columns(cursor)
+                    fee_column = "fee" if self.fill_columns else "NULL"
+                    last_buys = {}
+                    for is_simulated in (True, False):
+                        cursor.execute(f"""
+                            SELECT price, amount, executed_at, {fee_column} FROM trade_history
+                            WHERE trade_type = 'buy' AND is_simulated = %s
+                            ORDER BY executed_at DESC
+                            LIMIT 1
+                        """, (is_simulated,))
+                        last_buys[is_simulated] = cursor.fetchone()
+
+                    cursor.execute("""
+                        SELECT is_simulated,
+                               SUM(CASE
+                                   WHEN trade_type = 'buy' THEN amount
+                                   WHEN trade_type = 'sell' THEN -amount
+                                   ELSE 0 END)
+                        FROM trade_history
+                        GROUP BY is_simulated
+                    """)
+                    holding_rows = cursor.fetchall()
+            except Exception as e:
+                log.error(f"[포지션 상태 조회 실패] {e}")
+                return False
+
+        state = (
+            (last_trade[0], float(last_trade[1]), float(last_trade[2])) if last_trade else None,
+            {sim: _buy_record(*row) if row else None for sim, row in last_buys.items()},
+            {True: 0.0, False: 0.0, **{bool(sim): round(float(total or 0), 8) for sim, total in holding_rows}},
+        )
+
+        with self._lock:
+            current = (self._last_trade, self._last_buys, self._holdings)
+            if self._loaded and current != state:
+                log.warning(f"⚠️ 포지션 상태 불일치 → DB 기준으로 보정 (메모리: {current}, DB: {state})")
+            self._last_trade, self._last_buys, self._holdings = state
+            self._loaded = True
+            self._loaded_at = time.monotonic()
+        return True
+
+    def _ensure_fresh(self):
+        if not self._loaded or time.monotonic() - self._loaded_at >= self.reconcile_seconds:
+            with self._lock:
+                # 다른 스레드가 먼저 읽어왔으면 생략
+                if not self._loaded or time.monotonic() - self._loaded_at >= self.reconcile_seconds:
+                    if not self.load():
+                        # 실패해도 매번 재시도하지 않도록 다음 주기로 미룸
+                        self._loaded_at = time.monotonic()
+
+    def open_position(self):
+        """
+        마지막 거래가 매수면 열린 포지션으로 본다
+
+        Returns:
+            (포지션 여부, 진입가, 수량)
+        """
+        self._ensure_fresh()
+        trade = self._last_trade
+        if not trade or trade[0] == "sell":
+            return False, None, None
+        return True, trade[1], trade[2]
+
+    def last_buy(self, is_simulated: bool = None):
+        """
+        가장 최근 매수 기록 {"price", "amount", "executed_at", "fee"} (없으면 None)
+        is_simulated 를 주면 해당 모드(모의/실매매)의 매수만 본다
+        """
+        self._ensure_fresh()
+        if is_simulated is not None:
+            return self._last_buys[bool(is_simulated)]
+        buys = [b for b in self._last_buys.values() if b]
+        return max(buys, key=lambda b: b["executed_at"]) if buys else None
+
+    def holding(self, is_simulated: bool = not LIVE_MODE) -> float:
+        """매수 수량 합 - 매도 수량 합"""
+        self._ensure_fresh()
+        return self._holdings[bool(is_simulated)]
+
+    def record_trade(self, trade_type: str, price: float, amount: float, roi,
+                     is_simulated: bool, seed_balance: float, fee: float = None, order_uuid: str = None) -> bool:
+        """
+        거래를 trade_history 와 일별 손익 요약에 기록하고 메모리 상태 갱신
+        DB 기록이 실패해도 메모리는 갱신한다 (다음 reconcile 때 DB 기준으로 맞춰짐)
+        실매매 체결은 fee / order_uuid 도 함께 기록 (ensure_fill_columns 로 추가한 컬럼)
+        """
+        executed_at = get_kst_now().replace(tzinfo=None, microsecond=0)
+        executed_at_str = executed_at.strftime("%Y-%m-%d %H:%M:%S")
+        saved = False
+
+        columns = ["trade_type", "price", "amount", "roi", "executed_at", "is_simulated", "seed_balance"]
+        values = [trade_type, price, amount, roi, executed_at_str, is_simulated, seed_balance]
+        if order_uuid is not None:
+            columns += ["fee", "order_uuid"]
+            values += [fee, order_uuid]
+
+        with self._lock:
+            self._ensure_fresh()
+            with db_session() as conn:
+                if conn:
+                    try:
+                        with conn.cursor() as cursor:
+                            cursor.execute(f"""
+                                INSERT INTO trade_history
+                                ({", ".join(columns)})
+                                VALUES ({", ".join(["%s"] * len(values))})
+                            """, values)
+                        conn.commit()
+                        saved = True
+                    except Exception as e:
+                        log.error(f"[{'매수' if trade_type == 'buy' else '매도'} 기록 저장 실패] {e}")
+
+                if saved:
+                    # 대시보드용 일별 손익 요약도 같은 연결로 갱신
+                    record_daily_pnl(trade_type, price, amount, roi, executed_at_str, is_simulated)
+
+            self._last_trade = (trade_type, float(price), float(amount))
+            is_simulated = bool(is_simulated)
+            if trade_type == "buy":
+                self._last_buys[is_simulated] = _buy_record(price, amount, executed_at, fee if order_uuid else None)
+                self._holdings[is_simulated] = round(self._holdings[is_simulated] + amount, 8)
+            else:
+                self._holdings[is_simulated] = round(self._holdings[is_simulated] - amount, 8)
+        return saved
+
+
+def _buy_record(price, amount, executed_at, fee) -> dict:
+    """메모리 / DB 에서 같은 모양으로 만드는 매수 기록 (fee 는 실매매 체결만, 없으면 None)"""
+    return {"price": float(price), "amount": float(amount), "executed_at": executed_at,
+            "fee": float(fee) if fee is not None else None}
+
+
+def _has_fill_columns(cursor) -> bool:
+    """trade_history 에 fee / order_uuid 컬럼이 있는지 (MySQL / SQLite 공용 확인)"""
+    try:
+        cursor.execute("SELECT fee, order_uuid FROM trade_history LIMIT 0")
+        cursor.fetchall()
+        return True
+    except Exception:
+        return False
+
+
+def ensure_fill_columns():
+    """실매매 체결 기록용 trade_history 컬럼 (fee, order_uuid) 이 없으면 추가"""
+    with db_session() as conn:
+        if not conn:
+            return
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'trade_history'
+                """)
+                existing = {row[0] for row in cursor.fetchall()}
+                missing = [ddl for name, ddl in (("fee", "ADD COLUMN fee DOUBLE NULL"),
+                                                 ("order_uuid", "ADD COLUMN order_uuid VARCHAR(64) NULL"))
+                           if name not in existing]
+                if missing:
+                    cursor.execute(f"ALTER TABLE trade_history {', '.join(missing)}")
+                    log.info(f"🧾 trade_history 체결 컬럼 추가: {', '.join(missing)}")
+            positions.fill_columns = True
+        except Exception as e:
+            log.error(f"[trade_history 컬럼 확인 실패] {e}")
+
+
+positions = PositionManager()
@@ -0,0 +1,309 @@
+# app/rollup.py
+
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from app.candle_buffer import COLUMNS, CandleBuffer, _to_ns, get_candle_buffer
+from app.utils.db_connect import db_session
+from app.utils.logger import get_logger
+from config import CANDLE_BATCH_SIZE, ROLLUP_CAPACITY
+
+log = get_logger()
+
+# 타임프레임 → 분 단위 길이 (버킷은 KST 자정 기준으로 정렬)
+TIMEFRAMES = {"5m": 5, "15m": 15, "1h": 60, "1d": 1440}
+MINUTE_NS = 60 * 1_000_000_000
+DAY_NS = 1440 * MINUTE_NS
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS btc_price_rollup (
+        timeframe VARCHAR(4) NOT NULL,
+        timestamp DATETIME NOT NULL,
+        open DOUBLE NOT NULL,
+        high DOUBLE NOT NULL,
+        low DOUBLE NOT NULL,
+        close DOUBLE NOT NULL,
+        volume DOUBLE NOT NULL,
+        PRIMARY KEY (timeframe, timestamp)
+    )
+"""
+
+_UPSERT_HEAD = """
+    INSERT INTO btc_price_rollup
+    (timeframe, timestamp, open, high, low, close, volume)
+    VALUES """
+_UPSERT_ROW = "(%s, %s, %s, %s, %s, %s, %s)"
+_UPSERT_TAIL = """
+    ON DUPLICATE KEY UPDATE
+    open = VALUES(open), high = VALUES(high), low = VALUES(low),
+    close = VALUES(close), volume = VALUES(volume)
+"""
+
+
+def _ns_to_str(ts: int) -> str:
+    return pd.Timestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def resample_ohlcv(df: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """DatetimeIndex 1분봉 → minutes분 봉 (버킷 시작 시각 기준, 빈 버킷 제외)"""
+    bars = df.resample(f"{minutes}min", origin="epoch", label="left", closed="left").agg({
+        "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum",
+    })
+    return bars.dropna(subset=["open"])
+
+
+def pick_timeframe(start, end, max_points: int) -> str:
+    """
+    기간을 max_points 개 봉으로 그릴 때 쓸 원본 타임프레임
+    - 목표 봉 길이 이하인 가장 긴 타임프레임 (그 뒤 downsample_ohlcv 로 max_points 개까지 묶음)
+    """
+    bucket = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds() / 60 / max_points
+    chosen = "1m"
+    for tf, span in TIMEFRAMES.items():
+        if span <= bucket:
+            chosen = tf
+    return chosen
+
+
+def downsample_ohlcv(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    timestamp 컬럼을 가진 OHLCV 봉을 연속한 k개씩 묶어 max_points 개 이하로 재집계
+    (시가=첫 봉, 고가=최대, 저가=최소, 종가=마지막 봉, 거래량=합 - 봉 모양이 유지됨)
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+    k = -(-n // max_points)
+    starts = np.arange(0, n, k)
+    ends = np.append(starts[1:], n) - 1
+    return pd.DataFrame({
+        "timestamp": df["timestamp"].to_numpy()[starts],
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+        "volume": np.add.reduceat(df["volume"].to_numpy(), starts),
+    })
+
+
+def upsert_rollups(rows: list, batch_size: int = CANDLE_BATCH_SIZE) -> int:
+    """(timeframe, timestamp, open, high, low, close, volume) 튜플들을 일괄 upsert"""
+    if not rows:
+        return 0
+    with db_session() as conn:
+        if not conn:
+            return 0
+        try:
+            with conn.cursor() as cursor:
+                for i in range(0, len(rows), batch_size):
+                    batch = rows[i:i + batch_size]
+                    sql = _UPSERT_HEAD + ", ".join([_UPSERT_ROW] * len(batch)) + _UPSERT_TAIL
+                    cursor.execute(sql, [value for row in batch for value in row])
+        except Exception as e:
+            log.error(f"[롤업 저장 실패] {e}")
+            return 0
+    return len(rows)
+
+
+class RollupEngine:
+    """
+    1분봉 → 5m / 15m / 1h / 1d 봉 증분 집계
+
+    - 타임프레임별 봉은 CandleBuffer 에 보관 (최근 n개 조회가 O(n), 복사 없음)
+    - 새 1분봉은 현재 봉에 바로 합친다 (고가/저가/종가/거래량 갱신)
+    - 이미 받은 1분봉이 수정되거나 늦게 도착하면, 보관 중인 1분봉으로 부모 봉을 다시 집계
+      (1분봉은 전날 0시 이후만 보관 - 그보다 오래된 봉은 확정된 것으로 본다)
+    - 바뀐 봉은 flush() 때 btc_price_rollup 에 한 번에 upsert
+    """
+
+    def __init__(self, capacities: dict = ROLLUP_CAPACITY):
+        self.buffers = {tf: CandleBuffer(capacities[tf]) for tf in TIMEFRAMES}
+        self.loaded = False
+        self._minutes = {}        # ns → (open, high, low, close, volume)
+        self._last_minute = None
+        self._dirty = {}          # (timeframe, bucket ns) → 값
+        self._lock = threading.Lock()
+
+    def update(self, timestamp, open_: float, high: float, low: float, close: float, volume: float):
+        ts = _to_ns(timestamp)
+        values = (float(open_), float(high), float(low), float(close), float(volume))
+
+        with self._lock:
+            if self._minutes.get(ts) == values:
+                return
+            if self._last_minute is not None and ts < self._last_minute - DAY_NS - self._last_minute % DAY_NS:
+                return  # 보관 범위 밖의 아주 늦은 수정은 무시
+
+            is_new = self._last_minute is None or ts > self._last_minute
+            revised = ts in self._minutes
+            self._minutes[ts] = values
+
+            if is_new:
+                if self._last_minute is not None and ts // DAY_NS != self._last_minute // DAY_NS:
+                    self._prune(ts)
+                self._last_minute = ts
+                for tf, minutes in TIMEFRAMES.items():
+                    self._fold(tf, ts - ts % (minutes * MINUTE_NS), values)
+            else:
+                for tf, minutes in TIMEFRAMES.items():
+                    self._reaggregate(tf, ts - ts % (minutes * MINUTE_NS))
+                if not revised:
+                    log.info(f"⏪ 늦게 도착한 1분봉 반영: {_ns_to_str(ts)}")
+
+    def update_from_df(self, df: pd.DataFrame):
+        """timestamp 컬럼 또는 DatetimeIndex를 가진 OHLCV DataFrame을 순서대로 반영"""
+        if not self.loaded:
+            return
+        timestamps = df["timestamp"] if "timestamp" in df.columns else df.index
+        for ts, o, h, l, c, v in zip(timestamps, df["open"], df["high"], df["low"], df["close"], df["volume"]):
+            self.update(ts, o, h, l, c, v)
+
+    def _fold(self, tf: str, bucket: int, values: tuple):
+        buffer = self.buffers[tf]
+        if buffer.last_timestamp == bucket:
+            last = buffer.tail(1)
+            bar = (
+                last["open"][0],
+                max(last["high"][0], values[1]),
+                min(last["low"][0], values[2]),
+                values[3],
+                last["volume"][0] + values[4],
+            )
+        else:
+            bar = values
+        self._set(tf, bucket, bar)
+
+    def _reaggregate(self, tf: str, bucket: int):
+        span = TIMEFRAMES[tf] * MINUTE_NS
+        children = [self._minutes[t] for t in range(bucket, bucket + span, MINUTE_NS) if t in self._minutes]
+        if not children:
+            return
+        bar = (
+            children[0][0],
+            max(c[1] for c in children),
+            min(c[2] for c in children),
+            children[-1][3],
+            sum(c[4] for c in children),
+        )
+        self._set(tf, bucket, bar)
+
+    def _set(self, tf: str, bucket: int, bar: tuple):
+        self.buffers[tf].append(bucket, *bar)
+        self._dirty[(tf, bucket)] = bar
+
+    def _prune(self, ts: int):
+        """전날 0시 이전 1분봉 제거 (하루에 한 번)"""
+        keep_from = ts - ts % DAY_NS - DAY_NS
+        self._minutes = {t: v for t, v in self._minutes.items() if t >= keep_from}
+
+    def flush(self) -> int:
+        """바뀐 봉을 DB에 저장"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        rows = [(tf, _ns_to_str(bucket), *bar) for (tf, bucket), bar in sorted(dirty.items(), key=lambda x: x[0][1])]
+        written = upsert_rollups(rows)
+        if rows and not written:
+            # 실패한 봉은 다음 flush 때 다시 저장 (그 사이 더 새로 바뀐 값 우선)
+            with self._lock:
+                self._dirty = {**dirty, **self._dirty}
+        return written
+
+    def bars(self, timeframe: str, n: int = None) -> pd.DataFrame:
+        """최근 n개 봉 (오래된 순) - "1m" 은 1분봉 캔들 버퍼"""
+        if timeframe == "1m":
+            return get_candle_buffer().to_frame(n)
+        return self.buffers[timeframe].to_frame(n)
+
+    def load(self, rebuild: bool = False) -> bool:
+        """
+        DB에서 롤업 상태 복원
+        - 마지막 롤업 이후(또는 rebuild 시 전체) 1분봉을 다시 집계해 테이블을 최신으로 맞추고
+        - 타임프레임별 최근 봉과 전날 0시 이후 1분봉을 메모리에 적재
+        """
+        with db_session() as conn:
+            if not conn:
+                return False
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(_CREATE_TABLE)
+                    cursor.execute("SELECT timeframe, MAX(timestamp) FROM btc_price_rollup GROUP BY timeframe")
+                    latest = dict(cursor.fetchall())
+                    cursor.execute("SELECT MAX(timestamp) FROM btc_price_1min")
+                    last_minute = cursor.fetchone()[0]
+                    if last_minute is None:
+                        self.loaded = True
+                        return True
+
+                    keep_from = pd.Timestamp(last_minute).floor("D") - pd.Timedelta(days=1)
+                    if rebuild or any(latest.get(tf) is None for tf in TIMEFRAMES):
+                        since = None
+                    else:
+                        since = min([keep_from, *(pd.Timestamp(ts).floor("D") for ts in latest.values())])
+
+                    sql = "SELECT timestamp, open, high, low, close, volume FROM btc_price_1min"
+                    if since is not None:
+                        sql += " WHERE timestamp >= %s"
+                    cursor.execute(sql + " ORDER BY timestamp", () if since is None else (since.strftime("%Y-%m-%d %H:%M:%S"),))
+                    minutes = pd.DataFrame(list(cursor.fetchall()), columns=["timestamp", *COLUMNS])
+            except Exception as e:
+                log.error(f"[롤업 복원 실패] {e}")
+                return False
+
+            minutes = minutes.set_index(pd.to_datetime(minutes["timestamp"]))[list(COLUMNS)].astype("float64")
+            rows = []
+            for tf, span in TIMEFRAMES.items():
+                bars = resample_ohlcv(minutes, span)
+                timestamps = bars.index.strftime("%Y-%m-%d %H:%M:%S")
+                rows.extend((tf, ts, *values) for ts, values in zip(timestamps, bars.to_numpy().tolist()))
+            upsert_rollups(rows)
+
+            try:
+                with conn.cursor() as cursor:
+                    with self._lock:
+                        for tf, buffer in self.buffers.items():
+                            cursor.execute("""
+                                SELECT timestamp, open, high, low, close, volume FROM btc_price_rollup
+                                WHERE timeframe = %s
+                                ORDER BY timestamp DESC
+                                LIMIT %s
+                            """, (tf, buffer.capacity))
+                            for row in reversed(cursor.fetchall()):
+                                buffer.append(*row)
+
+                        recent = minutes[minutes.index >= keep_from]
+                        self._minutes = {
+                            _to_ns(ts): tuple(values) for ts, values in zip(recent.index, recent.to_numpy().tolist())
+                        }
+                        self._last_minute = _to_ns(recent.index[-1]) if len(recent) else None
+                        self.loaded = True
+            except Exception as e:
+                log.error(f"[롤업 적재 실패] {e}")
+                return False
+
+        log.info(f"🧱 롤업 적재 완료 ({', '.join(f'{tf}: {len(b)}개' for tf, b in self.buffers.items())}, "
+                 f"재집계 {len(rows)}개 봉)")
+        return True
+
+
+_engine = None
+
+
+def get_rollups() -> RollupEngine:
+    """프로세스 공용 롤업 엔진"""
+    global _engine
+    if _engine is None:
+        _engine = RollupEngine()
+    return _engine
+
+
+def get_bars(timeframe: str, n: int = None) -> pd.DataFrame:
+    """타임프레임별 최근 n개 봉 (1m / 5m / 15m / 1h / 1d)"""
+    return get_rollups().bars(timeframe, n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="btc_price_1min → btc_price_rollup 재집계")
+    parser.add_argument("--rebuild", action="store_true", help="1분봉 전체로 다시 집계")
+    args = parser.parse_args()
+    get_rollups().load(rebuild=args.rebuild)
@@ -0,0 +1,192 @@
+# app/scanner.py
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import pyupbit
+from app.db_1min_btc import closed_candles
+from app.db_markets import ensure_market_tables, insert_market_trade, load_market_positions, upsert_market_candles
+from app.indicator_stream import get_indicator_stream
+from app.strategy2 import DEFAULT_PARAMS, Strategy2Params, check_entry_signal, check_exit_signal
+from app.utils.discord import send_discord_message
+from app.utils.logger import get_logger
+from app.utils.rate_limit import RateLimiter
+from app.utils.retry import retry
+from app.utils.scheduler import CandleScheduler
+from app.utils.time_utils import get_kst_now
+from config import TRADE_AMOUNT, UPBIT_QUOTATION_RPS
+
+log = get_logger()
+
+WARM_UP_COUNT = 200  # 처음 조회 시 지표 스트림 초기화용 1분봉 개수
+TICK_COUNT = 3       # 이후 틱마다 조회할 1분봉 개수 (형성 중인 봉 + 방금 마감된 봉 + 그 전 봉 보정)
+
+
+def get_krw_markets() -> list:
+    """업비트 원화 마켓 전체 티커"""
+    return pyupbit.get_tickers(fiat="KRW")
+
+
+def _default_fetch(ticker: str, count: int):
+    return pyupbit.get_ohlcv(ticker, interval="minute1", count=count)
+
+
+class MarketScanner:
+    """
+    여러 마켓을 1분마다 동시에 조회해 strategy2 로 마켓별 진입/청산 판단 (모의매매)
+
+    - 시세 조회는 스레드 풀에서 겹쳐서 실행하고, 공용 토큰 버킷으로 업비트 요청 제한을 지킨다
+    - 모든 마켓의 1분봉은 price_1min(ticker, timestamp) 한 테이블에 한 번에 upsert
+    - 지표는 마켓별 IndicatorStream 으로 증분 계산 (틱당 마켓 하나에 O(1))
+    - 포지션은 마켓별로 메모리에 두고 market_trade_history 에 기록
+    - 마켓별 지표 / 판단 로그는 DEBUG, 스캔마다 요약 한 줄만 INFO
+    """
+
+    def __init__(self, tickers: list = None, trade_amount: float = TRADE_AMOUNT, workers: int = 8,
+                 rps: float = UPBIT_QUOTATION_RPS, params: Strategy2Params = DEFAULT_PARAMS, fetch=_default_fetch):
+        self.tickers = list(tickers) if tickers else get_krw_markets()
+        self.trade_amount = trade_amount
+        self.params = params
+        self.fetch = fetch
+        self.limiter = RateLimiter(rps)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scanner")
+        self.positions = {}   # ticker → (진입가, 수량)
+        self.last_loss = {}   # ticker → 큰 손실로 청산한 시각
+        self._warm = set()
+
+    def prepare(self):
+        ensure_market_tables()
+        self.positions = load_market_positions(is_simulated=True)
+        log.info(f"🛰️ 멀티 마켓 스캐너 준비: {len(self.tickers)}개 마켓, 보유 포지션 {len(self.positions)}개")
+
+    def _fetch_one(self, ticker: str):
+        count = TICK_COUNT if ticker in self._warm else WARM_UP_COUNT
+
+        @retry(max_retries=3, delay=1)
+        def fetch():
+            self.limiter.acquire()
+            df = self.fetch(ticker, count)
+            if df is None:
+                raise Exception(f"{ticker} 1분봉 응답 없음")
+            return df
+
+        return fetch()
+
+    def fetch_all(self) -> dict:
+        """모든 마켓 1분봉을 동시에 조회 (실패한 마켓은 이번 틱에서 제외)"""
+        futures = {self.executor.submit(self._fetch_one, ticker): ticker for ticker in self.tickers}
+        frames = {}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                frames[ticker] = future.result()
+            except Exception as e:
+                log.error(f"[{ticker} 1분봉 조회 실패] {e}")
+        return frames
+
+    def scan(self) -> dict:
+        """
+        한 틱: 조회 → 일괄 저장 → 지표 갱신 → 마켓별 판단
+        저장과 지표에는 마감된 봉만 쓰고 (봉 마감 직후라 마지막 봉은 몇 초치 거래뿐),
+        판단 가격은 형성 중인 봉의 현재가를 쓴다
+        """
+        started = time.monotonic()
+        frames = self.fetch_all()
+        fetched = time.monotonic()
+
+        now = get_kst_now()
+        closed = {ticker: closed_candles(df, now) for ticker, df in frames.items()}
+        upsert_market_candles(closed)
+        for ticker, df in closed.items():
+            get_indicator_stream(ticker).update_from_df(df)
+            self._warm.add(ticker)
+
+        trades = {"buy": [], "sell": []}
+        for ticker, df in frames.items():
+            if not df.empty:
+                action = self.evaluate(ticker, float(df["close"].iloc[-1]))
+                if action:
+                    trades[action].append(ticker)
+
+        elapsed = time.monotonic() - started
+        stats = {"markets": len(frames), "fetch_seconds": fetched - started, "total_seconds": elapsed,
+                 "buys": trades["buy"], "sells": trades["sell"], "positions": len(self.positions)}
+        log.info(f"🛰️ {len(frames)}/{len(self.tickers)}개 마켓 스캔 완료 "
+                 f"(조회 {stats['fetch_seconds']:.1f}초, 전체 {elapsed:.1f}초) "
+                 f"매수 {len(trades['buy'])} / 매도 {len(trades['sell'])} / 보유 {len(self.positions)}"
+                 + (f" - 매수: {', '.join(trades['buy'])}" if trades["buy"] else "")
+                 + (f" - 매도: {', '.join(trades['sell'])}" if trades["sell"] else ""),
+                 extra={"fields": stats})
+        return stats
+
+    def _cooling_down(self, ticker: str) -> bool:
+        lost_at = self.last_loss.get(ticker)
+        return lost_at is not None and get_kst_now() - lost_at < timedelta(minutes=self.params.loss_cooldown_minutes)
+
+    def evaluate(self, ticker: str, price: float):
+        """마켓 하나 판단 → 실행한 거래 종류 ("buy" / "sell") 또는 None"""
+        position = self.positions.get(ticker)
+        if position is None:
+            if self._cooling_down(ticker):
+                return None
+            should_enter, entry_ratio = check_entry_signal(self.params, ticker=ticker, log_level=logging.DEBUG)
+            if should_enter:
+                amount = self.trade_amount * entry_ratio / price
+                self._record(ticker, "buy", price, amount, None)
+                self.positions[ticker] = (price, amount)
+                return "buy"
+        else:
+            entry_price, amount = position
+            if check_exit_signal(entry_price, self.params, ticker=ticker, log_level=logging.DEBUG):
+                fee_rate = self.params.fee_rate
+                roi = (price * (1 - fee_rate)) / (entry_price * (1 + fee_rate)) - 1
+                self._record(ticker, "sell", price, amount, roi)
+                del self.positions[ticker]
+                if roi < self.params.loss_threshold:
+                    self.last_loss[ticker] = get_kst_now()
+                return "sell"
+        return None
+
+    def _record(self, ticker: str, trade_type: str, price: float, amount: float, roi):
+        executed_at = get_kst_now().strftime("%Y-%m-%d %H:%M:%S")
+        insert_market_trade(ticker, trade_type, price, amount, roi, executed_at, True)
+        if trade_type == "buy":
+            log.debug(f"🟢 [{ticker}] 모의 매수 - 가격: {price:,.4f}, 수량: {amount:.8f}")
+            send_discord_message(f"🟢 [스캐너] {ticker} 매수 - {price:,.4f}원, 수량: {amount:.8f}")
+        else:
+            log.debug(f"🔴 [{ticker}] 모의 매도 - 가격: {price:,.4f}, 수익률: {roi:.2%}")
+            send_discord_message(f"🔴 [스캐너] {ticker} 매도 - {price:,.4f}원, 수익률: {roi:.2%}")
+
+    def run(self, scheduler: CandleScheduler = None):
+        """봉 마감 시각에 맞춰 스캔 반복 (스캔 시간만큼 밀리지 않음, 오류가 나도 다음 봉 마감에 재시도)"""
+        self.prepare()
+        send_discord_message(f"🛰️ 멀티 마켓 스캐너 시작 ({len(self.tickers)}개 마켓)")
+        scheduler = scheduler or CandleScheduler()
+        for tick in scheduler:
+            try:
+                self.scan()
+            except Exception as e:
+                log.error(f"[스캐너 루프 오류] {e}")
+                send_discord_message(f"❌ 스캐너 루프 오류 발생: {e}")
+            finally:
+                scheduler.done(tick)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="멀티 마켓 strategy2 스캐너 (모의매매)")
+    parser.add_argument("--tickers", help="쉼표로 구분한 티커 목록 (기본: 원화 마켓 전체)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=UPBIT_QUOTATION_RPS)
+    parser.add_argument("--once", action="store_true", help="한 번만 스캔하고 종료")
+    args = parser.parse_args()
+
+    tickers = args.tickers.split(",") if args.tickers else None
+    scanner = MarketScanner(tickers, workers=args.workers, rps=args.rps)
+    if args.once:
+        scanner.prepare()
+        scanner.scan()
+    else:
+        scanner.run()
@@ -1,7 +1,8 @@
 # app/strategy.py
 
 import pandas as pd
-from app.utils.db_connect import get_connection
+from app.candle_buffer import get_candle_buffer
+from app.utils.db_connect import db_session
 from app.utils.logger import get_logger
 from app.utils.time_utils import get_kst_now
 
@@ -20,60 +21,61 @@ def calculate_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
     return rsi
 
 def fetch_recent_data(limit: int = 20) -> pd.DataFrame:
-    conn = get_connection()
-    if not conn:
-        return pd.DataFrame()
-
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT timestamp, open, high, low, close, volume
-                FROM btc_price_1min
-                ORDER BY timestamp DESC
-                LIMIT %s
-            """, (limit,))
-            rows = cursor.fetchall()
-
-        df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        return df
-    except Exception as e:
-        log.error(f"[데이터 불러오기 실패] {e}")
-        return pd.DataFrame()
-    finally:
-        conn.close()
+    # 메모리 캔들 버퍼가 적재돼 있으면 SQL 없이 버퍼에서 읽음
+    buffer = get_candle_buffer()
+    if buffer.seeded:
+        return buffer.to_frame(limit)
+
+    with db_session() as conn:
+        if not conn:
+            return pd.DataFrame()
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT timestamp, open, high, low, close, volume
+                    FROM btc_price_1min
+                    ORDER BY timestamp DESC
+                    LIMIT %s
+                """, (limit,))
+                rows = cursor.fetchall()
+
+            df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+            df = df.sort_values("timestamp").reset_index(drop=True)
+            return df
+        except Exception as e:
+            log.error(f"[데이터 불러오기 실패] {e}")
+            return pd.DataFrame()
 
 def recent_loss_within(minutes: int = 10) -> bool:
     """
     최근 손실 매매가 설정 시간 내에 있었는지 판단
     """
-    conn = get_connection()
-    if not conn:
-        return False
-
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT roi, executed_at FROM trade_history
-                WHERE trade_type = 'buy'
-                ORDER BY executed_at DESC
-                LIMIT 1
-            """)
-            row = cursor.fetchone()
-            if not row:
-                return False
-
-            roi, executed_at = row
-            if roi is not None and roi < 0:
-                delta = get_kst_now() - executed_at
-                if delta.total_seconds() < minutes * 60:
-                    return True
-        return False
-    except Exception as e:
-        log.error(f"[최근 손실 조회 실패] {e}")
-        return False
-    finally:
-        conn.close()
+    with db_session() as conn:
+        if not conn:
+            return False
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT roi, executed_at FROM trade_history
+                    WHERE trade_type = 'buy'
+                    ORDER BY executed_at DESC
+                    LIMIT 1
+                """)
+                row = cursor.fetchone()
+                if not row:
+                    return False
+
+                roi, executed_at = row
+                if roi is not None and roi < 0:
+                    delta = get_kst_now() - executed_at
+                    if delta.total_seconds() < minutes * 60:
+                        return True
+            return False
+        except Exception as e:
+            log.error(f"[최근 손실 조회 실패] {e}")
+            return False
 
 def check_entry_signal() -> bool:
     # 최근 손실 후 일정 시간 내면 진입 제한
@@ -1,11 +1,67 @@
+import logging
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
-from app.utils.db_connect import get_connection
+from app.indicator_stream import get_indicator_stream
+from app.candle_buffer import get_candle_buffer
+from app.utils.db_connect import db_session
 from app.utils.logger import get_logger
 from app.utils.time_utils import get_kst_now
+from config import COIN_TICKER
 
 log = get_logger()
 
+
+@dataclass(frozen=True)
+class Strategy2Params:
+    """
+    strategy2 진입/청산 임계값 모음
+    기본값은 기존 하드코딩 값과 동일하다
+    """
+    # 1. RSI 과매도 구간 (30점 / 20점 / 10점)
+    rsi_strong: float = 30.0
+    rsi_medium: float = 40.0
+    rsi_weak: float = 45.0
+
+    # 2. 볼린저 밴드 (표준편차 계수, 하단 근접 판정 배율)
+    bb_std_dev: float = 2.0
+    bb_near: float = 1.01
+
+    # 6. 거래량 비율 (10점 / 5점)
+    volume_ratio_high: float = 1.5
+    volume_ratio_mid: float = 1.2
+
+    # 변동성 감점 (임계값, 감점)
+    volatility_high: float = 0.02
+    volatility_high_penalty: int = 20
+    volatility_mid: float = 0.015
+    volatility_mid_penalty: int = 10
+
+    # 점수 구간 → 진입 비율
+    tier_very_strong: int = 70
+    tier_strong: int = 55
+    tier_medium: int = 40
+    tier_weak: int = 30
+    ratio_very_strong: float = 1.0
+    ratio_strong: float = 0.7
+    ratio_medium: float = 0.5
+    ratio_weak: float = 0.3
+
+    # 청산 조건 (수익률은 % 단위)
+    take_profit_pct: float = 1.5
+    stop_loss_pct: float = -0.7
+    exit_rsi: float = 70.0
+
+    # 큰 손실 이후 진입 제한
+    loss_threshold: float = -0.02
+    loss_cooldown_minutes: int = 5
+
+    fee_rate: float = 0.0005  # 업비트 수수료 0.05%
+
+
+DEFAULT_PARAMS = Strategy2Params()
+
+
 def calculate_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
     RSI(상대강도지수) 계산 함수
@@ -75,128 +131,167 @@ def fetch_recent_data(limit: int = 60) -> pd.DataFrame:
     Returns:
         비트코인 가격 데이터가 담긴 DataFrame
     """
-    conn = get_connection()
-    if not conn:
-        log.error("DB 연결 실패")
-        return pd.DataFrame()
-
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT timestamp, open, high, low, close, volume
-                FROM btc_price_1min
-                ORDER BY timestamp DESC
-                LIMIT %s
-            """, (limit,))
-            rows = cursor.fetchall()
-
-        df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        return df
-    except Exception as e:
-        log.error(f"[데이터 불러오기 실패] {e}")
-        return pd.DataFrame()
-    finally:
-        conn.close()
-
-def recent_loss_within(minutes: int = 5) -> bool:
+    # 메모리 캔들 버퍼가 적재돼 있으면 SQL 없이 버퍼에서 읽음
+    buffer = get_candle_buffer()
+    if buffer.seeded:
+        return buffer.to_frame(limit)
+
+    with db_session() as conn:
+        if not conn:
+            log.error("DB 연결 실패")
+            return pd.DataFrame()
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT timestamp, open, high, low, close, volume
+                    FROM btc_price_1min
+                    ORDER BY timestamp DESC
+                    LIMIT %s
+                """, (limit,))
+                rows = cursor.fetchall()
+
+            df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+            df = df.sort_values("timestamp").reset_index(drop=True)
+            return df
+        except Exception as e:
+            log.error(f"[데이터 불러오기 실패] {e}")
+            return pd.DataFrame()
+
+def recent_loss_within(minutes: int = 5, loss_threshold: float = -0.02) -> bool:
     """
     최근 큰 손실 매매가 설정 시간 내에 있었는지 확인
     
     Args:
         minutes: 확인할 시간 범위(분) (기본값: 5)
+        loss_threshold: 큰 손실로 보는 수익률 (기본값: -0.02)
         
     Returns:
         큰 손실 매매가 있었으면 True, 아니면 False
     """
-    conn = get_connection()
-    if not conn:
-        return False
+    with db_session() as conn:
+        if not conn:
+            return False
 
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT roi, executed_at FROM trade_history
-                WHERE trade_type = 'sell'
-                AND roi IS NOT NULL
-                ORDER BY executed_at DESC
-                LIMIT 1
-            """)
-            row = cursor.fetchone()
-            if not row:
-                return False
-
-            roi, executed_at = row
-            if roi is not None and roi < -0.02:  # 손실이 2% 이상일 때만 제한 (소수점으로 변경)
-                delta = get_kst_now() - executed_at
-                if delta.total_seconds() < minutes * 60:
-                    return True
-        return False
-    except Exception as e:
-        log.error(f"[최근 손실 조회 실패] {e}")
-        return False
-    finally:
-        conn.close()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT roi, executed_at FROM trade_history
+                    WHERE trade_type = 'sell'
+                    AND roi IS NOT NULL
+                    ORDER BY executed_at DESC
+                    LIMIT 1
+                """)
+                row = cursor.fetchone()
+                if not row:
+                    return False
 
-def check_entry_signal() -> tuple:
+                roi, executed_at = row
+                if roi is not None and roi < loss_threshold:  # 손실이 기준(기본 2%) 이상일 때만 제한
+                    delta = get_kst_now().replace(tzinfo=None) - executed_at
+                    if delta.total_seconds() < minutes * 60:
+                        return True
+            return False
+        except Exception as e:
+            log.error(f"[최근 손실 조회 실패] {e}")
+            return False
+
+def warm_up_indicator_stream(limit: int = 60):
+    """
+    시작 시 DB의 최근 1분봉으로 지표 스트림 초기화
+    이후에는 save_1min_btc_to_db가 새 캔들만 스트림에 반영한다
+
+    Args:
+        limit: 초기화에 사용할 데이터 개수 (기본값: 60)
+    """
+    df = fetch_recent_data(limit)
+    if df.empty:
+        log.warning("⛔ 지표 스트림 초기화 데이터 없음 → DB 계산으로 대체")
+        return
+
+    stream = get_indicator_stream()
+    stream.update_from_df(df)
+    log.info(f"📐 지표 스트림 초기화 완료 ({stream.count}개 캔들)")
+
+def check_entry_signal(params: Strategy2Params = DEFAULT_PARAMS, ticker: str = COIN_TICKER,
+                       in_cooldown: bool = None, log_level: int = logging.INFO) -> tuple:
     """
     매수 신호 확인 및 추천 진입 비율 계산
     
+    Args:
+        params: 진입 임계값 (기본값: DEFAULT_PARAMS)
+        ticker: 평가할 마켓 (기본 마켓 외에는 지표 스트림만 사용하고,
+                손실 후 진입 제한은 호출하는 쪽에서 마켓별로 판단)
+        in_cooldown: 미리 조회한 손실 후 진입 제한 여부 (None 이면 여기서 조회)
+        log_level: 지표 / 판단 로그 레벨 (여러 마켓을 한꺼번에 보는 스캐너는 DEBUG)
+
     Returns:
         (매수 신호 여부, 추천 진입 비율) 튜플
     """
     # 최근 손실 후 일정 시간 내면 진입 제한
-    if recent_loss_within(5):
-        log.info("🚫 최근 큰 손실(-2% 이상) 매매 이후 5분 내 → 진입 제한")
+    if in_cooldown is None:
+        in_cooldown = ticker == COIN_TICKER and recent_loss_within(params.loss_cooldown_minutes, params.loss_threshold)
+    if in_cooldown:
+        log.log(log_level, f"🚫 최근 큰 손실({params.loss_threshold:.0%} 이상) 매매 이후 {params.loss_cooldown_minutes}분 내 → 진입 제한")
         return False, 0
 
-    df = fetch_recent_data(60)
-    if df.empty or len(df) < 30:
-        log.warning("⛔ 데이터 부족으로 매수 신호 계산 불가")
+    stream = get_indicator_stream(ticker)
+    if stream.is_ready(30):
+        latest, prev, base = stream.latest(), stream.previous(1), stream.previous(5)
+        lower_band = latest['middle_band'] - latest['bb_std'] * params.bb_std_dev
+    elif ticker != COIN_TICKER:
+        log.warning(f"⛔ {ticker} 데이터 부족으로 매수 신호 계산 불가")
         return False, 0
+    else:
+        df = fetch_recent_data(60)
+        if df.empty or len(df) < 30:
+            log.warning("⛔ 데이터 부족으로 매수 신호 계산 불가")
+            return False, 0
+
+        # 기술적 지표 계산
+        df["ma5"] = df["close"].rolling(window=5).mean()
+        df["ma10"] = df["close"].rolling(window=10).mean()
+        df["ma20"] = df["close"].rolling(window=20).mean()
+        df["rsi"] = calculate_rsi(df, period=14)
+        df["lower_band"], df["middle_band"], df["upper_band"] = calculate_bollinger_bands(df, std_dev=params.bb_std_dev)
+        df["macd"], df["signal"], df["histogram"] = calculate_macd(df)
+
+        # 변동성 및 거래량 지표
+        df["volatility"] = (df["high"] - df["low"]) / df["low"]
+        df["volume_ratio"] = df["volume"] / df["volume"].rolling(10).mean()
+
+        # 과거 추세 분석
+        df["price_change"] = df["close"].pct_change()
+        df["trend"] = df["price_change"].rolling(5).sum()
+
+        # 가장 최근 데이터
+        latest = df.iloc[-1]
+        prev = df.iloc[-2]
+        base = df.iloc[-6]
+        lower_band = latest['lower_band']
 
-    # 기술적 지표 계산
-    df["ma5"] = df["close"].rolling(window=5).mean()
-    df["ma10"] = df["close"].rolling(window=10).mean()
-    df["ma20"] = df["close"].rolling(window=20).mean()
-    df["rsi"] = calculate_rsi(df, period=14)
-    df["lower_band"], df["middle_band"], df["upper_band"] = calculate_bollinger_bands(df)
-    df["macd"], df["signal"], df["histogram"] = calculate_macd(df)
-    
-    # 변동성 및 거래량 지표
-    df["volatility"] = (df["high"] - df["low"]) / df["low"]
-    df["volume_ratio"] = df["volume"] / df["volume"].rolling(10).mean()
-    
-    # 과거 추세 분석
-    df["price_change"] = df["close"].pct_change()
-    df["trend"] = df["price_change"].rolling(5).sum()
-    
-    # 가장 최근 데이터
-    latest = df.iloc[-1]
-    prev = df.iloc[-2]
-    
     # 로그 출력 (향상된 분석 정보)
-    log.info(f"🔍 RSI: {latest['rsi']:.2f}, MACD: {latest['macd']:.2f}, Signal: {latest['signal']:.2f}")
-    log.info(f"🔍 MA5: {latest['ma5']:.2f}, MA10: {latest['ma10']:.2f}, MA20: {latest['ma20']:.2f}")
-    log.info(f"🔍 볼린저밴드: Lower={latest['lower_band']:.2f}, Middle={latest['middle_band']:.2f}")
-    log.info(f"🔍 가격변화: {latest['price_change']*100:.2f}%, 5분 추세: {latest['trend']*100:.2f}%")
-    log.info(f"🔍 거래량비율: {latest['volume_ratio']:.2f}, 변동성: {latest['volatility']:.4f}")
+    log.log(log_level, f"🔍 RSI: {latest['rsi']:.2f}, MACD: {latest['macd']:.2f}, Signal: {latest['signal']:.2f}")
+    log.log(log_level, f"🔍 MA5: {latest['ma5']:.2f}, MA10: {latest['ma10']:.2f}, MA20: {latest['ma20']:.2f}")
+    log.log(log_level, f"🔍 볼린저밴드: Lower={lower_band:.2f}, Middle={latest['middle_band']:.2f}")
+    log.log(log_level, f"🔍 가격변화: {latest['price_change']*100:.2f}%, 5분 추세: {latest['trend']*100:.2f}%")
+    log.log(log_level, f"🔍 거래량비율: {latest['volume_ratio']:.2f}, 변동성: {latest['volatility']:.4f}")
 
     # 신호 강도 점수 시스템 (100점 만점)
     signal_strength = 0
     
     # 1. RSI 기반 과매도 조건 (최대 30점)
-    if latest['rsi'] < 30:
+    if latest['rsi'] < params.rsi_strong:
         signal_strength += 30
-    elif latest['rsi'] < 40:
+    elif latest['rsi'] < params.rsi_medium:
         signal_strength += 20
-    elif latest['rsi'] < 45:
+    elif latest['rsi'] < params.rsi_weak:
         signal_strength += 10
     
     # 2. 볼린저 밴드 기반 (최대 20점)
-    if latest['close'] < latest['lower_band']:
+    if latest['close'] < lower_band:
         signal_strength += 20
-    elif latest['close'] < latest['lower_band'] * 1.01:
+    elif latest['close'] < lower_band * params.bb_near:
         signal_strength += 15
     
     # 3. MACD 기반 (최대 15점)
@@ -212,91 +307,129 @@ def check_entry_signal() -> tuple:
         signal_strength += 10
     
     # 5. 추세 전환 신호 (최대 10점)
-    if latest['trend'] > 0 and df.iloc[-6]['trend'] < 0:
+    if latest['trend'] > 0 and base['trend'] < 0:
         signal_strength += 10
     
     # 6. 거래량 분석 (최대 10점)
-    if latest['volume_ratio'] > 1.5:
+    if latest['volume_ratio'] > params.volume_ratio_high:
         signal_strength += 10
-    elif latest['volume_ratio'] > 1.2:
+    elif latest['volume_ratio'] > params.volume_ratio_mid:
         signal_strength += 5
     
     # 변동성 필터 - 과도한 변동성 시 감점
-    if latest['volatility'] > 0.02:
-        signal_strength -= 20
-    elif latest['volatility'] > 0.015:
-        signal_strength -= 10
+    if latest['volatility'] > params.volatility_high:
+        signal_strength -= params.volatility_high_penalty
+    elif latest['volatility'] > params.volatility_mid:
+        signal_strength -= params.volatility_mid_penalty
     
+    # 구조화 로그용 틱 지표
+    tick = {
+        "event": "entry_check",
+        "ticker": ticker,
+        "close": latest['close'],
+        "rsi": latest['rsi'],
+        "macd": latest['macd'],
+        "signal": latest['signal'],
+        "histogram": latest['histogram'],
+        "ma5": latest['ma5'],
+        "ma10": latest['ma10'],
+        "ma20": latest['ma20'],
+        "lower_band": lower_band,
+        "volume_ratio": latest['volume_ratio'],
+        "volatility": latest['volatility'],
+        "trend": latest['trend'],
+        "score": signal_strength,
+    }
+
     # 신호 강도에 따른 진입 비율 결정 (리스크 관리)
     entry_ratio = 0
-    if signal_strength >= 70:  # 매우 강한 신호
-        entry_ratio = 1.0  # 100% 진입
-        log.info(f"✅✅✅ 매우 강한 매수 신호 (점수: {signal_strength}) → 100% 진입 권장")
+    if signal_strength >= params.tier_very_strong:  # 매우 강한 신호
+        entry_ratio = params.ratio_very_strong
+        log.log(log_level, f"✅✅✅ 매우 강한 매수 신호 (점수: {signal_strength}) → {entry_ratio:.0%} 진입 권장", extra={"fields": {**tick, "entry_ratio": entry_ratio}})
         return True, entry_ratio
-    elif signal_strength >= 55:  # 강한 신호
-        entry_ratio = 0.7  # 70% 진입
-        log.info(f"✅✅ 강한 매수 신호 (점수: {signal_strength}) → 70% 진입 권장")
+    elif signal_strength >= params.tier_strong:  # 강한 신호
+        entry_ratio = params.ratio_strong
+        log.log(log_level, f"✅✅ 강한 매수 신호 (점수: {signal_strength}) → {entry_ratio:.0%} 진입 권장", extra={"fields": {**tick, "entry_ratio": entry_ratio}})
         return True, entry_ratio
-    elif signal_strength >= 40:  # 중간 신호
-        entry_ratio = 0.5  # 50% 진입
-        log.info(f"✅ 적정 매수 신호 (점수: {signal_strength}) → 50% 진입 권장")
+    elif signal_strength >= params.tier_medium:  # 중간 신호
+        entry_ratio = params.ratio_medium
+        log.log(log_level, f"✅ 적정 매수 신호 (점수: {signal_strength}) → {entry_ratio:.0%} 진입 권장", extra={"fields": {**tick, "entry_ratio": entry_ratio}})
         return True, entry_ratio
-    elif signal_strength >= 30:  # 약한 신호
-        entry_ratio = 0.3  # 30% 진입
-        log.info(f"⚠️ 약한 매수 신호 (점수: {signal_strength}) → 30% 진입 권장")
+    elif signal_strength >= params.tier_weak:  # 약한 신호
+        entry_ratio = params.ratio_weak
+        log.log(log_level, f"⚠️ 약한 매수 신호 (점수: {signal_strength}) → {entry_ratio:.0%} 진입 권장", extra={"fields": {**tick, "entry_ratio": entry_ratio}})
         return True, entry_ratio
     else:
-        log.info(f"❌ 매수 조건 미충족 (점수: {signal_strength})")
+        log.log(log_level, f"❌ 매수 조건 미충족 (점수: {signal_strength})", extra={"fields": {**tick, "entry_ratio": 0}})
         return False, 0
 
-def check_exit_signal(entry_price: float) -> bool:
+def check_exit_signal(entry_price: float, params: Strategy2Params = DEFAULT_PARAMS,
+                      ticker: str = COIN_TICKER, log_level: int = logging.INFO) -> bool:
     """
     매도 신호 확인 함수
     
     Args:
         entry_price: 진입 가격
+        params: 청산 임계값 (기본값: DEFAULT_PARAMS)
+        ticker: 평가할 마켓 (기본 마켓 외에는 지표 스트림만 사용)
+        log_level: 지표 / 판단 로그 레벨 (여러 마켓을 한꺼번에 보는 스캐너는 DEBUG)
         
     Returns:
         매도 신호가 있으면 True, 아니면 False
     """
-    df = fetch_recent_data()
-    if df.empty or len(df) < 20:
+    stream = get_indicator_stream(ticker)
+    if stream.is_ready(20):
+        latest, prev = stream.latest(), stream.previous(1)
+    elif ticker != COIN_TICKER:
         return False
-    
-    # 기술적 지표 계산
-    df["rsi"] = calculate_rsi(df)
-    df["ma5"] = df["close"].rolling(window=5).mean()
-    df["ma10"] = df["close"].rolling(window=10).mean()
-    
-    latest = df.iloc[-1]
-    prev = df.iloc[-2]
+    else:
+        df = fetch_recent_data()
+        if df.empty or len(df) < 20:
+            return False
+
+        # 기술적 지표 계산
+        df["rsi"] = calculate_rsi(df)
+        df["ma5"] = df["close"].rolling(window=5).mean()
+        df["ma10"] = df["close"].rolling(window=10).mean()
+
+        latest = df.iloc[-1]
+        prev = df.iloc[-2]
     
     # 현재 수익률 계산 (수수료 0.05% 고려)
-    fee_rate = 0.0005  # 업비트 수수료 0.05%
+    fee_rate = params.fee_rate
     current_roi = ((latest['close'] * (1 - fee_rate)) / (entry_price * (1 + fee_rate)) - 1) * 100
     
     # 로그 출력
-    log.info(f"🔍 현재 수익률: {current_roi:.2f}%, RSI: {latest['rsi']:.2f}")
+    log.log(log_level, f"🔍 현재 수익률: {current_roi:.2f}%, RSI: {latest['rsi']:.2f}", extra={"fields": {
+        "event": "exit_check",
+        "ticker": ticker,
+        "close": latest['close'],
+        "entry_price": entry_price,
+        "roi_pct": current_roi,
+        "rsi": latest['rsi'],
+        "ma5": latest['ma5'],
+        "ma10": latest['ma10'],
+    }})
     
     # 매도 조건
-    # 1. 목표 수익률 도달 (1.5% 이상)
-    if current_roi >= 1.5:
-        log.info(f"💰 목표 수익률 달성 ({current_roi:.2f}%) → 매도 신호")
+    # 1. 목표 수익률 도달 (기본 1.5% 이상)
+    if current_roi >= params.take_profit_pct:
+        log.log(log_level, f"💰 목표 수익률 달성 ({current_roi:.2f}%) → 매도 신호")
         return True
     
     # 2. RSI 과매수 구간 진입
-    if latest['rsi'] > 70:
-        log.info(f"📈 RSI 과매수 구간 ({latest['rsi']:.2f}) → 매도 신호")
+    if latest['rsi'] > params.exit_rsi:
+        log.log(log_level, f"📈 RSI 과매수 구간 ({latest['rsi']:.2f}) → 매도 신호")
         return True
     
     # 3. 이동평균선 하향 돌파
     if latest['ma5'] < latest['ma10'] and prev['ma5'] >= prev['ma10']:
-        log.info("📉 단기 이동평균선 하향 돌파 → 매도 신호")
+        log.log(log_level, "📉 단기 이동평균선 하향 돌파 → 매도 신호")
         return True
     
-    # 4. 손절 조건 (0.7% 이상 손실)
-    if current_roi <= -0.7:
-        log.info(f"🛑 손절 라인 도달 ({current_roi:.2f}%) → 매도 신호")
+    # 4. 손절 조건 (기본 0.7% 이상 손실)
+    if current_roi <= params.stop_loss_pct:
+        log.log(log_level, f"🛑 손절 라인 도달 ({current_roi:.2f}%) → 매도 신호")
         return True
     
     return False
\ No newline at end of file
@@ -0,0 +1,167 @@
+# app/sweep.py
+
+import argparse
+import itertools
+import os
+import random
+from dataclasses import asdict, fields, replace
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+from app.backtest import compute_strategy2_columns, load_history, simulate_strategy2, summarize, timestamps_ns
+from app.strategy2 import DEFAULT_PARAMS, Strategy2Params
+from config import INITIAL_SEED, TRADE_AMOUNT
+
+# 워커 프로세스 전역 (공유 메모리 위의 읽기 전용 지표 컬럼)
+_worker = {}
+
+
+def grid_params(grid: dict, base: Strategy2Params = DEFAULT_PARAMS) -> list:
+    """
+    격자 탐색용 파라미터 조합
+
+    Args:
+        grid: 필드명 → 후보 값 리스트
+        base: 나머지 필드의 기본값
+
+    Returns:
+        Strategy2Params 리스트
+    """
+    names = list(grid)
+    return [replace(base, **dict(zip(names, values))) for values in itertools.product(*grid.values())]
+
+
+def random_params(space: dict, n: int, seed: int = None, base: Strategy2Params = DEFAULT_PARAMS) -> list:
+    """
+    무작위 탐색용 파라미터 조합
+
+    Args:
+        space: 필드명 → 후보 리스트 또는 (최소, 최대) 튜플
+        n: 뽑을 조합 수
+        seed: 난수 시드
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(n):
+        values = {}
+        for name, candidates in space.items():
+            if isinstance(candidates, tuple):
+                low, high = candidates
+                if isinstance(low, int) and isinstance(high, int):
+                    values[name] = rng.randint(low, high)
+                else:
+                    values[name] = rng.uniform(low, high)
+            else:
+                values[name] = rng.choice(candidates)
+        result.append(replace(base, **values))
+    return result
+
+
+def _attach(cols_name: str, ts_name: str, names: list, n: int, trade_amount: float, initial_seed: float):
+    """워커 초기화 - 부모가 만든 공유 메모리를 복사 없이 붙임"""
+    cols_shm = shared_memory.SharedMemory(name=cols_name)
+    ts_shm = shared_memory.SharedMemory(name=ts_name)
+    matrix = np.ndarray((len(names), n), dtype=np.float64, buffer=cols_shm.buf)
+    matrix.flags.writeable = False
+    timestamps = np.ndarray((n,), dtype=np.int64, buffer=ts_shm.buf)
+    timestamps.flags.writeable = False
+
+    _worker.update({
+        "shm": (cols_shm, ts_shm),
+        "cols": {name: matrix[i] for i, name in enumerate(names)},
+        "timestamps": timestamps,
+        "trade_amount": trade_amount,
+        "initial_seed": initial_seed,
+    })
+
+
+def _evaluate(params: Strategy2Params) -> dict:
+    trades, equity = simulate_strategy2(
+        _worker["cols"], _worker["timestamps"], params, _worker["trade_amount"], _worker["initial_seed"]
+    )
+    result = asdict(params)
+    result.update(summarize(trades, equity, _worker["initial_seed"]))
+    return result
+
+
+def run_sweep(df: pd.DataFrame, param_sets: list, processes: int = None,
+              trade_amount: float = TRADE_AMOUNT, initial_seed: float = INITIAL_SEED) -> pd.DataFrame:
+    """
+    파라미터 조합들을 전체 CPU 코어에 나눠 백테스트
+
+    지표 컬럼은 부모 프로세스에서 한 번만 계산해 공유 메모리에 올리고,
+    워커들은 읽기 전용 view로 받아 조합마다 점수/시뮬레이션만 수행한다.
+
+    Returns:
+        수익률 내림차순(같으면 낙폭이 작은 순) 결과 DataFrame
+    """
+    if df.empty:
+        raise ValueError("스윕할 데이터가 없습니다")
+
+    cols = compute_strategy2_columns(df)
+    names = list(cols)
+    timestamps = timestamps_ns(df)
+    n = len(timestamps)
+
+    cols_shm = shared_memory.SharedMemory(create=True, size=max(len(names) * n * 8, 1))
+    ts_shm = shared_memory.SharedMemory(create=True, size=max(n * 8, 1))
+    try:
+        matrix = np.ndarray((len(names), n), dtype=np.float64, buffer=cols_shm.buf)
+        for i, name in enumerate(names):
+            matrix[i] = cols[name]
+        np.ndarray((n,), dtype=np.int64, buffer=ts_shm.buf)[:] = timestamps
+
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(param_sets) // (processes * 4))
+        initargs = (cols_shm.name, ts_shm.name, names, n, trade_amount, initial_seed)
+        with Pool(processes, initializer=_attach, initargs=initargs) as pool:
+            rows = pool.map(_evaluate, param_sets, chunksize=chunksize)
+    finally:
+        cols_shm.close()
+        cols_shm.unlink()
+        ts_shm.close()
+        ts_shm.unlink()
+
+    result = pd.DataFrame(rows)
+    # 조합 간에 값이 같은 파라미터 컬럼은 표에서 제외
+    varied = [f.name for f in fields(Strategy2Params) if result[f.name].nunique() > 1]
+    metrics = ["total_return", "max_drawdown", "round_trips", "trades", "win_rate", "final_equity"]
+    result = result[varied + metrics]
+    return result.sort_values(["total_return", "max_drawdown"], ascending=False).reset_index(drop=True)
+
+
+def _parse_space(items: list) -> dict:
+    """'rsi_strong=25,30,35' → {'rsi_strong': [25, 30, 35]} (기본값 타입으로 변환)"""
+    space = {}
+    for item in items or []:
+        name, values = item.split("=", 1)
+        cast = type(getattr(DEFAULT_PARAMS, name))
+        space[name] = [cast(v) for v in values.split(",")]
+    return space
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="strategy2 임계값 파라미터 스윕")
+    parser.add_argument("--param", action="append", help="필드=값1,값2,... (여러 번 지정)")
+    parser.add_argument("--random", type=int, help="격자 대신 N개 무작위 조합 탐색")
+    parser.add_argument("--seed", type=int, help="무작위 탐색 난수 시드")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--source", default="db", choices=["db", "store"], help="이력 출처 (MySQL / 로컬 저장소)")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="결과 CSV 저장 경로")
+    args = parser.parse_args()
+
+    space = _parse_space(args.param)
+    if args.random:
+        param_sets = random_params(space, args.random, args.seed)
+    else:
+        param_sets = grid_params(space)
+
+    history = load_history(args.start, args.end, args.source)
+    table = run_sweep(history, param_sets, args.processes)
+    print(table.head(args.top).to_string())
+    if args.out:
+        table.to_csv(args.out, index=False)
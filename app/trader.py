@@ -1,16 +1,51 @@
 # app/trader.py
 
-import pyupbit
-from config import LIVE_MODE, UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY, COIN_TICKER, TRADE_AMOUNT
-from app.utils.db_connect import get_connection
+import threading
+from config import LIVE_MODE, COIN_TICKER, TRADE_AMOUNT, UPBIT_FEE_RATE
+from app.exchange import Fill, get_executor
+from app.position_manager import ensure_fill_columns, positions
 from app.utils.logger import get_logger
-from app.utils.time_utils import get_kst_now
 from app.utils.discord import send_discord_message
-from app.utils.seed_tracker import get_seed, decrease_seed, increase_seed, get_holding_amount
+from app.utils.metrics import errors
+from app.utils.seed_tracker import get_seed, decrease_seed, increase_seed
 
 
 log = get_logger()
 
+_executor_lock = threading.Lock()
+_executor_ready = False
+
+
+def _executor():
+    """실매매 주문 실행기 (처음 쓸 때 체결 기록 컬럼도 확인)"""
+    global _executor_ready
+    with _executor_lock:
+        if not _executor_ready:
+            ensure_fill_columns()
+            _executor_ready = True
+    return get_executor()
+
+
+def _adjust_seed(change, amount: float):
+    """
+    시드 증감 - 저널 기록이 실패해도 거래 기록은 이어가도록 경고만 하고 현재 잔고 반환
+    (메모리 잔고에는 반영됐고 기록 못 한 변경은 다음 기록 때 다시 시도됨)
+    """
+    try:
+        return change(amount)
+    except OSError as e:
+        errors.inc(stage="seed_journal")
+        send_discord_message(f"❌ 시드 저널 기록 실패 (다음 변경 때 재시도): {e}")
+        return get_seed()
+
+
+def _has_pending_order() -> bool:
+    if get_executor().has_pending(COIN_TICKER):
+        log.info("⏳ 체결 대기 중인 주문이 있어 이번 주문은 생략")
+        return True
+    return False
+
+
 def buy(price: float, amount: float = None, is_simulated: bool = not LIVE_MODE):
     """
     매수 함수
@@ -36,41 +71,41 @@ def buy(price: float, amount: float = None, is_simulated: bool = not LIVE_MODE):
         log.info(f"🟢 모의 매수 - 가격: {price:,.0f}, 수량: {amount:.8f}, 금액: {entry_amount:,.0f}")
         send_discord_message(f"🟢 [모의매매] 매수 - {price:,.0f}원, 수량: {amount:.8f}, 금액: {entry_amount:,.0f}")
     else:
+        # 실매매는 주문 접수만 하고 반환 - 체결 결과는 _on_buy_fill 에서 기록
+        if _has_pending_order():
+            return
         try:
-            upbit = pyupbit.Upbit(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY)
-            resp = upbit.buy_market_order(COIN_TICKER, entry_amount)
-            # 실제 매수 수량 추정
-            amount = entry_amount / price  # 정확히 fill된 수량은 resp['executed_volume']이 필요함
-            log.info(f"✅ 실전 매수 완료: {resp}")
-            send_discord_message(f"✅ [실전매매] 매수 - {price:,.0f}원, 수량: {amount:.8f}, 금액: {entry_amount:,.0f}")
+            _executor().submit("buy", COIN_TICKER, entry_amount, _on_buy_fill)
+            send_discord_message(f"📨 [실전매매] 매수 주문 접수 - {entry_amount:,.0f}원")
         except Exception as e:
+            errors.inc(stage="order")
             log.error(f"[실매수 오류] {e}")
             send_discord_message(f"❌ 실매수 실패: {e}")
-            return
+        return
 
     # 시드 차감 - 실제 사용된 금액(entry_amount)만큼 차감
-    if is_simulated or LIVE_MODE:
-        new_balance = decrease_seed(entry_amount)
+    new_balance = _adjust_seed(decrease_seed, entry_amount)
+    log.info(f"💰 잔고 차감 후 잔액: {new_balance}원")
+
+    # DB 저장 + 포지션 상태 갱신
+    positions.record_trade("buy", price, amount, None, is_simulated, get_seed())
+
+
+def _on_buy_fill(fill: Fill):
+    """실매수 체결 - 실제 체결 수량 / 평균가 / 수수료로 기록 (주문 실행기 스레드)"""
+    if not fill.volume:
+        log.warning(f"⚠️ 매수 주문이 체결 없이 종료됨 (uuid={fill.uuid}, state={fill.state})")
+        send_discord_message("⚠️ [실전매매] 매수 주문이 체결되지 않았습니다")
+        return
+
+    if LIVE_MODE:
+        new_balance = _adjust_seed(decrease_seed, fill.funds + fill.fee)
         log.info(f"💰 잔고 차감 후 잔액: {new_balance}원")
 
-    # DB 저장
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cursor:
-                sql = """
-                  INSERT INTO trade_history
-                  (trade_type, price, amount, roi, executed_at, is_simulated, seed_balance)
-                  VALUES ('buy', %s, %s, %s, %s, %s, %s)
-                """
-                executed_at = get_kst_now().strftime("%Y-%m-%d %H:%M:%S")
-                current_seed = get_seed()
-                cursor.execute(sql, (price, amount, None, executed_at, is_simulated, current_seed))
-            conn.commit()
-        except Exception as e:
-            log.error(f"[매수 기록 저장 실패] {e}")
-        finally:
-            conn.close()
+    positions.record_trade("buy", fill.avg_price, fill.volume, None, False, get_seed(),
+                           fee=fill.fee, order_uuid=fill.uuid)
+    send_discord_message(f"✅ [실전매매] 매수 체결 - 평균 {fill.avg_price:,.0f}원, 수량: {fill.volume:.8f}, "
+                         f"금액: {fill.funds:,.0f}, 수수료: {fill.fee:,.0f}")
 
 
 def sell(price: float, amount: float, roi: float, is_simulated: bool = not LIVE_MODE):
@@ -84,7 +119,7 @@ def sell(price: float, amount: float, roi: float, is_simulated: bool = not LIVE_
         is_simulated: 모의 매매 여부
     """
     # 보유 수량 확인
-    holding = get_holding_amount()
+    holding = positions.holding(is_simulated)
     if holding <= 0:
         log.warning("⚠️ 현재 보유 수량 없음 → 매도 불가")
         send_discord_message("⚠️ [매도 차단] 보유 수량이 없어 매도하지 않습니다.")
@@ -98,42 +133,48 @@ def sell(price: float, amount: float, roi: float, is_simulated: bool = not LIVE_
         log.info(f"🔴 모의 매도 - 가격: {price:,.0f}, 수량: {amount:.8f}, 수익률: {roi:.2%}")
         send_discord_message(f"🔴 [모의매매] 매도 - {price:,.0f}원, 수익률: {roi:.2%}")
     else:
+        # 실매매는 주문 접수만 하고 반환 - 체결 결과는 _on_sell_fill 에서 기록
+        if _has_pending_order():
+            return
         try:
-            upbit = pyupbit.Upbit(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY)
-            resp = upbit.sell_market_order(COIN_TICKER, amount)
-            log.info(f"✅ 실전 매도 완료: {resp}")
-            send_discord_message(f"✅ [실전매매] 매도 - {price:,.0f}원, 수익률: {roi:.2%}")
+            _executor().submit("sell", COIN_TICKER, amount, _on_sell_fill)
+            send_discord_message(f"📨 [실전매매] 매도 주문 접수 - 수량: {amount:.8f}")
         except Exception as e:
+            errors.inc(stage="order")
             log.error(f"[실매도 오류] {e}")
             send_discord_message(f"❌ 실매도 실패: {e}")
-            return
+        return
 
-    # 시드 관리 (수익 반영)
-    if is_simulated or LIVE_MODE:
-        # 원래 진입 금액 계산
-        entry_amount = price * amount / (1 + roi)
-        # 실제 회수 금액 (수익 또는 손실 포함)
-        profit_amount = price * amount
-        
-        # 시드 증가 (회수 금액만큼)
-        new_balance = increase_seed(profit_amount)
-        log.info(f"💰 수익 반영 후 잔고: {new_balance}원 (ROI: {roi:.2%})")
-
-    # DB 저장
-    conn = get_connection()
-    if conn:
-        try:
-            with conn.cursor() as cursor:
-                sql = """
-                    INSERT INTO trade_history
-                    (trade_type, price, amount, roi, executed_at, is_simulated, seed_balance)
-                    VALUES ('sell', %s, %s, %s, %s, %s, %s)
-                """
-                executed_at = get_kst_now().strftime("%Y-%m-%d %H:%M:%S")
-                current_seed = get_seed()
-                cursor.execute(sql, (price, amount, roi, executed_at, is_simulated, current_seed))
-            conn.commit()
-        except Exception as e:
-            log.error(f"[매도 기록 저장 실패] {e}")
-        finally:
-            conn.close()
\ No newline at end of file
+    # 시드 관리 (수익 반영) - 회수 금액만큼 증가
+    profit_amount = price * amount
+    new_balance = _adjust_seed(increase_seed, profit_amount)
+    log.info(f"💰 수익 반영 후 잔고: {new_balance}원 (ROI: {roi:.2%})")
+
+    # DB 저장 + 포지션 상태 갱신
+    positions.record_trade("sell", price, amount, roi, is_simulated, get_seed())
+
+
+def _on_sell_fill(fill: Fill):
+    """실매도 체결 - 실제 회수 금액(수수료 차감)과 진입 비용으로 ROI 계산 후 기록 (주문 실행기 스레드)"""
+    if not fill.volume:
+        log.warning(f"⚠️ 매도 주문이 체결 없이 종료됨 (uuid={fill.uuid}, state={fill.state})")
+        send_discord_message("⚠️ [실전매매] 매도 주문이 체결되지 않았습니다")
+        return
+
+    proceeds = fill.funds - fill.fee
+    entry = positions.last_buy(is_simulated=False)
+    roi = None
+    if entry and entry["amount"]:
+        entry_cost = entry["price"] * entry["amount"]
+        entry_cost += entry["fee"] if entry["fee"] is not None else entry_cost * UPBIT_FEE_RATE
+        roi = proceeds / (entry_cost * fill.volume / entry["amount"]) - 1
+
+    if LIVE_MODE:
+        new_balance = _adjust_seed(increase_seed, proceeds)
+        log.info(f"💰 수익 반영 후 잔고: {new_balance}원 (ROI: {roi:.2%})" if roi is not None
+                 else f"💰 수익 반영 후 잔고: {new_balance}원")
+
+    positions.record_trade("sell", fill.avg_price, fill.volume, roi, False, get_seed(),
+                           fee=fill.fee, order_uuid=fill.uuid)
+    send_discord_message(f"✅ [실전매매] 매도 체결 - 평균 {fill.avg_price:,.0f}원, 수량: {fill.volume:.8f}, "
+                         f"수수료: {fill.fee:,.0f}" + (f", 수익률: {roi:.2%}" if roi is not None else ""))
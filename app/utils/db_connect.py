@@ -1,21 +1,265 @@
 # app/utils/db_connect.py
 
-import pymysql
-from config import DB_CONFIG
 import sys
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
 
-def get_connection():
-    try:
-        conn = pymysql.connect(
-            host=DB_CONFIG["host"],
-            port=DB_CONFIG["port"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            database=DB_CONFIG["database"],
-            charset=DB_CONFIG["charset"],
-            autocommit=True
-        )
+import pymysql
+from config import DB_CONFIG, DB_POOL_CONFIG
+
+
+def _connect():
+    return pymysql.connect(
+        host=DB_CONFIG["host"],
+        port=DB_CONFIG["port"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        database=DB_CONFIG["database"],
+        charset=DB_CONFIG["charset"],
+        autocommit=True
+    )
+
+
+class PooledConnection:
+    """
+    풀에서 빌린 연결
+    close()를 호출하면 실제로 끊지 않고 풀에 반납한다 (기존 conn.close() 코드 호환)
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+        self.checked_out_at = time.monotonic()
+        self.leak_reported = False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool._release(self._raw, self)
+
+    def discard(self):
+        """끊긴 연결로 판단될 때 풀에 돌려주지 않고 폐기"""
+        if not self._released:
+            self._released = True
+            self._pool._release(self._raw, self, broken=True)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __del__(self):
+        # 반납 없이 GC된 연결 = 누수
+        if not getattr(self, "_released", True):
+            self._pool._report_leak(self)
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 고정 크기 MySQL 연결 풀
+    - 최대 max_size개까지만 연결을 만들고, 초과 요청은 checkout_timeout까지 대기
+    - health_check_interval 이상 쉬었던 연결은 ping으로 확인 후 재사용
+    - max_idle_seconds 이상 놀고 있는 연결은 정리
+    - leak_threshold 이상 반납되지 않은 연결은 누수로 집계
+    """
+
+    def __init__(self, connect=_connect, max_size: int = 4, checkout_timeout: float = 10.0,
+                 max_idle_seconds: float = 300.0, health_check_interval: float = 30.0,
+                 leak_threshold: float = 120.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_interval = health_check_interval
+        self.leak_threshold = leak_threshold
+
+        self._idle = deque()  # (raw, 반납 시각) - LIFO로 재사용
+        self._in_use = weakref.WeakSet()  # 반납 없이 버려진 연결은 GC 시 누수로 집계
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "connect_errors": 0,
+            "leaks": 0,
+        }
+
+    def acquire(self, timeout: float = None):
+        """연결을 빌려온다. 실패 시 None"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    raw, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    raw, idle_since = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    print("[DB 연결 오류] 연결 풀 대기 시간 초과", file=sys.stderr)
+                    return None
+                self._cond.wait(remaining)
+
+        # 네트워크 작업은 락 밖에서 수행
+        if raw is not None and time.monotonic() - idle_since >= self.health_check_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                self._close_raw(raw)
+                raw = None
+
+        if raw is None:
+            try:
+                raw = self._connect()
+                with self._cond:
+                    self._stats["created"] += 1
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._stats["connect_errors"] += 1
+                    self._cond.notify()
+                print(f"[DB 연결 오류] {e}", file=sys.stderr)
+                return None
+
+        waited = time.monotonic() - started
+        conn = PooledConnection(self, raw)
+        with self._cond:
+            self._in_use.add(conn)
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
         return conn
-    except Exception as e:
-        print(f"[DB 연결 오류] {e}", file=sys.stderr)
-        return None
+
+    def _release(self, raw, conn, broken: bool = False):
+        with self._cond:
+            self._in_use.discard(conn)
+            if broken or not raw.open:
+                self._size -= 1
+            else:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            self._cond.notify()
+        if raw is not None:
+            self._close_raw(raw)
+
+    def _report_leak(self, conn):
+        with self._cond:
+            if not conn.leak_reported:
+                self._stats["leaks"] += 1
+            self._size -= 1
+            self._cond.notify()
+        print("[DB 연결 누수] 반납되지 않은 연결이 정리되었습니다", file=sys.stderr)
+        self._close_raw(conn._raw)
+
+    def _evict_idle(self):
+        """락을 잡은 상태에서 호출 - 오래 놀고 있는 연결 정리"""
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle_seconds:
+            raw, _ = self._idle.popleft()
+            self._size -= 1
+            self._close_raw(raw)
+
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+    @contextmanager
+    def session(self):
+        """
+        with 블록 동안 연결 하나를 빌려 쓰고 자동 반납
+        같은 스레드에서 중첩 호출하면 바깥 세션의 연결을 그대로 재사용한다
+        연결 실패 시 None을 넘긴다
+        """
+        current = getattr(self._local, "conn", None)
+        if current is not None:
+            yield current
+            return
+
+        conn = self.acquire()
+        if conn is None:
+            yield None
+            return
+
+        self._local.conn = conn
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            conn.discard()
+            raise
+        finally:
+            self._local.conn = None
+            conn.close()
+
+    def metrics(self) -> dict:
+        """풀 상태 및 누적 지표"""
+        now = time.monotonic()
+        with self._cond:
+            for conn in self._in_use:
+                if not conn.leak_reported and now - conn.checked_out_at > self.leak_threshold:
+                    conn.leak_reported = True
+                    self._stats["leaks"] += 1
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.max_size,
+            })
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
+
+    def close_all(self):
+        """유휴 연결을 모두 닫는다 (종료 시)"""
+        with self._cond:
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for raw in idle:
+            self._close_raw(raw)
+
+
+pool = ConnectionPool(**DB_POOL_CONFIG)
+
+
+def db_session():
+    """
+    풀에서 연결을 빌려 쓰는 컨텍스트 매니저
+
+    with db_session() as conn:
+        if not conn:
+            return
+        with conn.cursor() as cursor:
+            ...
+    """
+    return pool.session()
+
+
+def get_connection():
+    """풀에서 연결을 빌려온다 (conn.close()로 반납). 새 코드는 db_session() 사용"""
+    return pool.acquire()
+
+
+def get_pool_metrics() -> dict:
+    return pool.metrics()
@@ -1,24 +1,155 @@
 # app/utils/discord.py
 
+import atexit
+import queue
+import threading
+import time
 import requests
-import json
-from config import DISCORD_WEBHOOK_URL
+from config import DISCORD_WEBHOOK_URL, DISCORD_QUEUE_SIZE, DISCORD_COALESCE_SECONDS
+
+MAX_CONTENT_LENGTH = 2000  # Discord 메시지 최대 길이
+
+
+class DiscordNotifier:
+    """
+    Discord Webhook 백그라운드 전송기
+
+    - send()는 큐에 넣기만 하고 바로 반환 (매매 루프가 네트워크를 기다리지 않음)
+    - 전용 스레드가 window초 동안 들어온 메시지를 한 메시지로 묶어 전송
+    - 429 응답은 retry_after 만큼 기다렸다가 재시도, 그 밖의 실패는 지수 백오프
+    - 큐가 가득 차면 가장 오래된 메시지를 버리고, 버린 개수는 다음 메시지에 표시
+    """
+
+    def __init__(self, webhook_url: str = DISCORD_WEBHOOK_URL, max_queue: int = DISCORD_QUEUE_SIZE,
+                 window: float = DISCORD_COALESCE_SECONDS, timeout: float = 5.0, max_retries: int = 5):
+        self.webhook_url = webhook_url
+        self.window = window
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.dropped = 0
+        self.sent = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def send(self, content: str):
+        """메시지를 전송 큐에 넣기 (블로킹 없음)"""
+        if not self.webhook_url:
+            return
+        self._ensure_worker()
+        while True:
+            try:
+                self._queue.put_nowait(content)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    with self._lock:
+                        self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            messages = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    messages.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            received = len(messages)
+            with self._lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                messages.append(f"⚠️ 알림 {dropped}건이 큐 초과로 누락되었습니다.")
+
+            for chunk in self._chunks(messages):
+                self._post(chunk)
+            for _ in range(received):
+                self._queue.task_done()
+
+    @staticmethod
+    def _chunks(messages: list):
+        """줄바꿈으로 합치되 Discord 길이 제한을 넘지 않게 나누기"""
+        chunk = ""
+        for message in messages:
+            message = message[:MAX_CONTENT_LENGTH]
+            if chunk and len(chunk) + 1 + len(message) > MAX_CONTENT_LENGTH:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk}\n{message}" if chunk else message
+        if chunk:
+            yield chunk
+
+    def _post(self, content: str):
+        backoff = 1.0
+        for _ in range(self.max_retries):
+            try:
+                response = self._session.post(self.webhook_url, json={"content": content}, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"[Discord 전송 예외] {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+
+            if response.status_code in (200, 204):
+                self.sent += 1
+                return
+            if response.status_code == 429:
+                time.sleep(self._retry_after(response, backoff))
+                backoff = min(backoff * 2, 60)
+                continue
+
+            print(f"[Discord 전송 실패] 상태 코드: {response.status_code} / 응답: {response.text}")
+            if response.status_code < 500:
+                return  # 4xx 는 재시도해도 같은 결과
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+        print(f"[Discord 전송 포기] {self.max_retries}회 실패: {content[:100]}")
+
+    @staticmethod
+    def _retry_after(response, default: float) -> float:
+        """본문의 retry_after → Retry-After 헤더 → default 순 (형식이 이상하면 다음 후보)"""
+        try:
+            data = response.json()
+            if isinstance(data, dict) and "retry_after" in data:
+                return float(data["retry_after"])
+        except (ValueError, TypeError):
+            pass
+        try:
+            return float(response.headers.get("Retry-After", default))
+        except (ValueError, TypeError):
+            return default
+
+    def flush(self, timeout: float = 10.0):
+        """큐에 남은 메시지가 전송될 때까지 최대 timeout초 대기"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+notifier = DiscordNotifier()
+atexit.register(notifier.flush)
+
 
 def send_discord_message(content: str):
     """
-    Discord Webhook으로 메시지를 전송합니다.
+    Discord Webhook으로 메시지를 전송합니다. (백그라운드 전송, 즉시 반환)
     :param content: 보낼 메시지 내용 (텍스트)
     """
-    try:
-        payload = {
-            "content": content
-        }
-        headers = {
-            "Content-Type": "application/json"
-        }
-        response = requests.post(DISCORD_WEBHOOK_URL, data=json.dumps(payload), headers=headers)
-
-        if response.status_code != 204:
-            print(f"[Discord 전송 실패] 상태 코드: {response.status_code} / 응답: {response.text}")
-    except Exception as e:
-        print(f"[Discord 전송 예외] {e}")
+    notifier.send(content)
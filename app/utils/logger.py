@@ -1,15 +1,68 @@
 # app/utils/logger.py
 
+import atexit
+import json
 import logging
+import math
 import os
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from config import LOG_JSON
 
 # 로그 디렉토리 설정
 LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
-# 로그 파일 이름: logs/2025-03-30.log (오늘 날짜 기준)
-log_filename = os.path.join(LOG_DIR, f"{datetime.now().strftime('%Y-%m-%d')}.log")
+
+class DailyFileHandler(logging.FileHandler):
+    """
+    날짜별 로그 파일 핸들러: logs/2025-03-30.log (기록 시점 날짜 기준)
+    자정이 지나면 다음 기록부터 새 날짜의 파일로 넘어간다
+    """
+
+    def __init__(self, directory: str = LOG_DIR, suffix: str = ".log"):
+        self.directory = directory
+        self.suffix = suffix
+        self.day = datetime.now().strftime("%Y-%m-%d")
+        super().__init__(self._path(self.day), encoding="utf-8", delay=True)
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.directory, f"{day}{self.suffix}")
+
+    def emit(self, record):
+        day = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d")
+        if day != self.day:
+            self.day = day
+            self.baseFilename = os.path.abspath(self._path(day))
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+        super().emit(record)
+
+
+def _json_safe(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    한 줄에 JSON 하나 (logs/2025-03-30.jsonl)
+    log.info(..., extra={"fields": {...}}) 로 넘긴 값은 최상위 키로 기록된다
+    """
+
+    def format(self, record) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry[key] = _json_safe(value)
+        return json.dumps(entry, ensure_ascii=False, default=float)
+
 
 # 로거 생성
 logger = logging.getLogger("AutoTraderLogger")
@@ -21,18 +74,29 @@ if not logger.handlers:
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
 
-    # 파일 출력 핸들러
-    file_handler = logging.FileHandler(log_filename, encoding="utf-8")
+    # 파일 출력 핸들러 (날짜가 바뀌면 새 파일)
+    file_handler = DailyFileHandler()
     file_handler.setLevel(logging.INFO)
 
     # 포맷 설정
     formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s")
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
+    handlers = [console_handler, file_handler]
+
+    # 구조화 로그 (JSON lines, 선택)
+    if LOG_JSON:
+        json_handler = DailyFileHandler(suffix=".jsonl")
+        json_handler.setLevel(logging.INFO)
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
 
-    # 핸들러 등록
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # 호출 스레드는 큐에 넣기만 하고, 콘솔/파일 기록은 리스너 스레드가 처리
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
 # 외부에서 import해서 사용
 def get_logger():
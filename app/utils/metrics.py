@@ -0,0 +1,201 @@
+# app/utils/metrics.py
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.utils.db_connect import get_pool_metrics
+from app.utils.logger import get_logger
+from config import METRICS_PORT, METRICS_FILE, METRICS_FILE_SECONDS
+
+log = get_logger()
+
+# 틱 단계 지연 버킷 (초) - 0.1ms ~ 30s
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """라벨별 누적 카운터"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_label_text(key)} {value}" for key, value in items)
+        return lines
+
+
+class Histogram:
+    """
+    라벨별 고정 버킷 히스토그램 (Prometheus histogram 형식)
+    observe() 는 이진 탐색 + 락 한 번이라 틱 경로에 켜 둬도 부담이 없다
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = STAGE_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels → [버킷별 개수..., +Inf], 합계, 최대
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0.0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] = max(series[2], value)
+
+    def snapshot(self) -> dict:
+        """labels → {"count", "sum", "max", "buckets": [(상한, 누적 개수), ...]}"""
+        with self._lock:
+            items = [(key, list(counts), total, peak) for key, (counts, total, peak) in self._series.items()]
+        result = {}
+        for key, counts, total, peak in items:
+            cumulative, running = [], 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                running += count
+                cumulative.append((bound, running))
+            result[key] = {"count": running, "sum": total, "max": peak, "buckets": cumulative}
+        return result
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, data in sorted(self.snapshot().items()):
+            for bound, count in data["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', le),))} {count}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {data['sum']}")
+            lines.append(f"{self.name}_count{_label_text(key)} {data['count']}")
+        return lines
+
+
+stage_seconds = Histogram("autotrader_stage_seconds", "틱 단계별 소요 시간 (초)")
+rest_calls = Counter("autotrader_rest_calls_total", "업비트 REST 호출 수")
+errors = Counter("autotrader_errors_total", "단계별 오류 수")
+decision_latency = Histogram("autotrader_decision_latency_seconds", "봉 마감부터 판단 완료까지 걸린 시간 (초)")
+missed_ticks = Counter("autotrader_missed_ticks_total", "예정 시각을 놓친 틱 수 (처리 방식별)")
+
+
+@contextmanager
+def stage(name: str):
+    """
+    with stage("current_price"):
+        ...
+    블록 소요 시간을 단계 히스토그램에 기록하고, 예외가 나면 오류 카운터를 올린다
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors.inc(stage=name)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, stage=name)
+
+
+def _pool_lines() -> list:
+    """DB 연결 풀 지표 (스크레이프 시점에 읽기만 함)"""
+    pool = get_pool_metrics()
+    lines = []
+    for key in ("created", "closed", "checkouts", "timeouts", "health_check_failures", "connect_errors", "leaks"):
+        name = f"autotrader_db_{key}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {pool[key]}"]
+    for key in ("size", "idle", "in_use"):
+        name = f"autotrader_db_pool_{key}"
+        lines += [f"# TYPE {name} gauge", f"{name} {pool[key]}"]
+    lines += ["# TYPE autotrader_db_wait_seconds_max gauge", f"autotrader_db_wait_seconds_max {pool['wait_time_max']}"]
+    return lines
+
+
+def render() -> str:
+    """Prometheus 텍스트 형식 전체 지표"""
+    lines = [*stage_seconds.render(), *decision_latency.render(), *missed_ticks.render(),
+             *rest_calls.render(), *errors.render(), *_pool_lines()]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 스크레이프마다 콘솔에 찍지 않음
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """로컬 /metrics 엔드포인트 (백그라운드 스레드)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info(f"📊 지표 엔드포인트: http://{host}:{port}/metrics")
+    return server
+
+
+def write_metrics_file(path: str = METRICS_FILE):
+    """지표를 파일로 원자적으로 기록 (node_exporter textfile collector 형식)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def _file_loop(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            write_metrics_file(path)
+        except OSError as e:
+            log.error(f"[지표 파일 기록 실패] {e}")
+
+
+_started = False
+
+
+def start_metrics():
+    """설정에 따라 HTTP 엔드포인트 / 주기적 지표 파일 시작 (한 번만)"""
+    global _started
+    if _started:
+        return
+    _started = True
+    if METRICS_PORT:
+        try:
+            start_metrics_server(METRICS_PORT)
+        except OSError as e:
+            log.error(f"[지표 엔드포인트 시작 실패] {e}")
+    if METRICS_FILE:
+        threading.Thread(target=_file_loop, args=(METRICS_FILE, METRICS_FILE_SECONDS),
+                         name="metrics-file", daemon=True).start()
+        log.info(f"📊 지표 파일: {METRICS_FILE} ({METRICS_FILE_SECONDS:.0f}초마다)")
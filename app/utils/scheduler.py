@@ -0,0 +1,126 @@
+# app/utils/scheduler.py
+
+import math
+import time
+from dataclasses import dataclass
+from app.utils.logger import get_logger
+from app.utils.metrics import decision_latency, missed_ticks
+from config import TICK_INTERVAL_SECONDS, TICK_OFFSET_SECONDS, TICK_MISSED_POLICY, TICK_MAX_CATCH_UP
+
+log = get_logger()
+
+
+@dataclass(frozen=True)
+class Tick:
+    """스케줄러가 깨운 한 번의 틱"""
+    candle_close: float   # 이 틱이 처리할 봉의 마감 시각 (monotonic)
+    started: float        # 실제로 깨어난 시각 (monotonic)
+    catch_up: bool = False  # 놓친 틱을 뒤늦게 처리하는 중인지
+
+    @property
+    def lateness(self) -> float:
+        """봉 마감 후 깨어나기까지 걸린 시간 (초)"""
+        return self.started - self.candle_close
+
+
+class CandleScheduler:
+    """
+    봉 마감 시각에 맞춰 깨우는 스케줄러 (time.sleep(60) 대체)
+
+    - 매 분 경계 + offset 초에 깨운다 (거래소가 마감 봉을 확정할 여유)
+    - 기준 시각은 시작할 때 벽시계로 한 번 맞추고 이후는 monotonic 시계로만 계산하므로
+      작업 시간만큼 밀리지 않고, 시스템 시계가 바뀌어도 간격이 흔들리지 않는다
+      (벽시계와 1초 이상 어긋나면 다시 맞춘다)
+    - 작업이 길어져 틱을 놓치면
+      가장 최근 봉은 바로 처리하고, 그 전 봉들은 missed 정책에 따라
+      "skip": 건너뜀 / "catch_up": 최대 max_catch_up 개까지 기다리지 않고 연달아 실행
+    - done() 에서 봉 마감 → 판단 완료까지의 지연을 기록한다
+
+    scheduler = CandleScheduler()
+    for tick in scheduler:
+        run_tick()
+        scheduler.done(tick)
+    """
+
+    def __init__(self, interval: float = TICK_INTERVAL_SECONDS, offset: float = TICK_OFFSET_SECONDS,
+                 missed: str = TICK_MISSED_POLICY, max_catch_up: int = TICK_MAX_CATCH_UP,
+                 clock=time.monotonic, wall_clock=time.time, sleep=time.sleep):
+        if missed not in ("skip", "catch_up"):
+            raise ValueError(f"missed 정책은 skip / catch_up 중 하나여야 합니다: {missed}")
+        self.interval = interval
+        self.offset = offset
+        self.missed = missed
+        self.max_catch_up = max_catch_up
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._next_close = None   # 다음에 처리할 봉 마감 시각 (monotonic)
+        self._pending = 0         # 연달아 처리할 놓친 틱 수
+        self.skipped = 0
+        self.caught_up = 0
+
+    def _anchor(self) -> float:
+        """다음 분 경계의 monotonic 시각"""
+        now, wall = self._clock(), self._wall_clock()
+        boundary = math.floor(wall / self.interval + 1) * self.interval
+        return now + (boundary - wall)
+
+    def _drift(self) -> float:
+        """monotonic 기준 다음 마감 시각과 벽시계 분 경계의 차이 (초)"""
+        wall_at_close = self._wall_clock() + (self._next_close - self._clock())
+        return (wall_at_close + self.interval / 2) % self.interval - self.interval / 2
+
+    def wait(self) -> Tick:
+        """다음 틱 시각까지 대기 후 Tick 반환"""
+        if self._next_close is None:
+            self._next_close = self._anchor()
+        elif not self._pending:
+            if abs(self._drift()) >= 1.0:
+                log.warning(f"⏱️ 벽시계와 {self._drift():+.2f}초 어긋남 → 분 경계 다시 맞춤")
+                self._next_close = self._anchor()
+            self._check_missed()
+
+        if self._pending:
+            # 놓친 봉은 기다리지 않고 바로 처리
+            self._pending -= 1
+            self.caught_up += 1
+            missed_ticks.inc(action="catch_up")
+            tick = Tick(self._next_close, self._clock(), catch_up=True)
+            self._next_close += self.interval
+            return tick
+
+        remaining = self._next_close + self.offset - self._clock()
+        if remaining > 0:
+            self._sleep(remaining)
+        tick = Tick(self._next_close, self._clock())
+        self._next_close += self.interval
+        return tick
+
+    def _check_missed(self):
+        """
+        이전 틱 작업이 길어져 예정 시각이 여러 번 지나갔는지 확인
+        가장 최근 봉은 바로 처리하고, 그보다 오래된 봉은 정책대로 연달아 처리하거나 건너뛴다
+        """
+        overdue = self._clock() - self.offset - self._next_close
+        if overdue < self.interval:
+            return
+        missed = int(overdue // self.interval)
+
+        run = min(missed, self.max_catch_up) if self.missed == "catch_up" else 0
+        skip = missed - run
+        self._next_close += skip * self.interval
+        self._pending = run
+        if skip:
+            self.skipped += skip
+            missed_ticks.inc(skip, action="skip")
+        log.warning(f"⏭️ 놓친 틱 {missed}개 → 연달아 처리 {run}개, 건너뜀 {skip}개")
+
+    def done(self, tick: Tick) -> float:
+        """틱 처리 완료 - 봉 마감부터 판단 완료까지 걸린 시간 기록 (초)"""
+        latency = self._clock() - tick.candle_close
+        decision_latency.observe(latency, catch_up=str(tick.catch_up).lower())
+        return latency
+
+    def __iter__(self):
+        while True:
+            yield self.wait()
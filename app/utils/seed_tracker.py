@@ -1,56 +1,209 @@
+import atexit
 import json
 import os
+import threading
 from config import INITIAL_SEED  # ✅ config.py에서 가져오기
-from app.utils.db_connect import get_connection
 from app.utils.logger import get_logger
-from config import LIVE_MODE
 
 log = get_logger()
 
 SEED_FILE = "seed_state.json"
+SEED_JOURNAL_FILE = "seed_state.journal"
 
-# 현재 보유 수량 조회
-def get_holding_amount() -> float:
+
+def _read_snapshot(path: str):
+    """스냅샷 → (잔고, seq). 없거나 깨졌으면 (INITIAL_SEED, 0)"""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        return data.get("balance", INITIAL_SEED), data.get("seq", 0)
+    except FileNotFoundError:
+        return INITIAL_SEED, 0
+    except (OSError, ValueError) as e:
+        log.warning(f"⚠️ 시드 스냅샷 손상 → 저널로 복구 ({e})")
+        return INITIAL_SEED, 0
+
+
+def _replay_journal(path: str, balance, seq: int):
+    """스냅샷 이후 저널 기록 반영. 기록 중 끊긴 마지막 줄은 무시"""
     try:
-        conn = get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT SUM(CASE 
-                            WHEN trade_type = 'buy' THEN amount 
-                            WHEN trade_type = 'sell' THEN -amount 
-                            ELSE 0 END) as holding
-                FROM trade_history
-                WHERE is_simulated = %s
-            """, (not LIVE_MODE,))
-            result = cursor.fetchone()
-            return float(result[0]) if result[0] else 0.0
-    except Exception as e:
-        log.error(f"[보유 수량 조회 오류] {e}")
-        return 0.0
-
-
-def _load_seed():
-    if not os.path.exists(SEED_FILE):
-        _save_seed(INITIAL_SEED)
-    with open(SEED_FILE, "r") as f:
-        data = json.load(f)
-        return data.get("balance", INITIAL_SEED)
-
-def _save_seed(balance):
-    with open(SEED_FILE, "w") as f:
-        json.dump({"balance": balance}, f)
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["seq"] > seq:
+                    balance, seq = entry["balance"], entry["seq"]
+    except FileNotFoundError:
+        pass
+    return balance, seq
+
+
+def read_seed(snapshot_path: str = SEED_FILE, journal_path: str = SEED_JOURNAL_FILE):
+    """디스크 기준 현재 잔고 (다른 프로세스가 쓰는 장부를 읽을 때 사용)"""
+    return _replay_journal(journal_path, *_read_snapshot(snapshot_path))[0]
+
+
+class SeedLedger:
+    """
+    시드 잔고를 메모리에 두고 저널 + 스냅샷으로 영속화
+
+    - 변경은 저널(seed_state.journal)에 한 줄씩 추가하고 fsync 후 반환
+    - 동시에 들어온 변경은 먼저 온 호출이 한 번의 write + fsync 로 묶어서 기록 (group commit)
+    - snapshot_every 건마다 스냅샷을 임시 파일 → fsync → rename 으로 교체하고 저널을 비움
+    - 재시작 시 스냅샷 + 그 이후 저널로 마지막 잔고를 정확히 복구
+    - 저널 기록이 실패하면 그 묶음을 대기열로 되돌리고 기다리던 호출에 OSError 를 던진다
+      (메모리 잔고는 유지, 다음 기록 때 다시 시도)
+    """
+
+    def __init__(self, snapshot_path: str = SEED_FILE, journal_path: str = SEED_JOURNAL_FILE,
+                 snapshot_every: int = 1000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.snapshot_every = snapshot_every
+
+        self._balance, self._seq = _replay_journal(journal_path, *_read_snapshot(snapshot_path))
+        self._snapshot_seq = _read_snapshot(snapshot_path)[1]
+        self._durable_seq = self._seq
+        self._pending = []
+        self._flushing = False
+        self._failed = None       # 마지막 저널 기록 실패 (대상 seq, 예외) - 성공하면 None
+        self._cond = threading.Condition()
+        self._journal = open(journal_path, "a", encoding="utf-8")
+
+        if not os.path.exists(snapshot_path):
+            self.snapshot()
+
+    @property
+    def balance(self):
+        return self._balance
+
+    def apply(self, delta: float):
+        """잔고에 delta 반영 후 저널에 기록될 때까지 대기, 반영 후 잔고 반환"""
+        with self._cond:
+            self._balance += delta
+            self._seq += 1
+            seq, balance = self._seq, self._balance
+            self._pending.append(json.dumps({"seq": seq, "delta": delta, "balance": balance}) + "\n")
+
+            while self._durable_seq < seq:
+                if self._flushing:
+                    self._cond.wait()
+                else:
+                    self._flush_pending()
+                if self._durable_seq < seq and self._failed and seq <= self._failed[0]:
+                    raise self._failed[1]
+        return balance
+
+    def _flush_pending(self):
+        """대기 중인 기록을 한 번에 저널에 쓰기 (self._cond 를 잡은 상태에서 호출)"""
+        batch, self._pending = self._pending, []
+        target_seq, target_balance = self._seq, self._balance
+        self._flushing = True
+        self._cond.release()
+        error, start = None, None
+        try:
+            try:
+                start = self._journal.tell()
+                self._journal.write("".join(batch))
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+            except (OSError, ValueError) as e:  # ValueError: 이전 실패 뒤 다시 열지 못한 저널
+                error = e if isinstance(e, OSError) else OSError(f"시드 저널이 열려 있지 않음: {e}")
+                log.error(f"[시드 저널 기록 실패] {e}")
+                self._reopen_journal(start)
+            else:
+                if target_seq - self._snapshot_seq >= self.snapshot_every:
+                    try:
+                        self._write_snapshot(target_balance, target_seq)
+                    except OSError as e:
+                        # 저널에는 이미 기록됐으므로 잔고는 안전 - 다음 주기에 다시 시도
+                        log.error(f"[시드 스냅샷 저장 실패] {e}")
+        finally:
+            self._cond.acquire()
+            self._flushing = False
+            if error is None:
+                self._durable_seq = target_seq
+                self._failed = None
+            else:
+                # 기록 못 한 묶음은 되돌려 두고 다음 기록 때 다시 쓴다
+                self._pending = batch + self._pending
+                self._failed = (target_seq, error)
+            self._cond.notify_all()
+
+    def _reopen_journal(self, size: int = None):
+        """실패한 쓰기의 잘린 줄을 지우고 다시 열기 (재시도한 줄이 깨진 줄 뒤에 붙지 않도록)"""
+        try:
+            self._journal.close()
+        except OSError:
+            pass
+        try:
+            if size is not None:
+                os.truncate(self.journal_path, size)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        except OSError as e:
+            # 다음 기록 때 닫힌 저널로 다시 실패 → 그때 다시 열어 본다
+            log.error(f"[시드 저널 다시 열기 실패] {e}")
+
+    def _write_snapshot(self, balance, seq: int):
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"balance": balance, "seq": seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        directory = os.open(os.path.dirname(os.path.abspath(self.snapshot_path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+        # 스냅샷에 포함된 기록은 저널에서 제거 (중간에 죽어도 seq 로 걸러짐)
+        self._journal.truncate(0)
+        self._snapshot_seq = seq
+
+    def snapshot(self):
+        """현재 잔고로 스냅샷 갱신 (대기 중인 기록을 먼저 저널에 반영)"""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if self._pending:
+                self._flush_pending()
+            self._flushing = True
+            try:
+                self._write_snapshot(self._balance, self._seq)
+                # 저널 기록에 실패해 남아 있던 변경도 스냅샷에 포함됨
+                self._pending = []
+                self._durable_seq = self._seq
+                self._failed = None
+            except OSError as e:
+                log.error(f"[시드 스냅샷 저장 실패] {e}")
+            finally:
+                self._flushing = False
+                self._cond.notify_all()
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def _get_ledger() -> SeedLedger:
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = SeedLedger()
+                atexit.register(_ledger.snapshot)
+    return _ledger
+
 
 def get_seed():
-    return _load_seed()
+    return _get_ledger().balance
 
 def decrease_seed(amount: float):
-    balance = _load_seed()
-    balance -= amount
-    _save_seed(balance)
-    return balance
+    return _get_ledger().apply(-amount)
 
 def increase_seed(amount: float):
-    balance = _load_seed()
-    balance += amount
-    _save_seed(balance)
-    return balance
+    return _get_ledger().apply(amount)
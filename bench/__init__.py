@@ -0,0 +1,11 @@
+"""
+벤치마크 모음 (가짜 pyupbit / 가짜 거래소 + SQLite 연결 풀)
+
+    python -m bench.run                       # 전체 실행 → bench/results/<시각>-<커밋>.json
+    python -m bench.run --suite tick --ticks 1000
+    python -m bench.run --suite exchange --ticks 5000 --error-rate 0.05 --transport http
+    python -m bench.exchange --port 8765      # 가짜 업비트 REST 서버 단독 실행
+    python -m bench.replay --start "2026-01-01 09:00" --output replay.json   # 기록된 1분봉으로 main2 루프 가상 시계 재생
+    python -m bench.indicators                # numpy 지표 커널 정확도 검증 (pandas 대비) + 속도 비교
+    python -m bench.compare old.json new.json # 두 결과 비교
+"""
@@ -0,0 +1,57 @@
+# bench/compare.py
+
+import argparse
+import json
+
+
+def _rows(results: dict) -> dict:
+    """결과 JSON → {항목 키: (값, 단위, 클수록 좋은지)}"""
+    rows = {}
+    for label, stats in results.get("tick", {}).get("stages", {}).items():
+        rows[f"tick/{label} p50"] = (stats["p50_ms"], "ms", False)
+        rows[f"tick/{label} p95"] = (stats["p95_ms"], "ms", False)
+    for item in results.get("indicators", []):
+        rows[f"indicators/{item['name']} n={item['candles']:,}"] = (item["seconds"] * 1000, "ms", False)
+    for item in results.get("db", []):
+        detail = ", ".join(f"{k}={item[k]}" for k in ("batch_size", "mode") if k in item)
+        key = f"db/{item['name']}" + (f" ({detail})" if detail else "")
+        rows[key] = (item["rows_per_sec"], "rows/s", True)
+    return rows
+
+
+def compare(base: dict, new: dict, threshold: float) -> int:
+    """두 결과의 공통 항목 비교표 출력, threshold 이상 느려진 항목 수 반환"""
+    base_rows, new_rows = _rows(base), _rows(new)
+    print(f"기준: {base['meta']['commit']} ({base['meta']['created_at']})")
+    print(f"비교: {new['meta']['commit']} ({new['meta']['created_at']})\n")
+
+    regressions = 0
+    for key in [k for k in base_rows if k in new_rows]:
+        old, unit, higher_is_better = base_rows[key]
+        value = new_rows[key][0]
+        if not old or not value:
+            continue
+        # 1보다 크면 좋아진 것
+        speedup = value / old if higher_is_better else old / value
+        mark = ""
+        if speedup < 1 / (1 + threshold):
+            mark = "  ⚠️ 느려짐"
+            regressions += 1
+        elif speedup > 1 + threshold:
+            mark = "  ✅ 빨라짐"
+        print(f"{key:<55} {old:>14,.3f} → {value:>14,.3f} {unit:<6} x{speedup:.2f}{mark}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크 결과 JSON 두 개 비교")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1, help="변화로 표시할 비율 (기본 10%%)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    raise SystemExit(1 if compare(base, new, args.threshold) else 0)
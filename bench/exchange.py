@@ -0,0 +1,437 @@
+# bench/exchange.py
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+import requests
+from app.exchange import ExchangeError, OrderExecutor
+from config import UPBIT_FEE_RATE
+
+_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class RateLimited(ExchangeError):
+    """가짜 거래소가 일부러 돌려주는 429 (Too Many Requests)"""
+
+
+class OrderNotFound(ExchangeError):
+    """없는 주문 uuid 조회 (404)"""
+
+
+def to_ohlcv_frame(candles: pd.DataFrame) -> pd.DataFrame:
+    """timestamp 컬럼 또는 DatetimeIndex 1분봉 → pyupbit.get_ohlcv 형식 (시간순 정렬, value 컬럼 포함)"""
+    df = candles.set_index("timestamp") if "timestamp" in candles.columns else candles
+    df = df[_COLUMNS].astype("float64").sort_index()
+    df.index = pd.DatetimeIndex(df.index)
+    df["value"] = df["close"] * df["volume"]
+    return df
+
+
+def candles_from_db(start: datetime = None, end: datetime = None) -> pd.DataFrame:
+    """기록된 btc_price_1min 구간을 재생용 DataFrame 으로 읽음"""
+    from app.utils.db_connect import db_session
+
+    sql = "SELECT timestamp, open, high, low, close, volume FROM btc_price_1min WHERE 1=1"
+    params = []
+    if start is not None:
+        sql += " AND timestamp >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND timestamp < %s"
+        params.append(end)
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql + " ORDER BY timestamp", params)
+            rows = cursor.fetchall()
+    return to_ohlcv_frame(pd.DataFrame(rows, columns=["timestamp", *_COLUMNS]))
+
+
+def candles_from_csv(path: str) -> pd.DataFrame:
+    """timestamp,open,high,low,close,volume CSV → 재생용 DataFrame"""
+    return to_ohlcv_frame(pd.read_csv(path, parse_dates=["timestamp"]))
+
+
+class FakeExchange:
+    """
+    업비트 REST 대역 - 기록된 1분봉을 재생하며 시세 조회와 시장가 주문을 흉내 낸다
+
+    - 시세: get_ohlcv / get_current_price (pyupbit 함수와 같은 인자·반환 형식, install() 로 교체)
+    - 주문: buy_market_order / sell_market_order / get_order (app.exchange.UpbitClient 와 같은 메서드)
+      → OrderExecutor(client=fake) 로 바로 쓰거나, serve() 로 HTTP 를 열고 UpbitClient(base_url=...) 로 호출
+    - 현재 시각은 재생 위치(cursor)의 봉 - advance() 로 한 봉씩 진행
+    - 현재가는 현재 봉의 quote 가격 ("close": 봉 끝 / "open": 봉 시작 - 봉 마감 직후 시각을 재생할 때)
+    - 주문은 fill_latency 초 뒤 조회할 때 그 시점 현재가 ± slippage 로 전량 체결, 수수료는 fee_rate
+    - 장애 주입: 호출마다 error_rate 확률로 429, timeout_rate 확률로 타임아웃
+      (fail_next() 로 정해진 호출에만 낼 수도 있음)
+      프로세스 내 호출의 타임아웃은 기다리지 않고 바로 requests.Timeout 을 던진다 (시간 압축)
+    """
+
+    def __init__(self, candles: pd.DataFrame, cursor: int = 0, market: str = "KRW-BTC",
+                 latency: float = 0.0, fill_latency: float = 0.0, slippage: float = 0.0005,
+                 fee_rate: float = UPBIT_FEE_RATE, error_rate: float = 0.0, timeout_rate: float = 0.0,
+                 quote: str = "close", seed: int = 0, clock=time.monotonic, sleep=time.sleep):
+        if quote not in ("close", "open"):
+            raise ValueError(f"quote 는 close / open 중 하나여야 합니다: {quote}")
+        self.candles = to_ohlcv_frame(candles)
+        if self.candles.empty:
+            raise ValueError("재생할 1분봉이 없습니다")
+        self._quotes = self.candles[quote].to_numpy()
+        self.cursor = cursor
+        self.market = market
+        self.latency = latency
+        self.fill_latency = fill_latency
+        self.slippage = slippage
+        self.fee_rate = fee_rate
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self._rng = np.random.default_rng(seed)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._scripted = []   # [종류, 남은 횟수, endpoint]
+        self.orders = {}
+        self.calls = {}
+        self.faults = {"429": 0, "timeout": 0}
+
+    # ---------- 재생 위치 ----------
+
+    @property
+    def now(self) -> pd.Timestamp:
+        """현재 진행 중인 봉의 시작 시각"""
+        return self.candles.index[self.cursor]
+
+    def advance(self, minutes: int = 1) -> bool:
+        """재생 위치를 minutes 봉 앞으로 (더 재생할 봉이 없으면 False)"""
+        with self._lock:
+            if self.cursor + minutes >= len(self.candles):
+                return False
+            self.cursor += minutes
+            return True
+
+    def remaining(self) -> int:
+        return len(self.candles) - 1 - self.cursor
+
+    def seek(self, ts) -> int:
+        """ts 이하 마지막 봉으로 재생 위치 이동"""
+        with self._lock:
+            self.cursor = max(0, int(self.candles.index.searchsorted(pd.Timestamp(ts), side="right")) - 1)
+            return self.cursor
+
+    def history(self, count: int, to=None) -> pd.DataFrame:
+        """현재 봉(또는 to 직전 봉)까지 count 개"""
+        end = self.cursor + 1
+        if to is not None:
+            end = min(end, int(self.candles.index.searchsorted(pd.Timestamp(to), side="left")))
+        return self.candles.iloc[max(0, end - count):end].copy()
+
+    # ---------- 장애 주입 ----------
+
+    def fail_next(self, kind: str, count: int = 1, endpoint: str = None):
+        """다음 count 번 호출(endpoint 지정 시 그 호출만)에 장애 주입 - kind: "429" / "timeout" """
+        if kind not in self.faults:
+            raise ValueError(f"장애 종류는 429 / timeout 중 하나여야 합니다: {kind}")
+        with self._lock:
+            self._scripted.append([kind, count, endpoint])
+
+    def _fault(self, endpoint: str):
+        """호출 공통 처리 - 응답 지연, 호출 수 집계, 장애 주입 (장애면 예외)"""
+        if self.latency:
+            self._sleep(self.latency)
+
+        kind = None
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            for script in self._scripted:
+                if script[2] in (None, endpoint):
+                    kind = script[0]
+                    script[1] -= 1
+                    if not script[1]:
+                        self._scripted.remove(script)
+                    break
+            else:
+                draw = self._rng.random()
+                if draw < self.error_rate:
+                    kind = "429"
+                elif draw < self.error_rate + self.timeout_rate:
+                    kind = "timeout"
+            if kind:
+                self.faults[kind] += 1
+
+        if kind == "429":
+            raise RateLimited(f"{endpoint} 429: too_many_requests")
+        if kind == "timeout":
+            raise requests.Timeout(f"{endpoint} timed out (fake)")
+
+    # ---------- 시세 (pyupbit 대역) ----------
+
+    def get_ohlcv(self, ticker: str = "KRW-BTC", interval: str = "minute1", count: int = 200, to=None, **kwargs):
+        """pyupbit.get_ohlcv 와 같이 실패하면 예외 대신 None"""
+        try:
+            self._fault("get_ohlcv")
+        except (ExchangeError, requests.RequestException):
+            return None
+        if interval != "minute1":
+            raise ValueError(f"가짜 거래소는 minute1 만 재생합니다: {interval}")
+        return self.history(count, to)
+
+    def get_current_price(self, ticker="KRW-BTC", **kwargs):
+        self._fault("get_current_price")
+        price = self.price()
+        if isinstance(ticker, list) and len(ticker) > 1:
+            return {t: price for t in ticker}
+        return price
+
+    def price(self) -> float:
+        """현재 봉 기준 현재가"""
+        return float(self._quotes[self.cursor])
+
+    def install(self, module):
+        """pyupbit 모듈의 시세 함수를 이 객체로 교체"""
+        module.get_ohlcv = self.get_ohlcv
+        module.get_current_price = self.get_current_price
+
+    # ---------- 주문 (UpbitClient 대역) ----------
+
+    def _new_order(self, market: str, side: str, ord_type: str, price=None, volume=None) -> dict:
+        order = {
+            "uuid": str(uuid.uuid4()),
+            "side": side,
+            "ord_type": ord_type,
+            "price": price,
+            "volume": volume,
+            "state": "wait",
+            "market": market,
+            "created_at": self.now.isoformat(),
+            "remaining_volume": volume,
+            "executed_volume": "0",
+            "paid_fee": "0",
+            "trades_count": 0,
+            "trades": [],
+        }
+        with self._lock:
+            self.orders[order["uuid"]] = (order, self._clock())
+        return dict(order)
+
+    def buy_market_order(self, market: str, krw: float) -> dict:
+        self._fault("buy_market_order")
+        return self._new_order(market, "bid", "price", price=str(round(krw)))
+
+    def sell_market_order(self, market: str, volume: float) -> dict:
+        self._fault("sell_market_order")
+        return self._new_order(market, "ask", "market", volume=f"{volume:.8f}")
+
+    def _fill(self, order: dict):
+        """현재가 ± 슬리피지로 전량 체결"""
+        quote = self.price()
+        if order["side"] == "bid":
+            price = quote * (1 + self.slippage)
+            funds = float(order["price"])
+            volume = funds / price
+        else:
+            price = quote * (1 - self.slippage)
+            volume = float(order["volume"])
+            funds = price * volume
+        order.update(
+            state="done",
+            remaining_volume="0",
+            executed_volume=f"{volume:.8f}",
+            paid_fee=str(funds * self.fee_rate),
+            trades_count=1,
+            trades=[{"market": order["market"], "uuid": str(uuid.uuid4()), "price": str(price),
+                     "volume": f"{volume:.8f}", "funds": str(funds), "side": order["side"],
+                     "created_at": self.now.isoformat()}],
+        )
+
+    def get_order(self, order_uuid: str) -> dict:
+        self._fault("get_order")
+        with self._lock:
+            if order_uuid not in self.orders:
+                raise OrderNotFound(f"get_order 404: order_not_found ({order_uuid})")
+            order, created = self.orders[order_uuid]
+            if order["state"] == "wait" and self._clock() - created >= self.fill_latency:
+                self._fill(order)
+            return dict(order)
+
+    def executor(self, poll_seconds: float = 0.001, fill_timeout: float = 5.0) -> OrderExecutor:
+        """이 거래소에 바로 주문하는 OrderExecutor (app.exchange._executor 에 넣어 사용)"""
+        return OrderExecutor(client=self, poll_seconds=poll_seconds, fill_timeout=fill_timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            orders = [order for order, _ in self.orders.values()]
+        return {
+            "calls": dict(self.calls),
+            "faults": dict(self.faults),
+            "orders": len(orders),
+            "filled": sum(order["state"] == "done" for order in orders),
+            "cursor": self.cursor,
+            "now": self.now.isoformat(),
+        }
+
+
+# ---------- HTTP (업비트 REST 경로 흉내) ----------
+
+def _kst_to_utc(ts: pd.Timestamp) -> str:
+    return (ts - timedelta(hours=9)).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _candle_json(market: str, ts: pd.Timestamp, row) -> dict:
+    """DataFrame 한 행 → /v1/candles/minutes/1 응답 항목"""
+    return {
+        "market": market,
+        "candle_date_time_utc": _kst_to_utc(ts),
+        "candle_date_time_kst": ts.strftime("%Y-%m-%dT%H:%M:%S"),
+        "opening_price": row.open,
+        "high_price": row.high,
+        "low_price": row.low,
+        "trade_price": row.close,
+        "timestamp": int((ts - timedelta(hours=9)).timestamp() * 1000),
+        "candle_acc_trade_price": row.value,
+        "candle_acc_trade_volume": row.volume,
+        "unit": 1,
+    }
+
+
+class _ExchangeHandler(BaseHTTPRequestHandler):
+    exchange: FakeExchange = None
+    timeout_delay = 6.0
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, name: str, message: str):
+        self._send(status, {"error": {"name": name, "message": message}})
+
+    def _dispatch(self, handler):
+        try:
+            self._send(200, handler())
+        except RateLimited:
+            self._error(429, "too_many_requests", "Too many API requests.")
+        except requests.Timeout:
+            # 클라이언트 제한 시간보다 늦게 응답해 실제 타임아웃을 만든다
+            time.sleep(self.timeout_delay)
+            self._error(504, "gateway_timeout", "fake timeout")
+        except OrderNotFound:
+            self._error(404, "order_not_found", "주문을 찾지 못했습니다.")
+        except (ExchangeError, KeyError, ValueError) as e:
+            self._error(400, "bad_request", str(e))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        fake = self.exchange
+
+        if url.path == "/v1/candles/minutes/1":
+            def candles():
+                df = fake.get_ohlcv(query.get("market", fake.market), count=min(int(query.get("count", 1)), 200),
+                                    to=query.get("to"))
+                if df is None:
+                    raise RateLimited("get_ohlcv 429: too_many_requests")
+                return [_candle_json(query.get("market", fake.market), ts, row)
+                        for ts, row in zip(df.index[::-1], df.iloc[::-1].itertuples())]
+            self._dispatch(candles)
+        elif url.path == "/v1/ticker":
+            def ticker():
+                markets = query.get("markets", fake.market).split(",")
+                price = fake.get_current_price(markets[0])
+                return [{"market": m, "trade_price": price, "timestamp": int(time.time() * 1000)} for m in markets]
+            self._dispatch(ticker)
+        elif url.path == "/v1/order":
+            if not self.headers.get("Authorization"):
+                self._error(401, "jwt_verification", "missing Authorization header")
+                return
+            self._dispatch(lambda: fake.get_order(query["uuid"]))
+        else:
+            self._error(404, "not_found", url.path)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/v1/orders":
+            self._error(404, "not_found", self.path)
+            return
+        if not self.headers.get("Authorization"):
+            self._error(401, "jwt_verification", "missing Authorization header")
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        fake = self.exchange
+
+        def order():
+            if body.get("side") == "bid" and body.get("ord_type") == "price":
+                return fake.buy_market_order(body["market"], float(body["price"]))
+            if body.get("side") == "ask" and body.get("ord_type") == "market":
+                return fake.sell_market_order(body["market"], float(body["volume"]))
+            raise ValueError(f"지원하지 않는 주문: {body}")
+        self._dispatch(order)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(exchange: FakeExchange, port: int = 0, host: str = "127.0.0.1", timeout_delay: float = 6.0):
+    """
+    가짜 거래소 HTTP 서버 (백그라운드 스레드)
+    반환한 서버의 server_address 로 UpbitClient(base_url=...) 또는 UPBIT_API_URL 을 맞춘다
+    """
+    handler = type("ExchangeHandler", (_ExchangeHandler,), {"exchange": exchange, "timeout_delay": timeout_delay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-exchange", daemon=True).start()
+    return server
+
+
+def base_url(server) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main():
+    """
+    단독 실행 - 재생 봉을 minute_seconds 초마다 한 봉씩 진행하며 HTTP 로 제공
+
+        python -m bench.exchange --csv candles.csv --port 8765 --minute-seconds 1 --error-rate 0.05
+        UPBIT_API_URL=http://127.0.0.1:8765 LIVE_MODE=True python main2.py   # 주문 API 만 가짜로 연결됨
+    """
+    from bench.fakes import synthetic_candles
+
+    parser = argparse.ArgumentParser(description="업비트 REST 가짜 거래소 (1분봉 재생 + 시장가 주문)")
+    parser.add_argument("--csv", help="재생할 1분봉 CSV (timestamp,open,high,low,close,volume). 없으면 랜덤워크")
+    parser.add_argument("--candles", type=int, default=1440, help="랜덤워크 봉 수")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--minute-seconds", type=float, default=60.0, help="한 봉을 진행하는 실제 초")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fill-latency", type=float, default=0.5)
+    parser.add_argument("--slippage", type=float, default=0.0005)
+    parser.add_argument("--fee-rate", type=float, default=UPBIT_FEE_RATE)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 응답 확률")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="타임아웃 확률")
+    parser.add_argument("--timeout-delay", type=float, default=6.0, help="타임아웃 응답을 늦추는 초")
+    args = parser.parse_args()
+
+    candles = candles_from_csv(args.csv) if args.csv else synthetic_candles(args.candles)
+    fake = FakeExchange(candles, latency=args.latency, fill_latency=args.fill_latency, slippage=args.slippage,
+                        fee_rate=args.fee_rate, error_rate=args.error_rate, timeout_rate=args.timeout_rate)
+    server = serve(fake, args.port, timeout_delay=args.timeout_delay)
+    print(f"🏦 가짜 거래소: {base_url(server)} ({len(fake.candles)}봉, {fake.now} 부터)")
+    try:
+        while fake.advance():
+            time.sleep(args.minute_seconds)
+        print("재생 종료 - 마지막 봉에서 계속 응답")
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
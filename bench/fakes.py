@@ -0,0 +1,222 @@
+# bench/fakes.py
+
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+# 벤치마크용 DB 스키마 (MySQL 운영 테이블과 같은 컬럼, SQLite 타입)
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS btc_price_1min (
+        timestamp DATETIME PRIMARY KEY,
+        open DOUBLE NOT NULL,
+        high DOUBLE NOT NULL,
+        low DOUBLE NOT NULL,
+        close DOUBLE NOT NULL,
+        volume DOUBLE NOT NULL,
+        created_at DATETIME
+    );
+    CREATE TABLE IF NOT EXISTS trade_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        trade_type VARCHAR(4) NOT NULL,
+        price DOUBLE NOT NULL,
+        amount DOUBLE NOT NULL,
+        roi DOUBLE,
+        executed_at DATETIME NOT NULL,
+        is_simulated BOOLEAN NOT NULL,
+        seed_balance DOUBLE,
+        fee DOUBLE,
+        order_uuid VARCHAR(64)
+    );
+    CREATE INDEX IF NOT EXISTS idx_trade_history_executed_at ON trade_history (executed_at);
+"""
+
+# MySQL 전용 구문 → SQLite (앱에서 쓰는 구문만)
+_REWRITES = [
+    (re.compile(r"ON DUPLICATE KEY UPDATE", re.I), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\((\w+)\)", re.I), r"excluded.\1"),
+    (re.compile(r"\bNOW\(\)", re.I), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bGREATEST\(", re.I), "MAX("),
+    (re.compile(r"%s"), "?"),
+]
+
+
+def _datetime(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_converter("DATETIME", _datetime)
+sqlite3.register_adapter(datetime, lambda dt: dt.isoformat(" "))
+sqlite3.register_adapter(pd.Timestamp, lambda ts: ts.isoformat(" "))
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+
+def translate(sql: str) -> str:
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class SqliteCursor:
+    """pymysql 커서처럼 with 문과 %s 파라미터를 받는 SQLite 커서"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def execute(self, sql: str, params=()):
+        self._cursor.execute(translate(sql), tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, sql: str, seq):
+        self._cursor.executemany(translate(sql), [tuple(p) for p in seq])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+
+class SqliteConnection:
+    """
+    ConnectionPool 에 넣을 수 있는 pymysql 연결 대역 (autocommit)
+    실제 MySQL 과 절대 속도는 다르므로 같은 백엔드끼리의 커밋 간 비교용
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self.open = True
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor())
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def ping(self, reconnect: bool = False):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._conn.close()
+
+
+def create_schema(path: str):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+
+
+class FakeUpbit:
+    """
+    pyupbit 시세 함수 대역 - 가상 시각까지의 랜덤워크 1분봉을 만들어 돌려준다
+    (네트워크 없이 틱 경로 전체를 돌리기 위한 용도, 주문까지 필요하면 bench.exchange.FakeExchange)
+    """
+
+    def __init__(self, start: datetime, price: float = 100_000_000.0, seed: int = 42):
+        self.now = start.replace(second=0, microsecond=0)
+        self._rng = np.random.default_rng(seed)
+        self._candles = {}
+        self._last_close = price
+        self.calls = {"get_ohlcv": 0, "get_current_price": 0}
+
+    def advance(self, minutes: int = 1):
+        self.now += timedelta(minutes=minutes)
+
+    def _candle(self, ts: datetime) -> tuple:
+        candle = self._candles.get(ts)
+        if candle is None:
+            open_ = self._last_close
+            close = open_ * (1 + self._rng.normal(0, 0.001))
+            high = max(open_, close) * (1 + abs(self._rng.normal(0, 0.0005)))
+            low = min(open_, close) * (1 - abs(self._rng.normal(0, 0.0005)))
+            volume = float(self._rng.gamma(2.0, 0.5))
+            candle = self._candles[ts] = (open_, high, low, close, volume)
+            self._last_close = close
+        return candle
+
+    def history(self, count: int) -> pd.DataFrame:
+        """현재 가상 시각까지 count 개 1분봉 (pyupbit.get_ohlcv 형식)"""
+        index = [self.now - timedelta(minutes=i) for i in range(count - 1, -1, -1)]
+        rows = [self._candle(ts) for ts in index]
+        df = pd.DataFrame(rows, index=pd.DatetimeIndex(index), columns=["open", "high", "low", "close", "volume"])
+        df["value"] = df["close"] * df["volume"]
+        return df
+
+    def get_ohlcv(self, ticker: str = "KRW-BTC", interval: str = "minute1", count: int = 200, to=None, **kwargs):
+        self.calls["get_ohlcv"] += 1
+        return self.history(count)
+
+    def get_current_price(self, ticker="KRW-BTC", **kwargs):
+        self.calls["get_current_price"] += 1
+        return self._candle(self.now)[3]
+
+    def install(self, module):
+        """pyupbit 모듈의 시세 함수를 이 객체로 교체"""
+        module.get_ohlcv = self.get_ohlcv
+        module.get_current_price = self.get_current_price
+
+
+def synthetic_candles(n: int, seed: int = 0, start: str = "2024-01-01") -> pd.DataFrame:
+    """지표 처리량 측정용 n개 랜덤워크 1분봉 (timestamp 컬럼 포함)"""
+    rng = np.random.default_rng(seed)
+    close = 100_000_000.0 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, n))
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="min"),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": rng.gamma(2.0, 0.5, n),
+    })
+
+
+def prepare_environment(workdir: str):
+    """
+    앱 모듈 import 전에 호출 - 상대 경로 파일(logs, 시드 파일, 히스토리 저장소)이
+    작업 디렉토리에 생기도록 이동하고 외부 연동(실매매, Discord)을 끈다
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    os.environ["LIVE_MODE"] = "False"
+    os.environ["DISCORD_WEBHOOK_URL"] = ""
+    os.environ["LOG_JSON"] = "False"
+
+
+def install_database(path: str, max_size: int = 4):
+    """app.utils.db_connect 의 연결 풀을 SQLite 파일 기반 풀로 교체"""
+    from app.utils import db_connect
+
+    create_schema(path)
+    db_connect.pool.close_all()
+    db_connect.pool = db_connect.ConnectionPool(connect=lambda: SqliteConnection(path), max_size=max_size)
+    return db_connect.pool
@@ -0,0 +1,212 @@
+# bench/indicators.py
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 경계 길이(윈도우 앞뒤) + 긴 구간
+CHECK_SIZES = [0, 1, 2, 5, 8, 9, 12, 13, 14, 15, 19, 20, 21, 26, 27, 35, 100, 1_000, 50_000, 500_000]
+BENCH_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+BATCHES = [(100, 1_440), (50, 10_000), (8, 100_000)]
+
+# 허용 오차 - RSI 는 0~100 절대값, 가격 단위 지표는 가격 수준 대비
+# (pandas rolling std 는 처음부터 누적 갱신이라 긴 구간에서 가격 대비 1e-11 정도 어긋남, 커널은 블록마다 누적합을 새로 시작)
+RSI_ATOL = 1e-9
+PRICE_RTOL = 1e-9
+
+
+def _frame(close: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"close": close})
+
+
+def _pandas_all(df: pd.DataFrame) -> dict:
+    from app import strategy, strategy2
+
+    lower, middle, upper = strategy2.calculate_bollinger_bands(df)
+    macd, signal, histogram = strategy2.calculate_macd(df)
+    return {
+        "rsi": strategy2.calculate_rsi(df).to_numpy(),
+        "rsi(strategy)": strategy.calculate_rsi(df).to_numpy(),
+        "bb_lower": lower.to_numpy(), "bb_middle": middle.to_numpy(), "bb_upper": upper.to_numpy(),
+        "macd": macd.to_numpy(), "macd_signal": signal.to_numpy(), "macd_hist": histogram.to_numpy(),
+    }
+
+
+def _kernel_all(close: np.ndarray, std_dev=2.0) -> dict:
+    from app import indicators
+
+    rsi = indicators.rsi(close)
+    bands = indicators.bollinger_bands(close, std_dev=std_dev)
+    macd = indicators.macd(close)
+    return {
+        "rsi": rsi, "rsi(strategy)": rsi,
+        "bb_lower": bands[0], "bb_middle": bands[1], "bb_upper": bands[2],
+        "macd": macd[0], "macd_signal": macd[1], "macd_hist": macd[2],
+    }
+
+
+def _compare(name: str, got: np.ndarray, want: np.ndarray, scale: float) -> tuple:
+    """(통과 여부, 최대 오차, 설명)"""
+    got_nan, want_nan = np.isnan(got), np.isnan(want)
+    if got.shape != want.shape or not np.array_equal(got_nan, want_nan):
+        return False, float("inf"), "NaN 위치가 다름"
+    valid = ~want_nan
+    if not valid.any():
+        return True, 0.0, ""
+    error = float(np.max(np.abs(got[valid] - want[valid])))
+    tolerance = RSI_ATOL if name.startswith("rsi") else PRICE_RTOL * scale
+    return error <= tolerance, error, f"허용 {tolerance:.1e}"
+
+
+def check(sizes: list) -> list:
+    """1-D / 종목 배치 / 파라미터(std_dev) 배치 / 버퍼 재사용 결과를 pandas 함수와 비교"""
+    from app import indicators
+    from bench.fakes import synthetic_candles
+
+    results = []
+
+    def record(case: str, name: str, got, want, scale: float):
+        ok, error, note = _compare(name, np.asarray(got), np.asarray(want), scale)
+        results.append({"case": case, "indicator": name, "ok": ok, "max_error": error})
+        if not ok:
+            print(f"  ✗ {case:<24} {name:<14} 최대 오차 {error:.3e} ({note})", file=sys.stderr)
+
+    for n in sizes:
+        close = synthetic_candles(n, seed=n)["close"].to_numpy() if n else np.empty(0)
+        scale = float(np.abs(close).max()) if n else 1.0
+        want = _pandas_all(_frame(close))
+        for name, got in _kernel_all(close).items():
+            record(f"1d n={n}", name, got, want[name], scale)
+
+    # 종목 배치 - 행마다 다른 가격 수준/경로
+    rows, n = 6, 3_000
+    batch = np.stack([synthetic_candles(n, seed=100 + i)["close"].to_numpy() * (10 ** (i - 2)) for i in range(rows)])
+    got = _kernel_all(batch)
+    for i in range(rows):
+        want = _pandas_all(_frame(batch[i]))
+        for name in want:
+            record(f"batch row={i}", name, got[name][i], want[name], float(np.abs(batch[i]).max()))
+
+    # 파라미터 배치 - 같은 종가를 복사 없이 펼치고 행마다 std_dev 다르게
+    from app import strategy2
+
+    close = synthetic_candles(5_000, seed=7)["close"].to_numpy()
+    std_devs = np.array([1.5, 2.0, 2.5, 3.0])
+    bands = indicators.bollinger_bands(np.broadcast_to(close, (len(std_devs), close.size)), std_dev=std_devs)
+    for i, k in enumerate(std_devs):
+        lower, _, upper = strategy2.calculate_bollinger_bands(_frame(close), std_dev=k)
+        record(f"params std_dev={k}", "bb_lower", bands[0][i], lower.to_numpy(), float(close.max()))
+        record(f"params std_dev={k}", "bb_upper", bands[2][i], upper.to_numpy(), float(close.max()))
+
+    # 버퍼 재사용 / 제자리 EMA
+    want = _pandas_all(_frame(close))
+    out = np.full(close.shape, 123.0)
+    indicators.rsi(close, out=out)
+    record("out reuse", "rsi", out, want["rsi"], 1.0)
+    macd_out = np.full((3,) + close.shape, -1.0)
+    indicators.macd(close, out=macd_out)
+    record("out reuse", "macd_hist", macd_out[2], want["macd_hist"], float(close.max()))
+    inplace = close.copy()
+    indicators.ema(inplace, 12, out=inplace)
+    record("ema in-place", "ema12", inplace, _frame(close)["close"].ewm(span=12, adjust=False).mean().to_numpy(),
+           float(close.max()))
+    return results
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _repeat_for(n: int) -> int:
+    return max(1, min(20, 1_000_000 // max(n, 1)))
+
+
+def bench(sizes: list, batches: list) -> list:
+    """pandas 함수 vs 커널 (1-D 는 출력 버퍼 재사용, 배치는 pandas 행별 반복 vs 커널 한 번)"""
+    from app import indicators, strategy2
+    from bench.fakes import synthetic_candles
+
+    results = []
+
+    def record(case: str, name: str, pandas_s: float, kernel_s: float):
+        results.append({"case": case, "indicator": name, "pandas_ms": pandas_s * 1000,
+                        "kernel_ms": kernel_s * 1000, "speedup": pandas_s / kernel_s if kernel_s else None})
+        print(f"  {case:<18} {name:<16} pandas {pandas_s * 1000:>10.2f} ms   kernel {kernel_s * 1000:>9.2f} ms"
+              f"   x{pandas_s / kernel_s:>6.1f}", file=sys.stderr)
+
+    for n in sizes:
+        df = synthetic_candles(n)
+        close = df["close"].to_numpy()
+        one, three = np.empty(n), np.empty((3, n))
+        repeat = _repeat_for(n)
+        case = f"1d n={n:,}"
+        record(case, "rsi", _best_of(lambda: strategy2.calculate_rsi(df), repeat),
+               _best_of(lambda: indicators.rsi(close, out=one), repeat))
+        record(case, "bollinger_bands", _best_of(lambda: strategy2.calculate_bollinger_bands(df), repeat),
+               _best_of(lambda: indicators.bollinger_bands(close, out=three), repeat))
+        record(case, "macd", _best_of(lambda: strategy2.calculate_macd(df), repeat),
+               _best_of(lambda: indicators.macd(close, out=three), repeat))
+
+    for rows, n in batches:
+        closes = np.stack([synthetic_candles(n, seed=i)["close"].to_numpy() for i in range(rows)])
+        frames = [_frame(row) for row in closes]
+        one, three = np.empty(closes.shape), np.empty((3,) + closes.shape)
+        repeat = _repeat_for(rows * n)
+        case = f"batch {rows}x{n:,}"
+        record(case, "rsi", _best_of(lambda: [strategy2.calculate_rsi(f) for f in frames], repeat),
+               _best_of(lambda: indicators.rsi(closes, out=one), repeat))
+        record(case, "bollinger_bands",
+               _best_of(lambda: [strategy2.calculate_bollinger_bands(f) for f in frames], repeat),
+               _best_of(lambda: indicators.bollinger_bands(closes, out=three), repeat))
+        record(case, "macd", _best_of(lambda: [strategy2.calculate_macd(f) for f in frames], repeat),
+               _best_of(lambda: indicators.macd(closes, out=three), repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="numpy 지표 커널 정확도 검증 (pandas 함수 기준) + 속도 비교")
+    parser.add_argument("--check-sizes", type=int, nargs="+", default=CHECK_SIZES)
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCH_SIZES, help="1-D 속도 측정 캔들 수")
+    parser.add_argument("--batches", nargs="+", default=[f"{r}x{n}" for r, n in BATCHES],
+                        help="배치 속도 측정 (행 수x캔들 수)")
+    parser.add_argument("--skip-bench", action="store_true", help="정확도 검증만")
+    parser.add_argument("--output", help="결과 JSON 경로")
+    args = parser.parse_args()
+    batches = [tuple(int(v) for v in item.lower().split("x")) for item in args.batches]
+    output = os.path.abspath(args.output) if args.output else None
+
+    # 앱 모듈은 작업 디렉토리 이동 / 환경 변수 설정 뒤에 import
+    sys.path.insert(0, ROOT)
+    from bench.fakes import prepare_environment
+
+    prepare_environment(tempfile.mkdtemp(prefix="autotrader-indicators-"))
+    print("▶ 정확도 (pandas 함수 대비)", file=sys.stderr)
+    checks = check(args.check_sizes)
+    failed = [c for c in checks if not c["ok"]]
+    print(f"  {len(checks) - len(failed)}/{len(checks)} 통과", file=sys.stderr)
+
+    results = {"check": checks}
+    if not args.skip_bench:
+        print("▶ 속도", file=sys.stderr)
+        results["bench"] = bench(args.sizes, batches)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"📝 {output}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# bench/replay.py
+
+import argparse
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KST = pytz.timezone("Asia/Seoul")
+
+
+class ReplayFinished(Exception):
+    """재생할 구간이 끝남 (가상 sleep 에서 던져 start_loop 를 빠져나온다)"""
+
+
+class VirtualClock:
+    """
+    재생용 가상 시계 - sleep() 을 호출해야만 시간이 흐른다
+    time() 은 epoch 초, monotonic() 은 시작 후 흐른 초, kst_now() 는 get_kst_now 대역
+    시간이 흐를 때마다 on_advance(clock) 를 호출하고, until(KST naive)을 넘기면 ReplayFinished
+    """
+
+    def __init__(self, start: datetime, until: datetime = None, on_advance=None):
+        self._wall = KST.localize(start).timestamp()
+        self._mono = 0.0
+        self.until = until
+        self.on_advance = on_advance
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self._wall
+
+    def monotonic(self) -> float:
+        return self._mono
+
+    def sleep(self, seconds: float):
+        if seconds <= 0:
+            return
+        self._wall += seconds
+        self._mono += seconds
+        self.slept += seconds
+        if self.until is not None and self.kst_naive() > self.until:
+            raise ReplayFinished()
+        if self.on_advance:
+            self.on_advance(self)
+
+    def kst_now(self) -> datetime:
+        return datetime.fromtimestamp(self._wall, pytz.utc).astimezone(KST)
+
+    def kst_naive(self) -> datetime:
+        return self.kst_now().replace(tzinfo=None)
+
+
+class _VirtualTime:
+    """main2 의 time 모듈 대역 (sleep / time / monotonic 만 가상, 나머지는 실제 time)"""
+
+    def __init__(self, clock: VirtualClock):
+        self.sleep = clock.sleep
+        self.time = clock.time
+        self.monotonic = clock.monotonic
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class _Patches:
+    """모듈 속성 교체 / 원복"""
+
+    def __init__(self):
+        self._saved = []
+
+    def set(self, owner, name: str, value):
+        self._saved.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    def restore(self):
+        for owner, name, value in reversed(self._saved):
+            setattr(owner, name, value)
+        self._saved = []
+
+
+def load_candles(start: datetime, end: datetime, sqlite_path: str = None, csv_path: str = None) -> pd.DataFrame:
+    """
+    기록된 1분봉 [start, end] 읽기
+    기본은 설정된 MySQL 의 btc_price_1min, sqlite_path / csv_path 로 다른 원본 지정
+    """
+    from bench.exchange import candles_from_csv, candles_from_db, to_ohlcv_frame
+
+    if csv_path:
+        df = candles_from_csv(csv_path)
+        return df[(df.index >= start) & (df.index <= end)]
+    if sqlite_path:
+        conn = sqlite3.connect(sqlite_path)
+        try:
+            df = pd.read_sql("""
+                SELECT timestamp, open, high, low, close, volume FROM btc_price_1min
+                WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp
+            """, conn, params=(start.isoformat(" "), end.isoformat(" ")), parse_dates=["timestamp"])
+        finally:
+            conn.close()
+        return to_ohlcv_frame(df)
+    return candles_from_db(start, end + timedelta(minutes=1))
+
+
+def replay(candles: pd.DataFrame, start: datetime, end: datetime, profile: str = None) -> dict:
+    """
+    main2.start_loop 를 수정 없이 가상 시계로 실행
+    - start 이전 봉은 시작 전에 DB 에 넣어 두고 (prepare_data 준비용) start ~ end 봉 마감을 한 틱씩 재생
+    - time.sleep / get_kst_now / pyupbit 시세를 가상 시계와 FakeExchange 로 교체
+      (스케줄러는 main2.CandleScheduler 에 가상 시계를 넣어 교체)
+    - 주문은 설정대로 (기본 LIVE_MODE=False → 모의 매매)
+    """
+    import pyupbit
+    import main2
+    from app import db_1min_btc
+    from app.utils import time_utils
+    from app.utils.db_connect import db_session
+    from app.utils.metrics import errors, rest_calls, stage_seconds
+    from app.utils.scheduler import CandleScheduler
+    from app.utils.seed_tracker import get_seed
+    from bench.exchange import FakeExchange
+    from config import TICK_OFFSET_SECONDS
+
+    warmup = candles[candles.index < start]
+    if len(warmup):
+        db_1min_btc.upsert_candles(warmup)
+
+    # 봉 마감 직후 시각을 재생하므로 현재가는 진행 중인 봉의 시가
+    clock = VirtualClock(start - timedelta(seconds=1), until=end + timedelta(seconds=TICK_OFFSET_SECONDS))
+    fake = FakeExchange(candles, quote="open", clock=clock.monotonic)
+    fake.seek(start)
+    clock.on_advance = lambda c: fake.seek(c.kst_naive())
+
+    patches = _Patches()
+    patches.set(pyupbit, "get_ohlcv", fake.get_ohlcv)
+    patches.set(pyupbit, "get_current_price", fake.get_current_price)
+    patches.set(main2, "time", _VirtualTime(clock))
+    patches.set(main2, "CandleScheduler", functools.partial(
+        CandleScheduler, clock=clock.monotonic, wall_clock=clock.time, sleep=clock.sleep))
+    original_now = time_utils.get_kst_now
+    for module in list(sys.modules.values()):
+        if getattr(module, "get_kst_now", None) is original_now:
+            patches.set(module, "get_kst_now", clock.kst_now)
+
+    profiler = cProfile.Profile() if profile else None
+    started = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        main2.start_loop()
+    except ReplayFinished:
+        pass
+    finally:
+        if profiler:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+        patches.restore()
+
+    with db_session() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT trade_type, price, amount, roi, executed_at FROM trade_history ORDER BY id
+        """)
+        trades = [{"type": t, "price": p, "amount": a, "roi": r, "executed_at": str(at)}
+                  for t, p, a, r, at in cursor.fetchall()]
+
+    stages = {dict(key)["stage"]: {"count": data["count"], "mean_ms": data["sum"] / data["count"] * 1000,
+                                   "max_ms": data["max"] * 1000}
+              for key, data in stage_seconds.snapshot().items() if data["count"]}
+    ticks = stages.get("tick", {}).get("count", 0)
+    result = {
+        "start": start.isoformat(" "),
+        "end": end.isoformat(" "),
+        "candles": len(candles),
+        "ticks": ticks,
+        "wall_seconds": elapsed,
+        "virtual_seconds": clock.slept,
+        "ticks_per_second": ticks / elapsed if elapsed else None,
+        "speedup": clock.slept / elapsed if elapsed else None,
+        "trades": trades,
+        "seed": get_seed(),
+        "stages": stages,
+        "rest_calls": {dict(k).get("endpoint"): v for k, v in rest_calls._values.items()},
+        "errors": {dict(k).get("stage"): v for k, v in errors._values.items()},
+    }
+    if profiler:
+        profiler.dump_stats(profile)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+        result["profile"] = profile
+        print(out.getvalue(), file=sys.stderr)
+    return result
+
+
+def _parse_time(value: str) -> datetime:
+    return pd.Timestamp(value).to_pydatetime().replace(second=0, microsecond=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록된 1분봉으로 main2 실제 루프를 가상 시계로 재생")
+    parser.add_argument("--start", type=_parse_time, required=True, help="재생 시작 (KST, 예: 2026-01-01 09:00)")
+    parser.add_argument("--end", type=_parse_time, help="재생 끝 (KST, 기본: 시작 + 1일)")
+    parser.add_argument("--warmup", type=int, default=1440, help="시작 전 DB 에 넣어 둘 1분봉 수 (분)")
+    parser.add_argument("--sqlite", help="원본 btc_price_1min 이 들어 있는 SQLite 파일 (기본: 설정된 MySQL)")
+    parser.add_argument("--csv", help="원본 1분봉 CSV (timestamp,open,high,low,close,volume)")
+    parser.add_argument("--profile", help="cProfile 결과 저장 경로 (.prof, 메인 스레드만 - 동시 I/O 구간은 stages 참고)")
+    parser.add_argument("--with-logging", action="store_true", help="틱마다 INFO 로그 출력")
+    parser.add_argument("--output", help="결과 JSON 경로 (매매 내역 포함, 커밋 간 회귀 비교용)")
+    args = parser.parse_args()
+    end = args.end or args.start + timedelta(days=1)
+    profile = os.path.abspath(args.profile) if args.profile else None
+    output = os.path.abspath(args.output) if args.output else None
+    sqlite_path = os.path.abspath(args.sqlite) if args.sqlite else None
+    csv_path = os.path.abspath(args.csv) if args.csv else None
+
+    # 앱 모듈은 작업 디렉토리 이동 / 환경 변수 설정 뒤에 import (지표 HTTP 엔드포인트는 끔)
+    sys.path.insert(0, ROOT)
+    from bench.fakes import install_database, prepare_environment
+
+    workdir = tempfile.mkdtemp(prefix="autotrader-replay-")
+    prepare_environment(workdir)
+    os.environ["METRICS_PORT"] = "0"
+
+    import logging
+    from app.utils.logger import get_logger
+    if not args.with_logging:
+        get_logger().setLevel(logging.WARNING)
+
+    candles = load_candles(args.start - timedelta(minutes=args.warmup), end, sqlite_path, csv_path)
+    if candles[candles.index >= args.start].empty:
+        parser.error(f"{args.start} ~ {end} 구간의 1분봉이 없습니다")
+    install_database(os.path.join(workdir, "replay.sqlite3"))
+
+    result = replay(candles, args.start, end, profile)
+    print(f"▶ {result['ticks']} ticks / {result['wall_seconds']:.2f}s "
+          f"({result['ticks_per_second']:.0f} ticks/s, x{result['speedup']:.0f}) "
+          f"trades={len(result['trades'])} seed={result['seed']:,.0f}", file=sys.stderr)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"📝 {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# bench/run.py
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+# 틱 / 거래소 묶음은 프로세스 공용 버퍼 / 지표 스트림을 채우므로 마지막에 실행
+SUITES = ("indicators", "db", "tick", "exchange")
+_MISSING = object()
+
+
+class StageTimer:
+    """
+    모듈 함수 / 메서드를 감싸 호출 시간을 단계별로 모은다
+    wrap() 한 대상은 restore() 로 원래대로 되돌린다
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self._patched = []
+
+    def wrap(self, owner, name: str, label: str = None):
+        label = label or name
+        original = getattr(owner, name)
+        samples = self.samples.setdefault(label, [])
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+
+        # 인스턴스 메서드를 감싼 경우 restore 때 인스턴스 속성만 지우면 됨
+        self._patched.append((owner, name, vars(owner).get(name, _MISSING)))
+        setattr(owner, name, timed)
+
+    def measure(self, label: str, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.samples.setdefault(label, []).append(time.perf_counter() - started)
+
+    def restore(self):
+        for owner, name, original in reversed(self._patched):
+            if original is _MISSING:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+
+    def summary(self) -> dict:
+        import numpy as np
+
+        result = {}
+        for label, samples in self.samples.items():
+            if not samples:
+                continue
+            ms = np.asarray(samples) * 1000
+            result[label] = {
+                "calls": len(ms),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+                "total_ms": float(ms.sum()),
+            }
+        return result
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _repeat_for(n: int) -> int:
+    return max(1, min(20, 1_000_000 // n))
+
+
+def bench_tick(ticks: int, history: int) -> dict:
+    """
+    main2 의 틱 한 번(run_tick)을 가짜 시세 + SQLite 로 반복 실행하며 단계별 시간 측정
+    시작 준비(prepare_data)는 한 번만 따로 잰다
+    """
+    import pyupbit
+    import main2
+    from app import db_1min_btc
+    from app.candle_buffer import CandleBuffer
+    from app.history_store import HistoryStore
+    from app.indicator_stream import IndicatorStream
+    from app.rollup import RollupEngine
+    from app.utils.db_connect import db_session, get_pool_metrics
+    from bench.fakes import FakeUpbit
+
+    upbit = FakeUpbit(datetime(2026, 1, 1, 9, 0))
+    upbit.install(pyupbit)
+    db_1min_btc.upsert_candles(upbit.history(history))
+
+    timer = StageTimer()
+    timer.measure("prepare_data", main2.prepare_data)
+
+    timer.wrap(main2, "save_1min_btc_to_db")
+    timer.wrap(db_1min_btc, "upsert_candles")
+    timer.wrap(CandleBuffer, "extend_from_df", "candle_buffer.extend_from_df")
+    timer.wrap(IndicatorStream, "update_from_df", "indicator_stream.update_from_df")
+    timer.wrap(RollupEngine, "update_from_df", "rollup.update_from_df")
+    timer.wrap(RollupEngine, "flush", "rollup.flush")
+    timer.wrap(HistoryStore, "append_df", "history_store.append_df")
+    timer.wrap(main2.positions, "open_position", "positions.open_position")
+    timer.wrap(main2, "check_entry_signal")
+    timer.wrap(main2, "check_exit_signal")
+    timer.wrap(main2, "get_current_price")
+    timer.wrap(main2, "buy")
+    timer.wrap(main2, "sell")
+
+    try:
+        for _ in range(ticks):
+            upbit.advance()
+            with db_session():
+                timer.measure("run_tick", main2.run_tick)
+    finally:
+        timer.restore()
+
+    pool = get_pool_metrics()
+    return {
+        "ticks": ticks,
+        "history": history,
+        "stages": timer.summary(),
+        "fake_upbit_calls": dict(upbit.calls),
+        "db_checkouts": pool["checkouts"],
+    }
+
+
+def bench_exchange(ticks: int, history: int, error_rate: float, timeout_rate: float,
+                   fill_latency: float, transport: str) -> dict:
+    """
+    가짜 거래소(1분봉 재생 + 시장가 주문 + 장애 주입)에 붙여 main2.run_tick 을 실매매 경로로 최대한 빠르게 반복
+    처리량(틱/초)과 장애 시 동작(오류 카운터, 주문/체결 수)을 기록한다
+    transport="http" 면 주문은 로컬 HTTP 서버를 거쳐 UpbitClient 로 보낸다 (시세는 항상 프로세스 내)
+    """
+    import functools
+    import pyupbit
+    import main2
+    from app import db_1min_btc, exchange, trader
+    from app.utils.db_connect import db_session
+    from app.utils.metrics import errors
+    from bench.exchange import FakeExchange, base_url, serve
+    from bench.fakes import synthetic_candles
+
+    # tick 묶음이 채운 버퍼보다 뒤 시각에서 시작
+    fake = FakeExchange(synthetic_candles(history + ticks, seed=7, start="2026-02-01"), cursor=history - 1,
+                        fill_latency=fill_latency, error_rate=error_rate, timeout_rate=timeout_rate, seed=7)
+    fake.install(pyupbit)
+    db_1min_btc.upsert_candles(fake.history(history))
+
+    server = None
+    if transport == "http":
+        server = serve(fake, timeout_delay=0.3)
+        client = exchange.UpbitClient("bench", "bench", base_url=base_url(server), timeout=0.2)
+        executor = exchange.OrderExecutor(client, poll_seconds=0.001, fill_timeout=5.0)
+    else:
+        executor = fake.executor()
+    original = (exchange._executor, main2.buy, main2.sell)
+    exchange._executor = executor
+    main2.buy = functools.partial(trader.buy, is_simulated=False)
+    main2.sell = functools.partial(trader.sell, is_simulated=False)
+
+    before = dict(errors._values)
+    main2.prepare_data()
+    completed = 0
+    started = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            if not fake.advance():
+                break
+            with db_session():
+                main2.run_tick()
+            completed += 1
+        elapsed = time.perf_counter() - started
+        drained = executor.wait_idle(10)
+    finally:
+        exchange._executor, main2.buy, main2.sell = original
+        if server is not None:
+            server.shutdown()
+
+    with db_session() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT trade_type, COUNT(*) FROM trade_history GROUP BY trade_type")
+        trades = dict(cursor.fetchall())
+    return {
+        "ticks": completed,
+        "seconds": elapsed,
+        "ticks_per_second": completed / elapsed if elapsed else None,
+        "transport": transport,
+        "error_rate": error_rate,
+        "timeout_rate": timeout_rate,
+        "orders_drained": drained,
+        "trades": trades,
+        "exchange": fake.stats(),
+        "errors": {"/".join(f"{k}={v}" for k, v in key): value - before.get(key, 0)
+                   for key, value in errors._values.items() if value != before.get(key, 0)},
+    }
+
+
+def bench_indicators(sizes: list, stream_max: int, scoring_max: int) -> list:
+    """strategy2 지표 함수 / numpy 지표 커널 / 점수 계산 / 증분 지표 스트림의 캔들 수별 처리량"""
+    import numpy as np
+    from app import indicators, strategy2
+    from app.indicator_stream import IndicatorStream
+    from bench.fakes import synthetic_candles
+
+    results = []
+
+    def record(name: str, n: int, seconds: float):
+        results.append({"name": name, "candles": n, "seconds": seconds,
+                        "candles_per_sec": n / seconds if seconds else None})
+        print(f"  {name:<28} {n:>11,}  {seconds * 1000:>10.2f} ms", file=sys.stderr)
+
+    original_fetch = strategy2.fetch_recent_data
+    try:
+        for n in sizes:
+            df = synthetic_candles(n)
+            repeat = _repeat_for(n)
+            record("calculate_rsi", n, _best_of(lambda: strategy2.calculate_rsi(df), repeat))
+            record("calculate_bollinger_bands", n, _best_of(lambda: strategy2.calculate_bollinger_bands(df), repeat))
+            record("calculate_macd", n, _best_of(lambda: strategy2.calculate_macd(df), repeat))
+            close, three = df["close"].to_numpy(), np.empty((3, n))
+            record("indicators.rsi", n, _best_of(lambda: indicators.rsi(close, out=three[0]), repeat))
+            record("indicators.bollinger_bands", n, _best_of(lambda: indicators.bollinger_bands(close, out=three), repeat))
+            record("indicators.macd", n, _best_of(lambda: indicators.macd(close, out=three), repeat))
+
+            if n <= scoring_max:
+                # 지표 스트림이 준비되지 않은 상태의 DataFrame 경로 (진입 점수 전체 계산)
+                strategy2.fetch_recent_data = lambda limit=60, df=df: df.copy()
+                record("check_entry_signal", n, _best_of(strategy2.check_entry_signal, repeat))
+                record("check_exit_signal", n, _best_of(lambda: strategy2.check_exit_signal(df["close"].iloc[0]), repeat))
+
+            if n <= stream_max:
+                record("indicator_stream.update", n, _best_of(lambda: IndicatorStream().update_from_df(df), 1))
+            del df
+    finally:
+        strategy2.fetch_recent_data = original_fetch
+    return results
+
+
+def bench_db(rows: int) -> list:
+    """DB / 로컬 저장소 쓰기 처리량"""
+    import pandas as pd
+    from app.db_1min_btc import upsert_candles
+    from app.history_store import HistoryStore
+    from app.pnl_summary import ensure_daily_pnl
+    from app.position_manager import PositionManager
+    from app.rollup import RollupEngine
+    from app.utils.db_connect import db_session
+    from app.utils.seed_tracker import SeedLedger
+    from config import CANDLE_BATCH_SIZE
+    from bench.fakes import synthetic_candles
+
+    results = []
+
+    def record(name: str, count: int, seconds: float, **extra):
+        results.append({"name": name, "rows": count, "seconds": seconds,
+                        "rows_per_sec": count / seconds if seconds else None, **extra})
+        print(f"  {name:<28} {count:>11,}  {count / seconds:>12,.0f} rows/s", file=sys.stderr)
+
+    # 빈 DB 에서 load() 하면 롤업 테이블만 만들고 바로 증분 집계 가능 상태가 됨
+    engine = RollupEngine()
+    engine.load()
+    ensure_daily_pnl()
+
+    df = synthetic_candles(rows, start="2020-01-01").set_index("timestamp")
+    for batch_size in sorted({1, 100, CANDLE_BATCH_SIZE}):
+        n = min(rows, 2_000) if batch_size == 1 else rows
+        part = df.iloc[:n]
+        with db_session():
+            started = time.perf_counter()
+            upsert_candles(part, batch_size)
+            record("upsert_candles", n, time.perf_counter() - started, batch_size=batch_size)
+
+    part = df.iloc[:min(rows, 20_000)]
+    started = time.perf_counter()
+    engine.update_from_df(part)
+    record("rollup.update", len(part), time.perf_counter() - started)
+    dirty = len(engine._dirty)
+    started = time.perf_counter()
+    engine.flush()
+    record("rollup.flush", dirty, time.perf_counter() - started)
+
+    store = HistoryStore(root=os.path.join(os.getcwd(), "data", "bench-history"))
+    started = time.perf_counter()
+    store.append_df(df)
+    record("history_store.append_df", rows, time.perf_counter() - started, mode="bulk")
+    tail = synthetic_candles(1_000, seed=1, start=str(df.index[-1] + pd.Timedelta(minutes=1))).set_index("timestamp")
+    started = time.perf_counter()
+    for i in range(len(tail)):
+        store.append_df(tail.iloc[i:i + 1])
+    record("history_store.append_df", len(tail), time.perf_counter() - started, mode="per_minute")
+
+    manager = PositionManager()
+    trades = 500
+    started = time.perf_counter()
+    for i in range(trades):
+        if i % 2 == 0:
+            manager.record_trade("buy", 100_000_000.0, 0.0001, None, True, 100_000)
+        else:
+            manager.record_trade("sell", 100_500_000.0, 0.0001, 0.004, True, 100_000)
+    record("positions.record_trade", trades, time.perf_counter() - started)
+
+    ledger = SeedLedger("bench_seed.json", "bench_seed.journal")
+    ops = 1_000
+    started = time.perf_counter()
+    for _ in range(ops):
+        ledger.apply(-1)
+    record("seed_ledger.apply", ops, time.perf_counter() - started)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="틱 / 지표 / DB 쓰기 벤치마크 (가짜 pyupbit + SQLite)")
+    parser.add_argument("--suite", choices=SUITES, action="append",
+                        help="실행할 묶음 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--history", type=int, default=1440, help="틱 시작 전 DB에 넣어 둘 1분봉 수")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="지표 측정 캔들 수")
+    parser.add_argument("--stream-max", type=int, default=100_000, help="지표 스트림 측정 최대 캔들 수")
+    parser.add_argument("--scoring-max", type=int, default=1_000_000, help="진입/청산 점수 측정 최대 캔들 수")
+    parser.add_argument("--db-rows", type=int, default=100_000)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="exchange 묶음: 429 응답 확률")
+    parser.add_argument("--timeout-rate", type=float, default=0.01, help="exchange 묶음: 타임아웃 확률")
+    parser.add_argument("--fill-latency", type=float, default=0.0, help="exchange 묶음: 주문 후 체결까지 초")
+    parser.add_argument("--transport", choices=("inprocess", "http"), default="inprocess",
+                        help="exchange 묶음: 주문 경로")
+    parser.add_argument("--with-logging", action="store_true", help="INFO 로그 출력 비용까지 포함")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: bench/results/<시각>-<커밋>.json)")
+    args = parser.parse_args()
+    suites = [suite for suite in SUITES if not args.suite or suite in args.suite]
+
+    commit = _git_commit()
+    output = os.path.abspath(args.output) if args.output else os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+
+    # 앱 모듈은 작업 디렉토리 이동 / 환경 변수 설정 뒤에 import
+    sys.path.insert(0, ROOT)
+    from bench.fakes import install_database, prepare_environment
+
+    workdir = tempfile.mkdtemp(prefix="autotrader-bench-")
+    prepare_environment(workdir)
+
+    import logging
+    from app.utils.logger import get_logger
+    if not args.with_logging:
+        get_logger().setLevel(logging.WARNING)
+
+    results = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "db_backend": "sqlite",
+            "logging": args.with_logging,
+            "args": vars(args),
+        },
+    }
+
+    # 묶음마다 DB 파일을 새로 만들어 서로 영향이 없게 함
+    for suite in suites:
+        install_database(os.path.join(workdir, f"{suite}.sqlite3"))
+        print(f"▶ {suite}", file=sys.stderr)
+        if suite == "tick":
+            results["tick"] = bench_tick(args.ticks, args.history)
+            for label, stats in results["tick"]["stages"].items():
+                print(f"  {label:<34} n={stats['calls']:<6} mean={stats['mean_ms']:.3f} ms "
+                      f"p95={stats['p95_ms']:.3f} ms", file=sys.stderr)
+        elif suite == "indicators":
+            results["indicators"] = bench_indicators(args.sizes, args.stream_max, args.scoring_max)
+        elif suite == "db":
+            results["db"] = bench_db(args.db_rows)
+        elif suite == "exchange":
+            results["exchange"] = bench_exchange(args.ticks, args.history, args.error_rate, args.timeout_rate,
+                                                 args.fill_latency, args.transport)
+            print(f"  {results['exchange']['ticks_per_second']:.0f} ticks/s, "
+                  f"faults={results['exchange']['exchange']['faults']}, trades={results['exchange']['trades']}",
+                  file=sys.stderr)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"📝 {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,15 +15,77 @@ if os.getenv("ENV") != "production":
 # 공통 설정
 LIVE_MODE = os.getenv("LIVE_MODE", "False") == "True"
 
+# 구조화 로그 (logs/<날짜>.jsonl) 출력 여부
+LOG_JSON = os.getenv("LOG_JSON", "False") == "True"
+
 UPBIT_ACCESS_KEY = os.getenv("UPBIT_ACCESS_KEY")
 UPBIT_SECRET_KEY = os.getenv("UPBIT_SECRET_KEY")
+# 업비트 API 주소 (로컬 가짜 거래소로 바꿔 시험할 때 변경), 거래 수수료율
+UPBIT_API_URL = os.getenv("UPBIT_API_URL", "https://api.upbit.com")
+UPBIT_FEE_RATE = float(os.getenv("UPBIT_FEE_RATE", 0.0005))
+# 실주문 체결 확인 - 상태 조회 주기, 체결 대기 최대 시간, 시간 초과 후 느린 조회 주기 (초)
+ORDER_POLL_SECONDS = float(os.getenv("ORDER_POLL_SECONDS", 0.5))
+ORDER_FILL_TIMEOUT = float(os.getenv("ORDER_FILL_TIMEOUT", 30))
+ORDER_STALE_POLL_SECONDS = float(os.getenv("ORDER_STALE_POLL_SECONDS", 10))
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
+# Discord 알림 큐 크기, 묶어서 보낼 시간 창 (초)
+DISCORD_QUEUE_SIZE = int(os.getenv("DISCORD_QUEUE_SIZE", 100))
+DISCORD_COALESCE_SECONDS = float(os.getenv("DISCORD_COALESCE_SECONDS", 2))
 
 COIN_TICKER = "KRW-BTC"
 TRADE_AMOUNT = int(os.getenv("TRADE_AMOUNT", 10000))
 TAKE_PROFIT = float(os.getenv("TAKE_PROFIT", 0.015))
 STOP_LOSS = float(os.getenv("STOP_LOSS", -0.01))
 
+# 시세 수신 방식: "rest" (60초 폴링) 또는 "websocket" (실시간 피드)
+MARKET_FEED = os.getenv("MARKET_FEED", "rest")
+UPBIT_WS_URL = os.getenv("UPBIT_WS_URL", "wss://api.upbit.com/websocket/v1")
+
+# 1분봉 일괄 저장 (한 문장당 최대 행 수, 버퍼 flush 주기)
+CANDLE_BATCH_SIZE = int(os.getenv("CANDLE_BATCH_SIZE", 1000))
+CANDLE_FLUSH_SECONDS = float(os.getenv("CANDLE_FLUSH_SECONDS", 5))
+
+# 과거 1분봉 백필 (업비트 시세 API 초당 요청 수 제한 이내로, 진행 상태 파일)
+UPBIT_QUOTATION_RPS = float(os.getenv("UPBIT_QUOTATION_RPS", 8))
+BACKFILL_STATE_FILE = os.getenv("BACKFILL_STATE_FILE", "backfill_state.json")
+
+# 메모리 포지션 상태를 trade_history 와 다시 맞추는 주기 (초)
+POSITION_RECONCILE_SECONDS = float(os.getenv("POSITION_RECONCILE_SECONDS", 300))
+
+# 메모리 캔들 버퍼 크기 (1분봉 개수, 기본 하루치)
+CANDLE_BUFFER_SIZE = int(os.getenv("CANDLE_BUFFER_SIZE", 1440))
+
+# 1분봉 컬럼형 로컬 저장소 (수집 시 함께 기록)
+HISTORY_STORE_ENABLED = os.getenv("HISTORY_STORE_ENABLED", "True") == "True"
+HISTORY_STORE_DIR = os.getenv("HISTORY_STORE_DIR", "data/history")
+
+# 타임프레임별 메모리에 보관할 롤업 봉 개수 (5분봉 1주, 15분봉 30일, 1시간봉 90일, 일봉 약 3년)
+ROLLUP_CAPACITY = {
+    "5m": int(os.getenv("ROLLUP_5M_SIZE", 2016)),
+    "15m": int(os.getenv("ROLLUP_15M_SIZE", 2880)),
+    "1h": int(os.getenv("ROLLUP_1H_SIZE", 2160)),
+    "1d": int(os.getenv("ROLLUP_1D_SIZE", 1000))
+}
+
+# 틱 스케줄 - 매 분 경계 + offset 초에 실행, 작업이 길어 놓친 틱은 skip(건너뜀) / catch_up(연달아 처리)
+TICK_INTERVAL_SECONDS = float(os.getenv("TICK_INTERVAL_SECONDS", 60))
+TICK_OFFSET_SECONDS = float(os.getenv("TICK_OFFSET_SECONDS", 2))
+TICK_MISSED_POLICY = os.getenv("TICK_MISSED_POLICY", "skip")
+TICK_MAX_CATCH_UP = int(os.getenv("TICK_MAX_CATCH_UP", 3))
+# 틱 안에서 동시에 실행하는 I/O 구간의 스레드 수, 구간별 제한 시간 (틱 시작 기준, 초)
+TICK_WORKERS = int(os.getenv("TICK_WORKERS", 4))
+TICK_CANDLE_TIMEOUT = float(os.getenv("TICK_CANDLE_TIMEOUT", 15))
+TICK_PRICE_TIMEOUT = float(os.getenv("TICK_PRICE_TIMEOUT", 5))
+TICK_DB_TIMEOUT = float(os.getenv("TICK_DB_TIMEOUT", 5))
+
+# 틱 단계별 지연 / 호출 수 지표 (METRICS_PORT=0 이면 HTTP 엔드포인트 끔, METRICS_FILE 이 있으면 주기적으로 파일 기록)
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_SECONDS = float(os.getenv("METRICS_FILE_SECONDS", 15))
+
+# 대시보드 차트에 그릴 최대 봉 개수 (기간이 길면 상위 타임프레임 + 재집계로 줄임)
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", 800))
+
 DB_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
     "port": int(os.getenv("DB_PORT", 3306)),
@@ -32,3 +94,12 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME", "stockauto"),
     "charset": "utf8mb4"
 }
+
+# DB 연결 풀 설정
+DB_POOL_CONFIG = {
+    "max_size": int(os.getenv("DB_POOL_SIZE", 4)),
+    "checkout_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+    "max_idle_seconds": float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+    "health_check_interval": float(os.getenv("DB_POOL_HEALTH_CHECK", 30)),
+    "leak_threshold": float(os.getenv("DB_POOL_LEAK_THRESHOLD", 120))
+}
@@ -1,49 +1,172 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from app.utils.db_connect import get_connection
-from app.utils.seed_tracker import get_seed
-from datetime import datetime
+from app.pnl_summary import ensure_daily_pnl
+from app.rollup import downsample_ohlcv, pick_timeframe
+from app.utils.db_connect import db_session
+from app.utils.seed_tracker import read_seed
+from app.utils.time_utils import get_kst_now
+from config import CHART_MAX_POINTS
+from datetime import datetime, timedelta
 
 st.set_page_config(page_title="BTC 자동매매 대시보드", layout="wide")
 st.title("📊 비트코인 자동매매 대시보드")
 
-# 시드 잔고 표시
-seed = get_seed()
-st.metric("💰 현재 시드 잔고", f"{seed:,} 원")
+# 거래가 없으면 캐시를 오래 유지하고, 새 거래(executed_at 변화)가 생기면 키가 바뀌어 다시 조회
+CACHE_TTL = 3600
+
+CHART_RANGES = {
+    "1시간": timedelta(hours=1),
+    "6시간": timedelta(hours=6),
+    "1일": timedelta(days=1),
+    "7일": timedelta(days=7),
+    "30일": timedelta(days=30),
+    "90일": timedelta(days=90),
+    "1년": timedelta(days=365),
+}
+
+
+@st.cache_resource
+def _prepare_summary():
+    """요약 테이블이 없거나 비어 있으면 한 번만 생성/채움"""
+    ensure_daily_pnl()
+    return True
+
+
+@st.cache_data(ttl=10)
+def get_latest_executed_at():
+    """캐시 키로 쓰는 최신 거래 시각 (executed_at 인덱스로 상수 시간)"""
+    with db_session() as conn:
+        if not conn:
+            return None
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT MAX(executed_at) FROM trade_history")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            st.error(f"[최신 거래 시각 조회 실패] {e}")
+            return None
+
+
+# 누적 수익률 / 승률 (일별 요약 테이블에서 합산)
+@st.cache_data(ttl=CACHE_TTL)
+def get_totals(version):
+    with db_session() as conn:
+        if not conn:
+            return {"roi": 0.0, "sells": 0, "wins": 0, "pnl": 0.0}
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COALESCE(SUM(roi_sum), 0), COALESCE(SUM(sells), 0),
+                           COALESCE(SUM(wins), 0), COALESCE(SUM(pnl_krw), 0)
+                    FROM trade_pnl_daily
+                """)
+                roi, sells, wins, pnl = cursor.fetchone()
+                return {"roi": float(roi), "sells": int(sells), "wins": int(wins), "pnl": float(pnl)}
+        except Exception as e:
+            st.error(f"[누적 수익률 조회 실패] {e}")
+            return {"roi": 0.0, "sells": 0, "wins": 0, "pnl": 0.0}
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def get_daily_pnl(version, days: int = 30):
+    with db_session() as conn:
+        if not conn:
+            return pd.DataFrame()
+        try:
+            return pd.read_sql("""
+                SELECT trade_date, SUM(trades) AS trades, SUM(sells) AS sells, SUM(wins) AS wins,
+                       SUM(roi_sum) AS roi_sum, SUM(pnl_krw) AS pnl_krw
+                FROM trade_pnl_daily
+                GROUP BY trade_date
+                ORDER BY trade_date DESC
+                LIMIT %s
+            """, conn, params=(days,))
+        except Exception as e:
+            st.error(f"[일별 손익 조회 실패] {e}")
+            return pd.DataFrame()
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def get_recent_trades(version, limit: int = 20):
+    with db_session() as conn:
+        if not conn:
+            return pd.DataFrame()
+        try:
+            return pd.read_sql("SELECT * FROM trade_history ORDER BY executed_at DESC LIMIT %s", conn, params=(limit,))
+        except Exception as e:
+            st.error(f"[거래 내역 조회 실패] {e}")
+            return pd.DataFrame()
+
+
+@st.cache_data(ttl=60)
+def get_candles(start: datetime, end: datetime, timeframe: str):
+    """기간 내 봉 - 1m 은 btc_price_1min, 나머지는 btc_price_rollup"""
+    with db_session() as conn:
+        if not conn:
+            return pd.DataFrame()
+        params = (start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            if timeframe == "1m":
+                return pd.read_sql("""
+                    SELECT timestamp, open, high, low, close, volume FROM btc_price_1min
+                    WHERE timestamp BETWEEN %s AND %s
+                    ORDER BY timestamp
+                """, conn, params=params)
+            return pd.read_sql("""
+                SELECT timestamp, open, high, low, close, volume FROM btc_price_rollup
+                WHERE timeframe = %s AND timestamp BETWEEN %s AND %s
+                ORDER BY timestamp
+            """, conn, params=(timeframe, *params))
+        except Exception as e:
+            st.error(f"[시세 조회 실패] {e}")
+            return pd.DataFrame()
 
-# 누적 수익률 계산 함수
-def get_total_roi():
-    conn = get_connection()
-    if not conn:
-        return 0.0
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT roi FROM trade_history WHERE roi IS NOT NULL")
-            rows = cursor.fetchall()
-            if not rows:
-                return 0.0
-            total_roi = sum(r[0] for r in rows)
-            return total_roi
-    except Exception as e:
-        st.error(f"[누적 수익률 조회 실패] {e}")
-        return 0.0
-    finally:
-        conn.close()
 
-# 누적 수익률 표시
-st.metric("📈 누적 수익률", f"{get_total_roi():.2%}")
+@st.cache_data(ttl=CACHE_TTL)
+def get_trades_between(version, start: datetime, end: datetime):
+    with db_session() as conn:
+        if not conn:
+            return pd.DataFrame()
+        try:
+            return pd.read_sql("""
+                SELECT executed_at, trade_type, price FROM trade_history
+                WHERE executed_at BETWEEN %s AND %s
+                ORDER BY executed_at
+            """, conn, params=(start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")))
+        except Exception as e:
+            st.error(f"[거래 내역 조회 실패] {e}")
+            return pd.DataFrame()
+
+
+# 차트 기간 선택
+def select_chart_range():
+    choice = st.radio("기간", [*CHART_RANGES, "직접 선택"], horizontal=True)
+    # 분 단위로 맞춰 같은 분 안의 재실행은 캐시를 그대로 사용
+    now = get_kst_now().replace(tzinfo=None, second=0, microsecond=0)
+    if choice != "직접 선택":
+        return now - CHART_RANGES[choice], now
+
+    picked = st.date_input("날짜", value=(now.date() - timedelta(days=7), now.date()))
+    if len(picked) != 2:
+        st.stop()
+    start = datetime.combine(picked[0], datetime.min.time())
+    end = min(datetime.combine(picked[1], datetime.max.time()).replace(microsecond=0), now)
+    return start, end
+
 
 # 거래 시점이 표시된 시세 차트
-def plot_trade_chart():
-    conn = get_connection()
-    if not conn:
-        return
+def plot_trade_chart(version):
     try:
-        df = pd.read_sql("SELECT * FROM btc_price_1min ORDER BY timestamp DESC LIMIT 60", conn)
-        df = df.sort_values("timestamp")
-
-        trades = pd.read_sql("SELECT * FROM trade_history ORDER BY executed_at DESC LIMIT 30", conn)
+        start, end = select_chart_range()
+        timeframe = pick_timeframe(start, end, CHART_MAX_POINTS)
+        df = get_candles(start, end, timeframe)
+        if df.empty:
+            if timeframe != "1m":
+                st.info("롤업 데이터가 없습니다. `python -m app.rollup` 으로 먼저 집계하세요.")
+            return
+        df = downsample_ohlcv(df, CHART_MAX_POINTS)
+        trades = get_trades_between(version, start, end)
 
         fig = go.Figure()
         fig.add_trace(go.Candlestick(
@@ -55,43 +178,64 @@ def plot_trade_chart():
             name='BTC 시세'
         ))
 
-        # 거래 시점 표시
-        for _, row in trades.iterrows():
-            color = "green" if row['trade_type'] == 'buy' else "red"
-            fig.add_trace(go.Scatter(
-                x=[row['executed_at']],
-                y=[row['price']],
-                mode="markers+text",
-                marker=dict(color=color, size=10),
-                name=row['trade_type'],
-                text=[row['trade_type']],
-                textposition="top center"
+        # 거래 시점 표시 - 매수/매도 각각 트레이스 하나
+        for trade_type, color, symbol in (("buy", "green", "triangle-up"), ("sell", "red", "triangle-down")):
+            rows = trades[trades['trade_type'] == trade_type]
+            if rows.empty:
+                continue
+            fig.add_trace(go.Scattergl(
+                x=rows['executed_at'],
+                y=rows['price'],
+                mode="markers",
+                marker=dict(color=color, size=10, symbol=symbol),
+                name=f"{trade_type} ({len(rows)})"
             ))
 
-        fig.update_layout(title="BTC 시세 + 거래 시점", xaxis_title="시간", yaxis_title="가격")
+        fig.update_layout(title=f"BTC 시세 + 거래 시점 ({timeframe}, {len(df)}개 봉)",
+                          xaxis_title="시간", yaxis_title="가격", xaxis_rangeslider_visible=False)
         st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
         st.error(f"[차트 로딩 실패] {e}")
-    finally:
-        conn.close()
+
+# 일별 손익
+def show_daily_pnl(version):
+    df = get_daily_pnl(version)
+    if df.empty:
+        return
+    st.subheader("📅 일별 손익")
+    df = df.sort_values("trade_date").set_index("trade_date")
+    st.bar_chart(df["pnl_krw"])
 
 # 최근 거래 내역 테이블
-def show_trade_history():
-    conn = get_connection()
-    if not conn:
+def show_trade_history(version):
+    df = get_recent_trades(version, 20)
+    if df.empty:
         return
-    try:
-        df = pd.read_sql("SELECT * FROM trade_history ORDER BY executed_at DESC LIMIT 20", conn)
-        df['executed_at'] = pd.to_datetime(df['executed_at']).dt.strftime("%Y-%m-%d %H:%M")
-        st.subheader("🧾 최근 거래 내역")
-        st.dataframe(df)
-    except Exception as e:
-        st.error(f"[거래 내역 로딩 실패] {e}")
-    finally:
-        conn.close()
-
-# 대시보드 표시
-st.divider()
-plot_trade_chart()
-st.divider()
-show_trade_history()
+    df = df.copy()
+    df['executed_at'] = pd.to_datetime(df['executed_at']).dt.strftime("%Y-%m-%d %H:%M")
+    st.subheader("🧾 최근 거래 내역")
+    st.dataframe(df)
+
+
+# 한 번의 렌더링은 연결 하나로 처리
+with db_session():
+    _prepare_summary()
+    version = get_latest_executed_at()
+
+    # 시드 잔고 표시
+    seed = read_seed()
+    st.metric("💰 현재 시드 잔고", f"{seed:,} 원")
+
+    # 누적 수익률 표시
+    totals = get_totals(version)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("📈 누적 수익률", f"{totals['roi']:.2%}")
+    col2.metric("💵 실현 손익", f"{totals['pnl']:,.0f} 원")
+    col3.metric("🎯 승률", f"{totals['wins'] / totals['sells']:.1%}" if totals['sells'] else "-")
+
+    # 대시보드 표시
+    st.divider()
+    plot_trade_chart(version)
+    st.divider()
+    show_daily_pnl(version)
+    show_trade_history(version)
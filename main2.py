@@ -1,155 +1,267 @@
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import pyupbit
-from app.db_1min_btc import save_1min_btc_to_db
-from app.strategy2 import check_entry_signal, check_exit_signal
+from app.db_1min_btc import save_1min_btc_to_db, save_candles_to_db, load_candle_buffer, market_state_lock
+from app.history_store import get_history_store
+from app.market_feed import MarketFeed, candles_to_df
+from app.strategy2 import (
+    DEFAULT_PARAMS, check_entry_signal, check_exit_signal, recent_loss_within, warm_up_indicator_stream,
+)
+from app.pnl_summary import ensure_daily_pnl
+from app.position_manager import positions
+from app.rollup import get_rollups
 from app.trader import buy, sell
 from app.utils.logger import get_logger
 from app.utils.discord import send_discord_message
-from app.utils.db_connect import get_connection
+from app.utils.db_connect import db_session
+from app.utils.metrics import errors, rest_calls, stage, start_metrics
+from app.utils.scheduler import CandleScheduler
 from app.utils.seed_tracker import get_seed
-from config import TRADE_AMOUNT, TAKE_PROFIT, STOP_LOSS, COIN_TICKER
+from config import (
+    TRADE_AMOUNT, TAKE_PROFIT, STOP_LOSS, COIN_TICKER, MARKET_FEED,
+    TICK_WORKERS, TICK_CANDLE_TIMEOUT, TICK_PRICE_TIMEOUT, TICK_DB_TIMEOUT, HISTORY_STORE_ENABLED,
+)
 
 log = get_logger()
 
+# 웹소켓 모드에서 사용하는 시세 피드
+_feed = None
+
 def get_current_price():
-    """현재 가격 조회 함수"""
+    """현재 가격 조회 함수 (웹소켓 피드가 있으면 피드의 최신가 사용)"""
+    if _feed is not None:
+        price = _feed.last_price(COIN_TICKER)
+        if price is not None:
+            return price
+    rest_calls.inc(endpoint="get_current_price")
     try:
         return pyupbit.get_current_price(COIN_TICKER)
     except Exception as e:
+        errors.inc(stage="current_price")
         log.error(f"[현재가 조회 실패] {e}")
         return None
 
-def get_last_buy():
-    """최근 매수 기록 조회"""
-    conn = get_connection()
-    if not conn:
-        return None
+def is_btc_data_sufficient():
+    """비트코인 데이터가 충분한지 확인"""
+    with db_session() as conn:
+        if not conn:
+            return False
 
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT price, amount, executed_at
-                FROM trade_history
-                WHERE trade_type = 'buy'
-                ORDER BY executed_at DESC
-                LIMIT 1
-            """)
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "price": row[0],
-                    "amount": row[1],
-                    "executed_at": row[2]
-                }
-        return None
-    except Exception as e:
-        log.error(f"[최근 매수 조회 실패] {e}")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM btc_price_1min")
+                count = cursor.fetchone()[0]
+                return count >= 20
+        except Exception as e:
+            log.error(f"[btc_price_1min 카운트 조회 실패] {e}")
+            return False
+
+# 틱마다 동시에 실행하는 I/O 구간 (시세 저장 / 현재가 / 손실 후 진입 제한 조회)
+_legs = ThreadPoolExecutor(max_workers=TICK_WORKERS, thread_name_prefix="tick-leg")
+_running = {}  # 구간 이름 → 마지막으로 제출한 future
+_TIMED_OUT = object()
+
+
+def _submit(name: str, func, *args, session: bool = False):
+    """
+    단계 계측을 붙여 풀에 제출
+    - session=True 면 구간 전체를 작업 스레드의 연결 하나로 처리 (구간마다 연결 1개)
+    - 지난 틱의 같은 구간이 아직 돌고 있으면 새로 제출하지 않고 None (겹쳐 쌓이지 않도록)
+    """
+    previous = _running.get(name)
+    if previous is not None and not previous.done():
+        errors.inc(stage=f"{name}_overlap")
+        log.warning(f"⌛ 지난 틱의 {name} 가 아직 실행 중 → 이번 틱은 제출 생략")
         return None
-    finally:
-        conn.close()
 
-def is_btc_data_sufficient():
-    """비트코인 데이터가 충분한지 확인"""
-    conn = get_connection()
-    if not conn:
-        return False
+    def run():
+        with stage(name):
+            if not session:
+                return func(*args)
+            with db_session():
+                return func(*args)
 
+    future = _running[name] = _legs.submit(run)
+    return future
+
+
+def _wait(future, name: str, deadline: float, default=None):
+    """
+    deadline(monotonic)까지만 결과를 기다림
+    시간 초과나 오류면 default 를 돌려주고 틱은 그대로 진행 (늦은 구간은 백그라운드에서 마저 끝남)
+    future 가 None(제출 생략)이면 바로 default
+    """
+    if future is None:
+        return default
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) FROM btc_price_1min")
-            count = cursor.fetchone()[0]
-            return count >= 20
-    except Exception as e:
-        log.error(f"[btc_price_1min 카운트 조회 실패] {e}")
-        return False
-    finally:
-        conn.close()
-
-def has_open_position():
-    """현재 열린 포지션이 있는지 확인"""
-    conn = get_connection()
-    if not conn:
-        return False, None, None
-    
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT trade_type, price, amount FROM trade_history
-                ORDER BY executed_at DESC
-                LIMIT 1
-            """)
-            row = cursor.fetchone()
-            
-            if not row or row[0] == 'sell':
-                return False, None, None
-            
-            # 마지막 거래가 매수면 해당 가격과 수량 반환
-            return True, row[1], row[2]
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        errors.inc(stage=f"{name}_timeout")
+        log.warning(f"⌛ {name} 응답 지연 → 이번 틱은 이 값 없이 진행")
     except Exception as e:
-        log.error(f"[포지션 확인 실패] {e}")
-        return False, None, None
-    finally:
-        conn.close()
+        log.error(f"[{name} 실패] {e}")
+    return default
 
-def start_loop():
-    """자동매매 메인 루프"""
-    log.info("📈 자동매매 시작")
-    send_discord_message("📈 자동매매 시작됨 (main2.py)")
 
-    # 최초 실행 시 데이터 확보
+def run_tick():
+    """
+    한 틱(1분) 동안의 데이터 저장 → 포지션 확인 → 진입/청산 판단
+
+    서로 의존하지 않는 I/O(1분봉 조회·저장, 현재가, 최근 손실 조회)는 동시에 시작하고
+    판단에 필요한 시점에 구간별 제한 시간까지만 기다린다
+    - 1분봉 저장이 늦으면: 지난 데이터로 새 진입은 하지 않고 청산 판단만
+    - 최근 손실 조회가 늦으면: 진입 제한 중으로 간주
+    - 현재가가 늦으면: 주문 생략
+    DB 를 쓰는 구간은 각자 연결 하나, 판단/주문은 메인 스레드에서 연결 하나를 쓴다
+    (늦게 끝나는 저장 구간과 신호 판단은 market_state_lock 으로 서로 막음)
+    """
+    with stage("tick"):
+        started = time.monotonic()
+        params = DEFAULT_PARAMS
+        saved = _submit("save_candles", save_1min_btc_to_db, 3, True, session=True)
+        price = _submit("current_price", get_current_price)
+        cooldown = _submit("cooldown_check", recent_loss_within, params.loss_cooldown_minutes, params.loss_threshold,
+                           session=True)
+
+        fresh = _wait(saved, "save_candles", started + TICK_CANDLE_TIMEOUT, _TIMED_OUT) is not _TIMED_OUT
+        with db_session():
+            evaluate_position(
+                current_price=lambda: _wait(price, "current_price", started + TICK_PRICE_TIMEOUT),
+                in_cooldown=lambda: _wait(cooldown, "cooldown_check", started + TICK_DB_TIMEOUT, True),
+                allow_entry=fresh,
+            )
+
+def _current_price_now():
+    with stage("current_price"):
+        return get_current_price()
+
+def evaluate_position(current_price=None, in_cooldown=None, allow_entry: bool = True):
+    """
+    현재 포지션에 따라 진입 또는 청산 판단
+
+    Args:
+        current_price: 현재가를 돌려주는 함수 (기본: 바로 조회)
+        in_cooldown: 손실 후 진입 제한 여부를 돌려주는 함수 (기본: 진입 판단 때 조회)
+        allow_entry: False 면 새 진입은 하지 않음 (시세 저장이 늦은 틱)
+    """
+    current_price = current_price or _current_price_now
+
+    # 현재 포지션 확인
+    with stage("position_check"):
+        has_position, entry_price, position_amount = positions.open_position()
+
+    if not has_position:
+        if not allow_entry:
+            log.warning("⛔ 1분봉 갱신 지연 → 이번 틱 진입 판단 생략")
+            return
+
+        # 포지션이 없을 때 진입 신호 확인
+        cooldown = in_cooldown() if in_cooldown else None
+        with stage("entry_signal"), market_state_lock:
+            should_enter, entry_ratio = check_entry_signal(in_cooldown=cooldown)
+
+        if should_enter:
+            # 진입 비율에 따라 거래 금액 계산
+            entry_amount = TRADE_AMOUNT * entry_ratio
+
+            # 현재 가격 조회
+            price = current_price()
+            if price:
+                # 수량 계산
+                coin_amount = entry_amount / price
+
+                # 매수 실행
+                with stage("order"):
+                    buy(price=price, amount=coin_amount)
+                log.info(f"매수 실행: {entry_amount}원 ({entry_ratio*100}% 진입)")
+    else:
+        # 포지션이 있을 때 청산 신호 확인
+        with stage("exit_signal"), market_state_lock:
+            should_exit = check_exit_signal(entry_price)
+
+        if should_exit:
+            price = current_price()
+            if price and entry_price:
+                # ROI 계산 (수수료 0.05% 고려)
+                fee_rate = 0.0005  # 업비트 수수료 0.05%
+                roi = ((price * (1 - fee_rate)) / (entry_price * (1 + fee_rate))) - 1
+
+                # 매도 실행
+                with stage("order"):
+                    sell(price, position_amount, roi)
+                log.info(f"매도 실행: {price}원, ROI: {roi:.2%}")
+
+def prepare_data():
+    """시작 시 1분봉 확보 및 캔들 버퍼 / 지표 스트림 / 포지션 상태 / 롤업 / 히스토리 저장소 초기화"""
     if not is_btc_data_sufficient():
         log.info("📥 BTC 1분봉 데이터 부족 → 60개 강제 저장")
         save_1min_btc_to_db(limit=60)
         time.sleep(1)
 
-    # 메인 루프
-    while True:
+    # 히스토리 저장소가 지워졌거나(배포) 꺼져 있던 동안 빠진 봉을 DB 에서 채움
+    if HISTORY_STORE_ENABLED:
         try:
-            # 최신 데이터 저장
-            save_1min_btc_to_db(limit=3)
-            
-            # 현재 포지션 확인
-            has_position, entry_price, position_amount = has_open_position()
-            
-            if not has_position:
-                # 포지션이 없을 때 진입 신호 확인
-                should_enter, entry_ratio = check_entry_signal()
-                
-                if should_enter:
-                    # 진입 비율에 따라 거래 금액 계산
-                    entry_amount = TRADE_AMOUNT * entry_ratio
-                    
-                    # 현재 가격 조회
-                    current_price = get_current_price()
-                    if current_price:
-                        # 수량 계산
-                        coin_amount = entry_amount / current_price
-                        
-                        # 매수 실행
-                        buy(price=current_price, amount=coin_amount)
-                        log.info(f"매수 실행: {entry_amount}원 ({entry_ratio*100}% 진입)")
-            else:
-                # 포지션이 있을 때 청산 신호 확인
-                should_exit = check_exit_signal(entry_price)
-                
-                if should_exit:
-                    current_price = get_current_price()
-                    if current_price and entry_price:
-                        # ROI 계산 (수수료 0.05% 고려)
-                        fee_rate = 0.0005  # 업비트 수수료 0.05%
-                        roi = ((current_price * (1 - fee_rate)) / (entry_price * (1 + fee_rate))) - 1
-                        
-                        # 매도 실행
-                        sell(current_price, position_amount, roi)
-                        log.info(f"매도 실행: {current_price}원, ROI: {roi:.2%}")
-                        
-            # 60초 대기
-            time.sleep(60)
+            get_history_store(COIN_TICKER).sync_from_db()
+        except OSError as e:
+            log.error(f"[히스토리 저장소 동기화 실패] {e}")
+
+    # 캔들 버퍼 / 지표 스트림 초기화 (이후 틱마다 새 캔들만 반영)
+    load_candle_buffer()
+    warm_up_indicator_stream(60)
+    positions.load()
+    ensure_daily_pnl()
+    get_rollups().load()
 
+def start_loop():
+    """자동매매 메인 루프"""
+    log.info("📈 자동매매 시작")
+    send_discord_message("📈 자동매매 시작됨 (main2.py)")
+    start_metrics()
+    prepare_data()
+
+    # 메인 루프 - 매 분 봉 마감 직후에 실행 (오류가 나도 다음 봉 마감에 재시도)
+    scheduler = CandleScheduler()
+    for tick in scheduler:
+        try:
+            run_tick()
         except Exception as e:
+            errors.inc(stage="loop")
             log.error(f"[감시 루프 오류] {e}")
             send_discord_message(f"❌ 감시 루프 오류 발생: {e}")
-            time.sleep(60)  # 오류 발생 시에도 60초 대기 후 재시도
+        finally:
+            scheduler.done(tick)
+
+def on_candle_close(ticker: str, candle: dict):
+    """웹소켓 피드에서 1분봉이 마감되는 즉시 호출"""
+    try:
+        with db_session(), stage("tick"):
+            with stage("save_candles"):
+                if candle.get("partial"):
+                    # 접속 직후 불완전한 봉은 REST 로 정확한 값을 받아 저장
+                    save_1min_btc_to_db(limit=3)
+                else:
+                    save_candles_to_db(candles_to_df([candle]))
+            evaluate_position()
+    except Exception as e:
+        errors.inc(stage="loop")
+        log.error(f"[감시 루프 오류] {e}")
+        send_discord_message(f"❌ 감시 루프 오류 발생: {e}")
+
+def start_feed_loop():
+    """웹소켓 시세 피드 기반 자동매매 (봉 마감 즉시 판단)"""
+    global _feed
+
+    log.info("📈 자동매매 시작 (웹소켓 피드)")
+    send_discord_message("📈 자동매매 시작됨 (main2.py, websocket)")
+    start_metrics()
+    prepare_data()
+
+    _feed = MarketFeed([COIN_TICKER], on_candle=on_candle_close)
+    asyncio.run(_feed.run())
 
 if __name__ == "__main__":
-    start_loop()
\ No newline at end of file
+    if MARKET_FEED == "websocket":
+        start_feed_loop()
+    else:
+        start_loop()
\ No newline at end of file
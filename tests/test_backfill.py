@@ -0,0 +1,173 @@
+# tests/test_backfill.py
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import backfill  # noqa: E402
+
+MINUTE = timedelta(minutes=1)
+KST_OFFSET = timedelta(hours=9)
+
+
+class FakeDB:
+    """btc_price_1min 대역 - find_gaps 쿼리(경계값 + LAG)와 upsert_candles 를 메모리에서 처리"""
+
+    def __init__(self, timestamps=()):
+        self.rows = set(timestamps)
+        self.upserts = 0
+
+    def upsert(self, df: pd.DataFrame) -> bool:
+        self.upserts += 1
+        self.rows.update(ts.to_pydatetime() for ts in df.index)
+        return True
+
+    @contextmanager
+    def session(self):
+        yield self
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+
+class _FakeCursor:
+    def __init__(self, db: FakeDB):
+        self._db = db
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, sql, params):
+        low, _, high, _ = (datetime.strptime(p, backfill.TS_FORMAT) for p in params)
+        ts = [low] + sorted(t for t in self._db.rows if low < t < high) + [high]
+        self._rows = [(prev, cur) for prev, cur in zip(ts, ts[1:]) if cur - prev > MINUTE]
+
+    def fetchall(self):
+        return self._rows
+
+
+class UpbitStub:
+    """
+    업비트 1분봉 API 대역 - 실제 API 처럼 시간대 없는 to 를 UTC 로 해석하고
+    to 이전(미포함) 거래가 있던 분의 최근 count 개를 KST 인덱스로 돌려준다
+    """
+
+    def __init__(self, start: datetime, end: datetime, missing=()):
+        self.minutes = [t for t in pd.date_range(start, end, freq="1min").to_pydatetime() if t not in set(missing)]
+        self.calls = []
+
+    def get_ohlcv(self, ticker, interval="minute1", count=200, to=None, **kwargs):
+        to_kst = datetime.strptime(to, backfill.TS_FORMAT) + KST_OFFSET
+        self.calls.append(to_kst)
+        index = [t for t in self.minutes if t < to_kst][-count:]
+        price = [float(i) for i in range(len(index))]
+        return pd.DataFrame({"open": price, "high": price, "low": price, "close": price, "volume": 1.0},
+                            index=pd.DatetimeIndex(index))
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    def setup(existing=(), start=None, end=None, missing=()):
+        db = FakeDB(existing)
+        upbit = UpbitStub(start - timedelta(days=1), end, missing)
+        monkeypatch.setattr(backfill, "db_session", db.session)
+        monkeypatch.setattr(backfill, "upsert_candles", db.upsert)
+        monkeypatch.setattr(backfill.pyupbit, "get_ohlcv", upbit.get_ohlcv)
+        return db, upbit, str(tmp_path / "backfill_state.json")
+    return setup
+
+
+START = datetime(2026, 1, 1, 0, 0)
+END = datetime(2026, 1, 1, 23, 59)
+
+
+def _minutes(start, end):
+    return list(pd.date_range(start, end, freq="1min").to_pydatetime())
+
+
+def test_find_gaps_reports_leading_inner_and_trailing_gaps(env):
+    existing = _minutes(START + 10 * MINUTE, START + 99 * MINUTE) + _minutes(START + 150 * MINUTE, END - 5 * MINUTE)
+    env(existing, START, END)
+
+    assert backfill.find_gaps(START, END) == [
+        (START, START + 9 * MINUTE),
+        (START + 100 * MINUTE, START + 149 * MINUTE),
+        (END - 4 * MINUTE, END),
+    ]
+
+
+def test_find_gaps_on_empty_table_is_whole_range(env):
+    env((), START, END)
+    assert backfill.find_gaps(START, END) == [(START, END)]
+
+
+def test_split_pages_covers_gap_newest_first_without_overlap():
+    gap = (START, START + 449 * MINUTE)
+    pages = backfill.split_pages([gap])
+
+    assert pages == [
+        (START + 250 * MINUTE, START + 450 * MINUTE),
+        (START + 50 * MINUTE, START + 250 * MINUTE),
+        (START, START + 50 * MINUTE),
+    ]
+
+
+def test_backfill_fills_gaps_and_keeps_to_page_window(env):
+    existing = _minutes(START, START + 99 * MINUTE) + _minutes(START + 400 * MINUTE, END)
+    db, upbit, state = env(existing, START, END)
+
+    stats = backfill.backfill(START, END, workers=2, rps=1000, state_file=state, fetch=backfill._default_fetch)
+
+    assert stats["gaps"] == 1 and stats["pages"] == 2
+    assert stats["fetched"] == 2 and stats["failed"] == 0 and stats["uncovered"] == 0
+    assert stats["rows"] == 300  # 페이지 밖 봉은 저장하지 않음
+    assert backfill.find_gaps(START, END) == []
+    # KST 페이지 끝이 업비트에는 UTC 로 전달됨
+    assert sorted(upbit.calls) == [START + 200 * MINUTE, START + 400 * MINUTE]
+
+
+def test_page_without_trades_is_done_once_covered(env):
+    missing = _minutes(START + 120 * MINUTE, START + 129 * MINUTE)  # 거래 없는 10분
+    existing = [t for t in _minutes(START, END) if not START + 100 * MINUTE <= t < START + 200 * MINUTE]
+    db, upbit, state = env(existing, START, END, missing)
+
+    first = backfill.backfill(START, END, rps=1000, state_file=state)
+    assert first["fetched"] == 1 and first["rows"] == 90 and first["uncovered"] == 0
+    assert backfill.find_gaps(START, END) == [(START + 120 * MINUTE, START + 129 * MINUTE)]
+
+    # 남은 빈 분은 새 페이지(to 가 다름)라 한 번 더 받고, 그 뒤로는 상태 파일로 건너뜀
+    backfill.backfill(START, END, rps=1000, state_file=state)
+    calls = len(upbit.calls)
+    again = backfill.backfill(START, END, rps=1000, state_file=state)
+    assert again["skipped"] == again["pages"] == 1 and again["fetched"] == 0
+    assert len(upbit.calls) == calls
+
+
+def test_misaligned_response_is_not_marked_done(env):
+    existing = _minutes(START, START + 99 * MINUTE) + _minutes(START + 300 * MINUTE, END)
+    db, upbit, state = env(existing, START, END)
+
+    # 시간대를 빼먹고 KST 를 그대로 보내는 fetch - 9시간 뒤 구간이 돌아옴
+    def naive_fetch(ticker, count, to):
+        return upbit.get_ohlcv(ticker, count=count, to=to.strftime(backfill.TS_FORMAT))
+
+    stats = backfill.backfill(START, END, rps=1000, state_file=state, fetch=naive_fetch)
+    assert stats["rows"] == 0 and stats["uncovered"] == 1
+    with open(state) as f:
+        assert json.load(f)["done"] == []
+
+    # 올바른 fetch 로 다시 돌리면 같은 페이지를 다시 받아 채움
+    stats = backfill.backfill(START, END, rps=1000, state_file=state)
+    assert stats["skipped"] == 0 and stats["rows"] == 200
+    assert backfill.find_gaps(START, END) == []
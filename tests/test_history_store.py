@@ -0,0 +1,83 @@
+# tests/test_history_store.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import history_store  # noqa: E402
+from app.history_store import FILES, HistoryStore  # noqa: E402
+
+
+def _candles(start: str, minutes: int, base: float = 100.0) -> pd.DataFrame:
+    index = pd.date_range(start, periods=minutes, freq="min")
+    close = base + np.arange(minutes, dtype=np.float64)
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": np.ones(minutes)}, index=index)
+
+
+def _without(df: pd.DataFrame, *positions) -> pd.DataFrame:
+    return df.drop(df.index[list(positions)])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(root=str(tmp_path), ticker="KRW-BTC")
+
+
+def test_late_candle_rewrites_into_new_generation(store):
+    df = _candles("2026-01-01 09:00", 10)
+    store.append_df(_without(df, 3))
+    held = store.columns()  # 대시보드처럼 교체 전 memmap 을 들고 있는 reader
+
+    store.append_df(df.iloc[[3]])
+
+    assert store._generation() == "gen-000001"
+    assert list(store.to_frame()["close"]) == list(df["close"])
+    assert len(held["close"]) == 9 and held["close"][3] == df["close"].iloc[4]
+    assert sorted(os.listdir(store.path)) == ["CURRENT", "gen-000001"]
+
+
+def test_crash_before_pointer_swap_keeps_previous_generation(store, monkeypatch):
+    df = _candles("2026-01-01 09:00", 10)
+    store.append_df(_without(df, 3, 6))
+    store.append_df(df.iloc[[3]])
+
+    def crash(*args):
+        raise OSError("디스크 오류")
+
+    monkeypatch.setattr(history_store.os, "replace", crash)
+    with pytest.raises(OSError):
+        store.append_df(df.iloc[[6]])
+    monkeypatch.undo()
+
+    # 새 세대는 다 쓰였어도 CURRENT 가 그대로라 모든 컬럼이 이전 세대를 본다
+    assert store._generation() == "gen-000001"
+    frame = store.to_frame()
+    assert len(frame) == 9 and list(frame["close"]) == list(_without(df, 6)["close"])
+
+    store.append_df(df.iloc[[6]])
+    assert store._generation() == "gen-000002"
+    assert list(store.to_frame()["close"]) == list(df["close"])
+    assert sorted(os.listdir(store.path)) == ["CURRENT", "gen-000002"]
+
+
+def test_legacy_layout_is_read_and_migrated_on_rewrite(store):
+    df = _candles("2026-01-01 09:00", 5)
+    kept = _without(df, 2)
+    os.makedirs(store.path)
+    columns = {"timestamp": kept.index.to_numpy().astype("datetime64[ns]").astype(np.int64),
+               **{name: kept[name].to_numpy() for name in kept.columns}}
+    for name, (filename, dtype) in FILES.items():
+        np.asarray(columns[name], dtype=dtype).tofile(os.path.join(store.path, filename))
+
+    assert len(store) == 4
+    store.append_df(df.iloc[[2]])
+
+    assert store._generation() == "gen-000001"
+    assert list(store.to_frame()["close"]) == list(df["close"])
+    assert sorted(os.listdir(store.path)) == ["CURRENT", "gen-000001"]
@@ -0,0 +1,36 @@
+# tests/test_indicator_stream.py
+
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.indicator_stream import IndicatorStream  # noqa: E402
+
+
+def _candles(volumes):
+    index = pd.date_range("2026-01-01 09:00", periods=len(volumes), freq="min")
+    close = pd.Series(np.linspace(100.0, 110.0, len(volumes)), index=index)
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": volumes}, index=index)
+
+
+def test_volume_ratio_matches_pandas_when_volume_stops():
+    # 거래가 10분 넘게 없으면 거래량 평균이 0 - 그 뒤 첫 거래는 inf, 거래 없는 봉은 NaN
+    volumes = [5.0] * 12 + [0.0] * 12 + [3.0, 0.0]
+    df = _candles(volumes)
+    expected = (df["volume"] / df["volume"].rolling(10).mean()).tolist()
+
+    stream = IndicatorStream()
+    actual = [stream.update(ts, o, h, l, c, v)["volume_ratio"]
+              for ts, o, h, l, c, v in zip(df.index, df["open"], df["high"], df["low"], df["close"], df["volume"])]
+
+    for got, want in zip(actual, expected):
+        if math.isnan(want):
+            assert math.isnan(got)
+        else:
+            assert got == want or math.isclose(got, want, rel_tol=1e-9)